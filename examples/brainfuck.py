@@ -83,7 +83,7 @@ class BFInterpreter(FileProcessor):
 
     def __init__(self):
         self.vm = BFVM()
-        super(BFInterpreter, self).__init__('Interpreter')
+        super(BFInterpreter, self).__init__('Interpreter', True)
 
     def build_graph(self):
         """
@@ -206,7 +206,7 @@ class BFConverter(FileProcessor):
     DEFAULT = {SRC: ['import sys', 'i, mem = 0, bytearray(30000)\n'], LEVEL: 0}
 
     def __init__(self):
-        super(BFConverter, self).__init__('Converter')
+        super(BFConverter, self).__init__('Converter', True)
 
     def build_graph(self):
         """
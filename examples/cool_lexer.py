@@ -9,6 +9,8 @@
 
 import re
 
+from itertools import chain
+
 from gt.core import *
 from gt.procs import FileProcessor
 
@@ -72,22 +74,30 @@ class Eater(object):
         self.stops = stops
 
     def eat(self, text):
-        pos = text.find(EOF)  # End of file is a last position in any case
+        start = 0
+
+        if isinstance(text, TextCursor):  # Search in the original buffer, no copying
+            text, start = text.buffer, text.position
+
+        pos = text.find(EOF, start)  # End of file is a last position in any case
+
+        if pos < 0:
+            pos = len(text)  # Streaming, no end of file in the window yet
 
         for stop in self.stops:
             new_pos = -1
 
             if is_regex(stop):
-                p = stop.search(text)
+                p = stop.search(text, start)
                 if p:
                     new_pos = p.start()
             else:
-                new_pos = text.find(stop)
+                new_pos = text.find(stop, start)
 
             if 0 <= new_pos < pos:
                 pos = new_pos
 
-        return pos or True
+        return (pos - start if pos >= 0 else pos) or True
 
     @staticmethod
     def get_eater(stops):
@@ -119,12 +129,58 @@ def add_to_string(last_parsed, string_body, string_error):
     return {ParsingProcess.UPDATE_CONTEXT: {STRING_BODY: string_body + last_parsed}}
 
 
+# The actions are module-level functions or lexer methods, so the graph could be pickled
+def add_escaped_eol(string_body, string_error):
+    return tupled(add_to_string('\n', string_body, string_error), inc_line_no)
+
+
+def add_escaped_new_line(string_body, string_error):
+    return add_to_string('\n', string_body, string_error)
+
+
+def add_escaped_tab(string_body, string_error):
+    return add_to_string('\t', string_body, string_error)
+
+
+def add_escaped_backspace(string_body, string_error):
+    return add_to_string('\b', string_body, string_error)
+
+
+def add_escaped_form_feed(string_body, string_error):
+    return add_to_string('\f', string_body, string_error)
+
+
+def add_string_error(error, stop=False):
+    """
+    Adding the string error to the context, stopping the string if needed
+    """
+    result = {ParsingProcess.ADD_CONTEXT: {STRING_ERROR: error}}
+    return [result, ParsingProcess.BREAK] if stop else result
+
+
+def null_char_error():
+    return add_string_error('null_char')
+
+
+def null_char_esc_error():
+    return add_string_error('null_char_esc')
+
+
+def eol_error():
+    return add_string_error('unescaped_eol', True)
+
+
+def eof_error():
+    return add_string_error('eof', True)
+
+
 class CoolLexer(FileProcessor):
     """
     Main lexer class
     """
-    def __init__(self):
-        super(CoolLexer, self).__init__('COOL lexer')
+    def __init__(self, streaming=False, graph=None):
+        super(CoolLexer, self).__init__('COOL lexer', True, streaming, graph)
+        self.parser.cursor = True
         self.result = ''
 
     def build_graph(self):
@@ -135,26 +191,26 @@ class CoolLexer(FileProcessor):
 
         # Operators
         self.builder[statement].parse_rel(list(TOKEN_DICT.keys()), ignore_case=True).\
-            act('Operator', lambda line_no, last_parsed: self.out_token(line_no, TOKEN_DICT[last_parsed.upper()]))
+            act('Operator', self.out_operator)
 
         self.builder[statement].parse_rel(SINGLE_CHAR_OP).\
-            act('Single Char Operator', lambda line_no, last_parsed: self.out_token(line_no, '\'' + last_parsed + '\''))
+            act('Single Char Operator', self.out_single_char_operator)
 
         # Integers
         self.builder[statement].parse_rel(R_INTEGER).\
-            act('Integer', lambda line_no, last_parsed: self.out_token(line_no, 'INT_CONST', last_parsed))
+            act('Integer', self.out_integer)
 
         # Booleans
         self.builder[statement].parse_rel(R_BOOLEAN).\
-            act('Boolean', lambda line_no, last_parsed: self.out_token(line_no, 'BOOL_CONST', last_parsed.lower()))
+            act('Boolean', self.out_boolean)
 
         # Object ID
         self.builder[statement].parse_rel(R_OBJECT_ID).\
-            act('Object ID', lambda line_no, last_parsed: self.out_token(line_no, 'OBJECTID', last_parsed))
+            act('Object ID', self.out_object_id)
 
         # Type ID
         self.builder[statement].parse_rel(R_TYPE_ID).\
-            act('Type ID', lambda line_no, last_parsed: self.out_token(line_no, 'TYPEID', last_parsed))
+            act('Type ID', self.out_type_id)
 
         # New line: increment the counter
         self.builder[statement].parse_rel(R_EOL, inc_line_no)
@@ -171,10 +227,10 @@ class CoolLexer(FileProcessor):
 
         # Errors
         self.builder[statement].parse_rel('*)').\
-            act('Unmatched multi-line', lambda line_no: self.out_token(line_no, ERROR_TOKEN, 'Unmatched *)'))
+            act('Unmatched multi-line', self.out_unmatched_comment)
 
         self.builder[statement].parse_rel(R_ANY_CHAR).default().\
-            act('Unexpected character', lambda line_no, last_parsed: self.out_token(line_no, ERROR_TOKEN, last_parsed))
+            act('Unexpected character', self.out_unexpected_char)
 
         # Stopping
         self.builder[statement].parse_rel(EOF, ParsingProcess.OK)
@@ -195,6 +251,34 @@ class CoolLexer(FileProcessor):
 
         self.result += '#%s %s %s\n' % (line_no, token, data) if data else '#%s %s\n' % (line_no, token)
 
+    def out_operator(self, line_no, last_parsed):
+        self.out_token(line_no, TOKEN_DICT[last_parsed.upper()])
+
+    def out_single_char_operator(self, line_no, last_parsed):
+        self.out_token(line_no, '\'' + last_parsed + '\'')
+
+    def out_integer(self, line_no, last_parsed):
+        self.out_token(line_no, 'INT_CONST', last_parsed)
+
+    def out_boolean(self, line_no, last_parsed):
+        self.out_token(line_no, 'BOOL_CONST', last_parsed.lower())
+
+    def out_object_id(self, line_no, last_parsed):
+        self.out_token(line_no, 'OBJECTID', last_parsed)
+
+    def out_type_id(self, line_no, last_parsed):
+        self.out_token(line_no, 'TYPEID', last_parsed)
+
+    def out_unmatched_comment(self, line_no):
+        self.out_token(line_no, ERROR_TOKEN, 'Unmatched *)')
+
+    def out_unexpected_char(self, line_no, last_parsed):
+        self.out_token(line_no, ERROR_TOKEN, last_parsed)
+
+    def out_eof_in_comment(self, line_no):
+        self.out_token(line_no, ERROR_TOKEN, 'EOF in comment')
+        return ParsingProcess.BREAK
+
     def add_multiline_comment(self, statement):
         """
         Multi-line comment notion
@@ -204,8 +288,7 @@ class CoolLexer(FileProcessor):
 
         self.builder[multiline_comment_body].parse_rel(R_EOL, inc_line_no)
         self.builder[multiline_comment_body].parse_rel(EOF, check_only=True).\
-            act('EOF in comment', lambda line_no: [self.out_token(line_no, ERROR_TOKEN, 'EOF in comment'),
-                                                   ParsingProcess.BREAK])
+            act('EOF in comment', self.out_eof_in_comment)
 
         # Nested comment
         self.builder[multiline_comment_body].parse_rel('(*', statement.owner.notion('Multi-line comment'))
@@ -243,34 +326,27 @@ class CoolLexer(FileProcessor):
 
         # 0 character error
         self.builder[string_chars].parse_rel(ZERO_CHAR).\
-            act('Null character error', lambda: {ParsingProcess.ADD_CONTEXT: {STRING_ERROR: 'null_char'}})
+            act('Null character error', null_char_error)
 
         # If EOL matched stop the string with error or just break
         self.builder[string_chars].parse_rel(R_EOL, check_only=True).\
-            act('EOL', lambda: [{ParsingProcess.ADD_CONTEXT: {STRING_ERROR: 'unescaped_eol'}}, ParsingProcess.BREAK])
+            act('EOL', eol_error)
 
         # Stop if EOF
         self.builder[string_chars].parse_rel(EOF, check_only=True).\
-            act('EOF error', lambda: [{ParsingProcess.ADD_CONTEXT: {STRING_ERROR: 'eof'}}, ParsingProcess.BREAK])
+            act('EOF error', eof_error)
 
         # Escapes
         escapes = self.builder[string_chars].parse_rel('\\').select('Escapes').current
 
-        self.builder[escapes].parse_rel(R_EOL,
-            lambda string_body, string_error: tupled(add_to_string('\n', string_body, string_error), inc_line_no))
+        self.builder[escapes].parse_rel(R_EOL, add_escaped_eol)
 
-        self.builder[escapes].\
-            parse_rel('n', lambda string_body, string_error: add_to_string('\n', string_body, string_error))
-        self.builder[escapes].\
-            parse_rel('t', lambda string_body, string_error: add_to_string('\t', string_body, string_error))
-        self.builder[escapes].\
-            parse_rel('b', lambda string_body, string_error: add_to_string('\b', string_body, string_error))
-        self.builder[escapes].\
-            parse_rel('f', lambda string_body, string_error: add_to_string('\f', string_body, string_error))
+        self.builder[escapes].parse_rel('n', add_escaped_new_line)
+        self.builder[escapes].parse_rel('t', add_escaped_tab)
+        self.builder[escapes].parse_rel('b', add_escaped_backspace)
+        self.builder[escapes].parse_rel('f', add_escaped_form_feed)
 
-        self.builder[escapes].parse_rel(ZERO_CHAR).\
-            act('Escaped null character error',
-                lambda line_no: {ParsingProcess.ADD_CONTEXT: {STRING_ERROR: 'null_char_esc'}})
+        self.builder[escapes].parse_rel(ZERO_CHAR).act('Escaped null character error', null_char_esc_error)
 
         self.builder[escapes].parse_rel(R_ANY_CHAR, add_to_string)
 
@@ -288,7 +364,9 @@ class CoolLexer(FileProcessor):
 
     def on_file(self, *message):
         super(CoolLexer, self).on_file(*message)
-        message[0][self.parser.TEXT] += EOF
+
+        text = message[0][self.parser.TEXT]
+        message[0][self.parser.TEXT] = text + EOF if is_string(text) else chain(text, [EOF])
 
     def get_reply(self, result):
         if result != self.parser.OK:
@@ -297,8 +375,8 @@ class CoolLexer(FileProcessor):
         return self.result
 
 
-def lex_file(filename):
-    lexer = CoolLexer()
+def lex_file(filename, streaming=False):
+    lexer = CoolLexer(streaming)
     return lexer(lexer.NEW, {lexer.FILENAME: filename})
 
 
@@ -0,0 +1,115 @@
+"""
+.. module:: gt.aio
+   :platform: Unix, Windows
+   :synopsis: Graph-talk asyncio processes, Python 3.5+ only
+
+.. moduleauthor:: Stas Kravets (krvss) <stas.kravets@gmail.com>
+
+"""
+
+import asyncio
+import inspect
+
+from types import GeneratorType
+
+from gt.core import *
+
+
+class AsyncProcess(Process):
+    """
+    Process with the coroutine :meth:`AsyncProcess.handle` to be run on the asyncio event loop. The events (e.g.
+    actions) could return awaitables: the process awaits them and handles their results as if the events returned
+    them, the empty results are skipped. The process yields to the event loop every
+    :attr:`AsyncProcess.YIELD_STEPS` steps, so many processes could run concurrently on one loop::
+
+        async def lookup(symbol):
+            return {SharedProcess.ADD_CONTEXT: {'type': await store.get(symbol)}}
+
+        p = AsyncProcess()
+        print(await p(p.NEW, ActionNotion('lookup', lookup), symbol='x'))
+
+    """
+    #: Number of steps between yielding to the event loop, 0 to yield only when awaiting the events results.
+    YIELD_STEPS = 100
+
+    _awaitable_types = {}
+
+    @staticmethod
+    def is_awaitable(value):
+        """
+        Checks if the value is awaitable, the check is cached by the value type.
+        """
+        cls = value.__class__
+        awaitable = AsyncProcess._awaitable_types.get(cls)
+
+        if awaitable is None:
+            if cls is GeneratorType:  # Generator-based coroutines are marked by the code flag
+                return inspect.isawaitable(value)
+
+            awaitable = AsyncProcess._awaitable_types[cls] = hasattr(cls, '__await__')
+
+        return awaitable
+
+    def async_step(self):
+        """
+        The step function of :meth:`Process.run_loop`: pauses the loop if the first message item is awaitable,
+        otherwise calls :meth:`Process.step`.
+        """
+        if self.message and self.is_awaitable(self.message[0]):
+            return None
+
+        return self.step()
+
+    async def run_async(self, message, context):
+        """
+        The asynchronous version of :meth:`Process.handle`: runs :meth:`Process.run_loop` pausing it to await the
+        awaitable message items and to yield to the event loop.
+
+        :returns:   the same result as :meth:`Process.handle`.
+        """
+        self.start_handle(message, context)
+
+        result, limited = self.NO_HANDLE, self.start_limits()
+
+        while True:
+            result, finished = self.run_loop(self.async_step, result, limited, self.YIELD_STEPS or None)
+
+            if finished:
+                return result
+
+            if self.message and self.is_awaitable(self.message[0]):  # The timeout includes the awaiting time
+                reply = await self.message.pop(0)
+
+                if reply:  # Like a query reply, the empty one is skipped
+                    self.set_message(reply, True)
+            else:
+                await asyncio.sleep(0)
+
+    async def handle(self, message, context):
+        """
+        Coroutine version of :meth:`Process.handle`.
+        """
+        return await self.run_async(message, context)
+
+    async def __call__(self, *message, **context):
+        """
+        Coroutine version of :meth:`Handler.__call__`.
+        """
+        answer_mode = context.pop(self.ANSWER, None)
+        result = await self.handle(message, context)
+
+        if answer_mode == self.RANK:
+            return result[0], result[1]
+
+        return result[0]
+
+
+class AsyncParsingProcess(ParsingProcess, AsyncProcess):
+    """
+    Parsing process with the coroutine :meth:`AsyncParsingProcess.handle`, see :class:`AsyncProcess`.
+    """
+    async def handle(self, message, context):
+        """
+        Coroutine version of :meth:`ParsingProcess.handle`.
+        """
+        return self.get_result(await self.run_async(message, context))
@@ -0,0 +1,600 @@
+"""
+.. module:: gt.compiler
+   :platform: Unix, Windows
+   :synopsis: Graph-talk compiled parsing process
+
+.. moduleauthor:: Stas Kravets (krvss) <stas.kravets@gmail.com>
+
+"""
+
+from gt.core import *
+
+
+class CompiledProcess(ParsingProcess):
+    """
+    Parsing process with the compiled fast path. The graph is walked once and each element of the well-known type
+    (:class:`ComplexNotion`, :class:`SelectiveNotion`, :class:`ActionNotion`, :class:`NextRelation`,
+    :class:`ParsingRelation`, :class:`LoopRelation`, :class:`ActionRelation`, :class:`Graph`) with the default set
+    of events gets a specialized reply function, so the process asks it directly without dispatching the query
+    through :class:`Handler` conditions. The process commands are handled by the direct type checks instead of
+    the events dispatch as well.
+
+    The replies, the actions calls, the context parameters, and the results are the same as for
+    :class:`ParsingProcess`. The elements of the other types or with the user-defined events, and the commands
+    the fast path does not know are handled by the interpretive :class:`ParsingProcess` way. If the process events
+    are changed (for example, the :class:`gt.debug.ProcessDebugger` is attached) or the statistics are collected
+    (see :attr:`Process.stats`), the whole handling is interpretive.
+
+    The elements are compiled when the graph is compiled or when met for the first time; the structure (relations,
+    objects, conditions) is read live, but the user events added to the already compiled elements are not seen
+    until the graph is compiled again::
+
+        parser = compile(graph)
+        print(parser(parser.NEW, graph, text='some text'))
+
+    """
+    #: Direction-changing commands, see :meth:`ParsingProcess.do_turn`.
+    TURNS = frozenset([ParsingProcess.NEXT, ParsingProcess.ERROR, ParsingProcess.BREAK, ParsingProcess.CONTINUE])
+
+    #: Default events of the compiled element types, (condition, event) names or values; None means any event.
+    SIGNATURES = {
+        Notion: (),
+        ActionNotion: (('can_go_forward', None), ),
+        ComplexNotion: ((Element.add_prefix(Relation.SUBJECT, Element.SET_PREFIX), 'do_relation'),
+                        ('can_go_forward', 'do_forward'), (VisitorProcess.VISIT, 'do_visit')),
+        NextRelation: (('can_pass', 'do_next'), (VisitorProcess.VISIT, 'do_visit')),
+        ActionRelation: (('can_go_forward', 'do_act'), ),
+        Graph: ((Element.add_prefix(Element.OWNER, Element.SET_PREFIX), 'do_element'),
+                ('can_go_forward', 'do_forward'), (VisitorProcess.VISIT, 'do_visit'))
+    }
+
+    SIGNATURES[SelectiveNotion] = SIGNATURES[ComplexNotion] + \
+        (('can_retry', 'do_retry'), ('can_finish', 'do_finish'),
+         (Element.add_prefix(Handler.CONDITION, Element.SET_PREFIX), 'do_condition'))
+    SIGNATURES[ParsingRelation] = SIGNATURES[NextRelation]
+    SIGNATURES[LoopRelation] = SIGNATURES[NextRelation] + \
+        (('can_start_general', 'do_start_general'), ('can_loop_general', 'do_loop_general'),
+         ('can_error_general', 'do_error_general'), ('can_loop_custom', 'do_loop_custom'),
+         (ParsingProcess.ERROR, 'do_error_custom'), ('can_break', 'do_break'), ('can_continue', 'do_continue'))
+
+    _parsing_events = None
+
+    def __init__(self, graph=None, cursor=False, persistent=False, packrat=0):
+        """
+        Creates the new CompiledProcess.
+
+        :param graph:       graph to compile, see :meth:`CompiledProcess.compile`.
+        :type graph:        Graph.
+        :param cursor:      use the cursor mode, like in :meth:`ParsingProcess.__init__`.
+        :type cursor:       bool.
+        :param persistent:  use the persistent context mode, like in :meth:`ParsingProcess.__init__`.
+        :type persistent:   bool.
+        :param packrat:     the packrat mode memo size, like in :meth:`ParsingProcess.__init__`; the packrat mode
+         uses the interpretive path.
+        :type packrat:      int.
+        """
+        super(CompiledProcess, self).__init__(cursor, persistent, packrat)
+
+        self._compiled = {}
+        self._table = {}
+
+        if graph:
+            self.compile(graph)
+
+    @staticmethod
+    def is_own(element, value, name):
+        """
+        Checks the condition or event value: the method of the element with the specified name, as defined by its
+        class, or the non-callable value equal to name.
+        """
+        if callable(value):
+            return getattr(value, '__self__', None) is element and \
+                get_function(value) is get_function(getattr(type(element), name, None))
+
+        return value == name
+
+    def is_compilable(self, element):
+        """
+        Checks if the element has the known type and the default events for this type.
+
+        :param element: element to check.
+        :returns:       True if the element could be compiled.
+        :rtype:         bool.
+        """
+        signature = self.SIGNATURES.get(type(element))
+
+        if signature is None or len(element.events) != len(signature):
+            return False
+
+        for (condition, event), (condition_name, event_name) in zip(element.events, signature):
+            if event.pre_event or event.post_event or not self.is_own(element, condition.value, condition_name) or \
+                    (event_name and not self.is_own(element, event.value, event_name)):
+                return False
+
+        unknown = element.unknown_event
+
+        if type(element) is ParsingRelation:
+            return unknown is not None and not unknown.pre_event and not unknown.post_event and \
+                self.is_own(element, unknown.value, 'on_error')
+
+        return unknown is None
+
+    def compile(self, graph):
+        """
+        Walks the graph and compiles its elements, including the sub-graphs and the elements connected to them by
+        relations.
+
+        :param graph:   graph or an element to start from.
+        :returns:       number of elements compiled.
+        :rtype:         int.
+        """
+        stack, seen = [graph], set()
+
+        while stack:
+            element = stack.pop()
+
+            if not isinstance(element, Element) or element in seen:
+                continue
+
+            seen.add(element)
+            self._compiled[element] = self.compile_element(element)
+
+            if isinstance(element, Graph):
+                stack.extend(element.notions())
+                stack.extend(element.relations())
+                stack.append(element.root)
+
+            elif isinstance(element, ComplexNotion):
+                stack.extend(element.relations)
+
+            elif isinstance(element, Relation):
+                stack.append(element.subject)
+                stack.append(element.object)
+
+        self._table.update(self._compiled)
+
+        return len(seen)
+
+    def compile_element(self, element):
+        """
+        Compiles the element.
+
+        :param element: element to compile.
+        :returns:       tuple of reply function (query, context) and rank reply function (query, context), the latter
+          is used by :class:`SelectiveNotion` to rank the relations.
+        :rtype:         tuple.
+        """
+        if not self.is_compilable(element):
+            return self.compile_other(element)
+
+        element_type = type(element)
+
+        if element_type is ParsingRelation:
+            return self.compile_parsing(element)
+
+        elif element_type is NextRelation:
+            return self.compile_next(element)
+
+        elif element_type is LoopRelation:
+            return self.compile_loop(element)
+
+        elif element_type is SelectiveNotion:
+            return self.compile_selective(element)
+
+        elif element_type is ComplexNotion:
+            return self.compile_complex(element)
+
+        elif element_type is ActionNotion:
+            return self.compile_action(element)
+
+        elif element_type is ActionRelation:
+            return self.compile_act(element)
+
+        elif element_type is Graph:
+            return self.compile_graph(element)
+
+        return self.compile_notion(element)
+
+    def get_compiled(self, element):
+        """
+        Gets the compiled element, compiles it if met for the first time.
+        """
+        try:
+            compiled = self._table.get(element)
+        except TypeError:
+            return self.compile_other(element)  # Not hashable, always interpretive
+
+        if compiled is None:
+            compiled = self._table[element] = self.compile_element(element)
+
+        return compiled
+
+    # Compilers #
+    @staticmethod
+    def compile_other(element):
+        access = Access.get_access(element, True)
+
+        def reply(query, context):
+            return access(query, **context)
+
+        def rank(query, context):
+            context = dict(context)
+            context[Handler.ANSWER] = Handler.RANK
+
+            return element(query, **context)
+
+        return reply, rank
+
+    @staticmethod
+    def compile_notion(element):
+        def reply(query, context):
+            return False
+
+        return reply, CompiledProcess.compile_other(element)[1]
+
+    @staticmethod
+    def compile_action(element):
+        forward = Process.FORWARD
+
+        def reply(query, context):
+            if query in forward and element.events:
+                event = element.events[0][1]
+                context[Handler.RANK], context[Handler.CONDITION], context[Handler.EVENT] = 0, True, event.value
+
+                return event.run((query, ), context)[0]
+
+            return False
+
+        return reply, CompiledProcess.compile_other(element)[1]
+
+    @staticmethod
+    def compile_complex(element):
+        forward = Process.FORWARD
+        relations = element._relations  # The live list, the relations property is a copy while frozen
+
+        def reply(query, context):
+            if query in forward:
+                if relations:
+                    return relations[0] if len(relations) == 1 else tuple(relations)
+
+                return None
+
+            return False
+
+        return reply, CompiledProcess.compile_other(element)[1]
+
+    @staticmethod
+    def compile_graph(element):
+        forward = Process.FORWARD
+
+        def reply(query, context):
+            return element.root if query in forward else False
+
+        return reply, CompiledProcess.compile_other(element)[1]
+
+    @staticmethod
+    def compile_act(element):
+        forward = Process.FORWARD
+
+        def reply(query, context):
+            if query in forward:
+                context[Handler.RANK], context[Handler.CONDITION], context[Handler.EVENT] = 0, True, element.do_act
+
+                return element.do_act(query, **context)
+
+            return False
+
+        return reply, CompiledProcess.compile_other(element)[1]
+
+    @staticmethod
+    def compile_next(element):
+        forward = Process.FORWARD
+
+        def rank(query, context):
+            if query in forward:
+                c_rank = element.condition_access.check((query, ), context)[0]
+
+                if c_rank > -1:
+                    return element.object, c_rank
+
+            return False, -1
+
+        def reply(query, context):
+            return rank(query, context)[0]
+
+        return reply, rank
+
+    @staticmethod
+    def compile_parsing(element):
+        forward = Process.FORWARD
+        text_key, proceed, error = ParsingProcess.TEXT, ParsingProcess.PROCEED, ParsingProcess.ERROR
+
+        def rank(query, context):
+            if query in forward:
+                text = context.get(text_key)
+                c_rank = element.condition_access.check(tupled(text, query) if is_list(text) else (text, query),
+                                                        context)[0]
+
+                if c_rank > -1:
+                    return ({proceed: c_rank}, element.object) if c_rank and not element.check_only \
+                        else element.object, c_rank
+
+                return None if element.optional else error, element.unknown_event.value
+
+            return None, element.unknown_event.value
+
+        def reply(query, context):
+            return rank(query, context)[0]
+
+        return reply, rank
+
+    @staticmethod
+    def compile_loop(element):
+        forward = Process.FORWARD
+        state_key, iteration = StatefulProcess.STATE, LoopRelation.ITERATION
+        error, loop_break, loop_continue = ParsingProcess.ERROR, ParsingProcess.BREAK, ParsingProcess.CONTINUE
+
+        def reply(query, context):
+            tags = element.tags
+
+            if query in forward:
+                if element.condition_access == TRUE_CONDITION:
+                    return element.object
+
+                if Condition.VALUE in tags:
+                    if iteration in context[state_key]:
+                        return element.do_loop_general(**context)
+
+                    return element.do_start_general()
+
+                elif Condition.FUNCTION in tags:
+                    context[Handler.RANK], context[Handler.CONDITION], context[Handler.EVENT] = \
+                        0, True, element.do_loop_custom
+
+                    return element.do_loop_custom(query, **context)
+
+                return False
+
+            if query == error and Condition.FUNCTION in tags:
+                return element.do_error_custom()
+
+            if iteration in context[state_key]:
+                if query == error and Condition.VALUE in tags:
+                    return element.do_error_general(**context)
+
+                elif query == loop_break:
+                    return element.do_break()
+
+                elif query == loop_continue:
+                    return element.do_continue(query, **context)
+
+            return False
+
+        return reply, CompiledProcess.compile_other(element)[1]
+
+    def compile_selective(self, element):
+        forward = Process.FORWARD
+        state_key, error = StatefulProcess.STATE, ParsingProcess.ERROR
+        relations = element._relations  # The live list, see compile_complex
+
+        def reply(query, context):
+            state = context.get(state_key)
+
+            if query in forward:
+                if state:
+                    return element.do_finish()
+
+                if not relations:
+                    return None
+
+                elif len(relations) == 1:
+                    return relations[0]
+
+                context[Handler.RANK], context[Handler.CONDITION], context[Handler.EVENT] = \
+                    0, True, element.do_forward
+
+                cases = element.select_cases((query, ), context,
+                                             lambda rel: self.get_compiled(rel)[1](query, context))
+
+                if not cases:
+                    return error
+
+                case = cases.pop(0)
+
+                if not cases:
+                    return case
+
+                return tupled(StackingProcess.PUSH_CONTEXT, {StatefulProcess.SET_STATE: {element.CASES: cases}},
+                              case, element)
+
+            if state and query == error:
+                return element.do_retry(**context)
+
+            return False
+
+        return reply, self.compile_other(element)[1]
+
+    # Handling #
+    def can_run_compiled(self):
+        """
+        Checks if the process events are the default :class:`ParsingProcess` ones, so the fast path could be used.
+        The packrat mode and the statistics collection need the interpretive path.
+        """
+        if self.packrat or self.collect_stats:
+            return False
+
+        if any(event.pre_event or event.post_event for _, event in self.events):
+            return False
+
+        if CompiledProcess._parsing_events is None:  # The fast path is built for the default events
+            CompiledProcess._parsing_events = self.get_events_signature(ParsingProcess())
+
+        return self.get_events_signature(self) == CompiledProcess._parsing_events
+
+    @staticmethod
+    def get_events_signature(process):
+        """
+        Gets the signature of the process events to compare them with the events of another process: the process
+        methods are replaced by their functions, so the overridden methods do not match.
+
+        :param process: process to get the signature.
+        :type process:  Process.
+        :returns:       tuples of the condition, its tags, and the event.
+        :rtype:         tuple.
+        """
+        def get_key(value):
+            return get_function(value) if getattr(value, '__self__', None) is process else value
+
+        return tuple([(get_key(condition.value), condition.tags, get_key(event.value))
+                      for condition, event in process.events])
+
+    def compiled_step(self):
+        """
+        Handles the first message item in the compiled way, the step function of :meth:`Process.run_loop`: the
+        queries are sent to the compiled replies and the commands are handled by the direct type checks, other items
+        are handled by :meth:`Process.step`.
+
+        :returns:   the handling result.
+        :rtype:     tuple.
+        """
+        queue = self._queue
+        top = queue[-1]
+        message = top.message
+
+        if not message:  # The loop runs while there are messages, so it is not the last queue item
+            queue.pop()
+            return None, 0, self.do_queue_pop
+
+        item = message[0]
+
+        if is_string(item):
+            if item == self.QUERY and top.current:
+                message.popleft()
+                current, context, query_rank = top.current, self.context, len(self.QUERY)
+
+                try:
+                    compiled = self._table[current]
+                except (KeyError, TypeError):
+                    compiled = self.get_compiled(current)
+
+                context[self.STATE] = self.states.get(current, {})
+                context[self.RANK], context[self.CONDITION], context[self.EVENT] = query_rank, self.QUERY, \
+                    self.do_query
+
+                result = compiled[0](self.query, dict(context)) or True, query_rank, self.do_query
+
+                del context[self.STATE]
+
+                return result
+
+            elif item in self.TURNS:
+                message.popleft()
+
+                if item in self.BACKWARD:
+                    message.clear()
+
+                self.query = item
+                return None, len(item), self.do_turn
+
+            elif item == self.STOP or item == self.OK:
+                return message.popleft(), len(item), self.do_finish
+
+            elif item == self.PUSH_CONTEXT:
+                self.do_push_context()
+                return None, len(item), self.do_push_context
+
+            elif item == self.POP_CONTEXT and self._context_stack:
+                self.do_pop_context()
+                return None, len(item), self.do_pop_context
+
+            elif item == self.FORGET_CONTEXT and self._context_stack:
+                self.do_forget_context()
+                return None, len(item), self.do_forget_context
+
+            elif item == self.CLEAR_STATE and top.current and self.states:
+                self.do_clear_state()
+                return None, len(item), self.do_clear_state
+
+            elif not item:
+                message.popleft()
+                return None, 0, self.do_clear_message
+
+        elif item.__class__ is bool:
+            return message.popleft(), 0, self.do_finish
+
+        elif isinstance(item, dict):
+            if not item:
+                message.popleft()
+                return None, 0, self.do_clear_message
+
+            elif self.can_add_context():
+                return self.do_add_context(), 0, self.do_add_context
+
+            elif self.can_update_context():
+                return self.do_update_context(), 0, self.do_update_context
+
+            elif self.can_delete_context():
+                return self.do_delete_context(), 0, self.do_delete_context
+
+            elif top.current and self.can_set_state():
+                return self.do_set_state(), 0, self.do_set_state
+
+            elif self.can_proceed():
+                return self.do_proceed(), 0, self.do_proceed
+
+        elif isinstance(item, Abstract) or callable(item):
+            message.popleft()
+
+            if message:
+                queue.append(QueueItem(item, [self.QUERY]))
+            else:
+                top.current, top.message = item, MessageDeque([self.QUERY])
+
+            return None, 0, self.do_queue_push
+
+        elif not item:
+            message.popleft()
+            return None, 0, self.do_clear_message
+
+        return self.step()
+
+    def handle(self, message, context):
+        """
+        Runs :meth:`Process.run_loop` with the compiled step (see :meth:`CompiledProcess.compiled_step`) if the
+        process events allow this, otherwise calls :meth:`ParsingProcess.handle`.
+
+        :returns:   the same result as :meth:`ParsingProcess.handle`.
+        """
+        if not self.can_run_compiled():
+            return super(CompiledProcess, self).handle(message, context)
+
+        self.start_handle(message, context)
+
+        if self.SENDER not in self.context:
+            self.context[self.SENDER] = self
+
+        return self.get_result(self.run_loop(self.compiled_step, self.NO_HANDLE, self.start_limits())[0])
+
+    def on_new(self, message, context):
+        """
+        New event: forgets the elements compiled during the previous runs, keeping the compiled graphs.
+        """
+        super(CompiledProcess, self).on_new(message, context)
+
+        self._table = dict(self._compiled)
+
+
+def compile(graph, cursor=False, persistent=False):
+    """
+    Compiles the graph into the new :class:`CompiledProcess`.
+
+    :param graph:       graph to compile.
+    :type graph:        Graph.
+    :param cursor:      use the cursor mode.
+    :type cursor:       bool.
+    :param persistent:  use the persistent context mode.
+    :type persistent:   bool.
+    :returns:           the process to parse the text with the graph.
+    :rtype:             CompiledProcess.
+    """
+    return CompiledProcess(graph, cursor, persistent)
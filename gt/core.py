@@ -7,8 +7,10 @@
 
 """
 
-from inspect import getargspec
-from operator import attrgetter
+from collections import OrderedDict
+from operator import attrgetter, itemgetter
+from timeit import default_timer
+from weakref import WeakKeyDictionary, WeakValueDictionary
 
 from gt.utils import *
 
@@ -29,6 +31,15 @@ class Abstract(object):
         raise NotImplementedError('Method not implemented')
 
 
+class AccessCache(dict):
+    """
+    Cache of the bound methods accesses kept by the methods owner. It is not pickled with the owner, so the owner
+    could be sent to another process, the accesses will be created there again.
+    """
+    def __reduce__(self):
+        return self.__class__, ()
+
+
 class Access(Abstract):
     """
     Access provides :class:`Abstract`-style wrapper to access non-Abstract objects. Each instance has
@@ -50,8 +61,20 @@ class Access(Abstract):
     OTHER = 'other'
 
     CACHE_ATTR = '__access__'
+    #: Attribute of the bound method owner to cache the accesses of its methods.
+    METHODS_CACHE_ATTR = '__method_access__'
+    #: Attribute of the functions accepting the message items but not using them, see :meth:`Access.ignore_message`.
+    IGNORE_MESSAGE_ATTR = '__ignore_message__'
     CACHEABLE = frozenset([CALL, FUNCTION])
 
+    #: Access cache hits statistics key.
+    HITS = 'hits'
+    #: Access cache misses statistics key.
+    MISSES = 'misses'
+
+    _binders = WeakKeyDictionary()
+    _cache_hits = _cache_misses = 0
+
     def __init__(self, value):
         """
         Creates the new Access instance to wrap the value.
@@ -76,6 +99,12 @@ class Access(Abstract):
     def __str__(self):
         return '%s, %s: %s' % (self._mode, self._spec, self._value)
 
+    def __reduce__(self):
+        """
+        Pickling support: only the value is saved, the access is set up again when unpickled.
+        """
+        return self.__class__, (self._value,)
+
     def setup(self):
         """
         Inits type information, setting the call proxy method, mode, and spec. Overwrite to support custom types.
@@ -83,18 +112,22 @@ class Access(Abstract):
         Sets the read-only properties:
             - :attr:`Access.mode`: :attr:`Access.CALL` for abstracts, :attr:`Access.FUNCTION` for
               functions and :attr:`Access.VALUE` for primitives;
-            - :attr:`Access.spec`:  :attr:`Access.ABSTRACT` for abstracts, :obj:`inspect.ArgSpec`
+            - :attr:`Access.spec`:  :attr:`Access.ABSTRACT` for abstracts, :obj:`gt.utils.ArgSpec`
               for functions, :attr:`Access.OTHER` for primitives;
             - :attr:`Access.value`: the object itself.
+
+        The calls of the dictionary values return their copies, so the processes consuming the commands from them
+        do not change the graph.
         """
         if isinstance(self._value, Abstract):
             self._mode, self._spec = self.CALL, self.ABSTRACT
 
         elif callable(self._value):
-            self._mode, self._spec = self.FUNCTION, getargspec(self._value)
+            self._mode, self._spec = self.FUNCTION, get_argspec(self._value)
 
             if self._spec.varargs and not self._spec.keywords:
-                self._call = self.call_args
+                self._call = self.call_noargs if getattr(self._value, self.IGNORE_MESSAGE_ATTR, False) else \
+                    self.call_args
 
             elif self._spec.keywords and not self._spec.varargs:
                 self._call = self.call_kwargs
@@ -106,14 +139,21 @@ class Access(Abstract):
                 self._call = self.call_noargs
 
             elif self._spec.args:
-                self._defaults_len = len(self._spec.defaults) - 1 if self._spec.defaults else -1
-                self._reversed_args = list(reversed(self._spec.args))
+                args, defaults = self._spec.args, tuple(self._spec.defaults or ())
+                defaults = (None, ) * (len(args) - len(defaults)) + defaults
 
-                self._call = self.call_general
+                names = tuple(arg for arg in args if arg != 'self')
+                self._defaults = tuple(d for arg, d in zip(args, defaults) if arg != 'self')
+
+                if names:
+                    self._binder = self.get_binder(self._value, names, self._spec.defaults)
+                    self._call = self.call_general
+                else:
+                    self._call = self.call_noargs
 
         else:
             self._mode = self.VALUE
-            self._call = self.call_value
+            self._call = self.call_copy if isinstance(self._value, dict) else self.call_value
 
     def __call__(self, *message, **context):
         """
@@ -134,17 +174,14 @@ class Access(Abstract):
         return self._value()
 
     def call_general(self, message, context):
-        i, args = self._defaults_len, {}
-        for arg in self._reversed_args:
-            if arg != 'self':
-                args[arg] = context[arg] if arg in context else self._spec.defaults[i] if i >= 0 else None
-                i -= 1
-
-        return self._value(**args)
+        return self._binder(self._value, self._defaults, context)
 
     def call_value(self, message, context):
         return self._value
 
+    def call_copy(self, message, context):
+        return self._value.copy()  # Processes consume the dict commands, the value is shared by all of them
+
     #: Wrapped object.
     value = property(attrgetter('_value'))
 
@@ -154,6 +191,98 @@ class Access(Abstract):
     #: Access spec (call specification, e.g. function argument specification).
     spec = property(attrgetter('_spec'))
 
+    def rebind(self, value):
+        """
+        Makes the copy of the access to another value of the same kind, e.g. the same method bound to another
+        instance, without the introspection.
+
+        :param value:   new value to wrap.
+        :returns:       new Access instance.
+        :rtype:         Access.
+        """
+        access = self.__class__.__new__(self.__class__)
+        access.__dict__.update(self.__dict__)
+        access._value = value
+
+        if getattr(self._call, '__self__', None) is self:
+            access._call = getattr(access, self._call.__name__)
+
+        return access
+
+    @staticmethod
+    def ignore_message(function):
+        """
+        Marks the function accepting the message items as not using them, so they are not unpacked on each call.
+        The overrides of the marked method are called with the message items, unless marked as well.
+
+        :param function:    function to mark.
+        :returns:           the same function.
+        """
+        setattr(function, Access.IGNORE_MESSAGE_ATTR, True)
+
+        return function
+
+    @staticmethod
+    def make_binder(names, optional=False):
+        """
+        Makes the argument binder: the function binder(function, defaults, context) calls the function passing the
+        context values of the names as the positional arguments, defaults are used for the names missing in the context.
+
+        :param names:       argument names.
+        :type names:        tuple.
+        :param optional:    some arguments have defaults, so they are often missing in the context.
+        :type optional:     bool.
+        :returns:           argument binder.
+        :rtype:             function.
+        """
+        if len(names) == 1:
+            name = names[0]
+
+            def bind(function, defaults, context):
+                return function(context.get(name, defaults[0]))
+
+        elif optional:
+            def bind(function, defaults, context):
+                return function(*map(context.get, names, defaults))
+
+        else:
+            getter = itemgetter(*names)
+
+            def bind(function, defaults, context):
+                try:
+                    args = getter(context)
+                except KeyError:
+                    args = map(context.get, names, defaults)
+
+                return function(*args)
+
+        return bind
+
+    @staticmethod
+    def get_binder(function, names, optional=False):
+        """
+        Gets the argument binder for the function, binders are shared by the functions with the same code object,
+        e.g. all the closures made by the same lambda.
+
+        :param function:    function to get the binder for.
+        :param names:       argument names.
+        :type names:        tuple.
+        :param optional:    some arguments have defaults.
+        :type optional:     bool.
+        :returns:           argument binder, see :meth:`Access.make_binder`.
+        :rtype:             function.
+        """
+        code = getattr(getattr(function, '__func__', function), '__code__', None)
+        binder = Access._binders.get(code) if code else None
+
+        if not binder:
+            binder = Access.make_binder(names, bool(optional))
+
+            if code:
+                Access._binders[code] = binder
+
+        return binder
+
     @staticmethod
     def get_access(obj, cache=False):
         """
@@ -165,20 +294,49 @@ class Access(Abstract):
         :returns:       new Access instance to access the object like an Abstract.
         :rtype:         Access.
         """
-        if hasattr(obj, Access.CACHE_ATTR):
-            access = getattr(obj, Access.CACHE_ATTR)
-        else:
-            access = Access(obj)
+        access = getattr(obj, Access.CACHE_ATTR, None)
 
-            if cache and access._mode in Access.CACHEABLE:
-                try:
+        # Bound methods get the attributes of their functions, so their accesses are cached in the owners
+        if access is not None and access._value is obj:
+            Access._cache_hits += 1
+            return access
+
+        function, owner = getattr(obj, '__func__', None), getattr(obj, '__self__', None)
+
+        if function is not None and owner is not None:
+            methods = getattr(owner, Access.METHODS_CACHE_ATTR, None)
+
+            if methods is not None and function in methods:
+                Access._cache_hits += 1
+                return methods[function]
+
+        Access._cache_misses += 1
+        access = Access(obj)
+
+        if cache and access._mode in Access.CACHEABLE:
+            try:
+                if function is not None and owner is not None:
+                    if methods is None:
+                        methods = AccessCache()
+                        setattr(owner, Access.METHODS_CACHE_ATTR, methods)
+
+                    methods[function] = access  # Kept by the owner, so it could be collected with its methods
+                else:
                     setattr(obj, Access.CACHE_ATTR, access)
 
-                except AttributeError:
-                    pass  # Could fail for instance methods, but we do not care
+            except AttributeError:
+                pass  # Could fail for the objects with slots, but we do not care
 
         return access
 
+    @staticmethod
+    def cache_stats():
+        """
+        Gets the access cache statistics: a dict with :attr:`Access.HITS` and :attr:`Access.MISSES` counters
+        of :meth:`Access.get_access` calls, misses mean the object was introspected.
+        """
+        return {Access.HITS: Access._cache_hits, Access.MISSES: Access._cache_misses}
+
 
 class Condition(Access):
     """
@@ -205,6 +363,8 @@ class Condition(Access):
     #: Returned if check was not passed.
     NO_CHECK = -1, None
 
+    _interned = WeakValueDictionary()
+
     def __init__(self, value, *tags, **options):
         """
         Creates the new Condition.
@@ -230,7 +390,8 @@ class Condition(Access):
         Sets the additional :attr:`Access.spec` info: :attr:`Condition.NUMBER`, :attr:`Condition.STRING`,
         :attr:`Condition.LIST`, :attr:`Condition.REGEX`, :attr:`Condition.DICT`, :attr:`Condition.BOOLEAN`.
 
-        Sets :meth:`Condition.check` to the appropriate checking function depending on the value type.
+        Sets :meth:`Condition.check` to the appropriate checking function depending on the value type. Lists of
+        strings are matched using the prefix tree, so the longest string is found in a single scan of the text.
         """
         super(Condition, self).setup()
 
@@ -242,7 +403,14 @@ class Condition(Access):
 
         elif is_list(self._value):
             self._spec, self.check = self.LIST, self.check_list
-            self._conditions = tuple([Condition(c, *list(self.tags), **self._options) for c in self._value])
+            self._conditions = tuple([Condition.get_interned(c, *list(self.tags), **self._options)
+                                      for c in self._value])
+
+            if self._conditions and all(self.is_trie_item(c) for c in self._conditions):
+                self._trie, self.check = Trie(), self.check_trie
+
+                for c in self._conditions:
+                    self._trie.add(c._value, c._value)
 
         elif is_string(self._value):
             self._spec, self.check = self.STRING, self.check_string_search if self._search else self.check_string_match
@@ -253,6 +421,7 @@ class Condition(Access):
 
         elif is_regex(self._value):
             self._spec, self.check = self.REGEX, self.check_regex_search if self._search else self.check_regex_match
+            self._looks_behind = self.looks_behind(self._value)
 
         elif isinstance(self._value, dict):
             self._spec = self.DICT
@@ -290,8 +459,64 @@ class Condition(Access):
         else:
             return self.NO_CHECK
 
+    @staticmethod
+    def looks_behind(regex):
+        """
+        Checks if the regex looks at the text before the match start: ``^``, ``\A``, ``\b``, ``\B`` or the
+        lookbehind assertions. Such regexes are matched against the remaining text of :class:`gt.utils.TextCursor`
+        instead of its buffer, so the parsed text is not seen.
+
+        :param regex:   compiled regex.
+        :returns:       True if the regex could look behind, e.g. it is not a string pattern.
+        :rtype:         bool.
+        """
+        pattern = regex.pattern
+
+        if not is_string(pattern):
+            return True
+
+        i, in_class = 0, False
+
+        while i < len(pattern):
+            c = pattern[i]
+
+            if c == '\\':
+                if not in_class and pattern[i + 1:i + 2] in ('A', 'b', 'B'):
+                    return True
+
+                i += 2
+                continue
+
+            if in_class:
+                in_class = c != ']'
+
+            elif c == '[':
+                in_class = True
+                i += 2 if pattern[i + 1:i + 2] == '^' else 1
+
+                if pattern[i:i + 1] == ']':  # Leading bracket is a character
+                    i += 1
+
+                continue
+
+            elif c == '^' or pattern.startswith('(?<=', i) or pattern.startswith('(?<!', i):
+                return True
+
+            i += 1
+
+        return False
+
     def check_regex_match(self, message, context):
-        check = self._value.match(message[0]) if message else None
+        if not message:
+            return self.NO_CHECK
+
+        text = message[0]
+
+        if text.__class__ is TextCursor:
+            check = self._value.match(text.value()) if self._looks_behind else \
+                self._value.match(text.buffer, text.position)
+        else:
+            check = self._value.match(text)
 
         if check:
             rank = check.end() - check.start()  # Match length is the rank
@@ -302,10 +527,21 @@ class Condition(Access):
         return rank, check
 
     def check_regex_search(self, message, context):
-        check = self._value.search(message[0]) if message else None
+        if not message:
+            return self.NO_CHECK
+
+        text, position = message[0], 0
+
+        if text.__class__ is TextCursor:
+            if self._looks_behind:
+                text = text.value()
+            else:
+                text, position = text.buffer, text.position
+
+        check = self._value.search(text, position)
 
         if check:
-            rank = check.end()  # Whole length is the rank
+            rank = check.end() - position  # Whole length is the rank
             check = check.group(0)
         else:
             rank = - 1
@@ -314,7 +550,15 @@ class Condition(Access):
 
     def check_string_match(self, message, context):
         try:
-            message0 = message[0][:self._value_len]
+            text = message[0]
+
+            if text.__class__ is TextCursor and not self._ignore_case:
+                if text.buffer.startswith(self._value, text.position):
+                    return self._value_len, self._value
+
+                return self.NO_CHECK
+
+            message0 = text[:self._value_len]
 
             if self._ignore_case:
                 message0 = message0.upper()
@@ -328,12 +572,18 @@ class Condition(Access):
         return self.NO_CHECK
 
     def check_string_search(self, message, context):
-        message0 = str(message[0])
+        text = message[0]
+
+        if text.__class__ is TextCursor and not self._ignore_case:
+            pos = text.find(self._value)
+        else:
+            message0 = str(text)
 
-        if self._ignore_case:
-            message0 = message0.upper()
+            if self._ignore_case:
+                message0 = message0.upper()
+
+            pos = message0.find(self._value)
 
-        pos = message0.find(self._value)
         if pos >= 0:
             return self._value_len + pos, self._value
 
@@ -351,6 +601,28 @@ class Condition(Access):
         else:
             return self.NO_CHECK
 
+    def check_trie(self, message, context):
+        if not message:
+            return self.NO_CHECK
+
+        text = message[0]
+
+        if text.__class__ is TextCursor:
+            found = self._trie.match(text.buffer, text.position, self._ignore_case)
+        elif is_string(text):
+            found = self._trie.match(text, 0, self._ignore_case)
+        else:
+            found = None
+
+        if found is None:  # Not a text or cannot be upper-cased char by char
+            return self.check_list(message, context)
+
+        if found:
+            length, values = found[-1]  # The longest one
+            return length, values[0]
+
+        return self.NO_CHECK
+
     def check_list(self, message, context):
         rank, check = self.NO_CHECK
 
@@ -362,6 +634,35 @@ class Condition(Access):
 
         return rank, check
 
+    def is_trie_item(self, condition):
+        """
+        Checks if the list item condition could be matched with the prefix tree: it is a string to be matched at the
+        beginning of the text and its upper-cased value has the same length, if the case is ignored.
+        """
+        return condition.spec == self.STRING and not self._search and \
+            (not self._ignore_case or len(condition._value) == condition._value_len)
+
+    def rebind(self, value):
+        """
+        Makes the copy of the condition to another value of the same kind, see :meth:`Access.rebind`.
+        """
+        condition = super(Condition, self).rebind(value)
+
+        if getattr(self.check, '__self__', None) is self:
+            condition.check = getattr(condition, self.check.__name__)
+
+        if self._conditions and self._conditions[0] is self:
+            condition._conditions = tuple([condition])
+
+        return condition
+
+    def __reduce__(self):
+        """
+        Pickling support: the value, tags and options are saved, the condition is set up again and interned when
+        unpickled, see :meth:`Condition.get_interned`.
+        """
+        return _get_interned, (self._value, tuple(self.tags), self._options)
+
     @property
     def list(self):
         """
@@ -369,6 +670,56 @@ class Condition(Access):
         """
         return self._conditions
 
+    @staticmethod
+    def get_key(value):
+        """
+        Gets the intern table key of the value, types are included, so 1, 1.0 and True conditions are different.
+        """
+        if is_list(value):
+            return value.__class__, tuple([Condition.get_key(v) for v in value])
+
+        return value.__class__, value
+
+    @staticmethod
+    def get_interned(value, *tags, **options):
+        """
+        Gets the interned condition: conditions with the same value, tags and options are shared, so the same
+        regexes, string lists, etc. are set up once for all relations using them. A condition is evicted from the
+        intern table when it is not used anymore or by :meth:`Condition.clear_interned`. The values that cannot be
+        hashed are not interned.
+
+        :param value:   value to be checked.
+        :param tags:    list of tags for the condition to be active.
+        :param options: condition options, see :meth:`Condition.__init__`.
+        :returns:       shared condition.
+        :rtype:         Condition.
+        """
+        try:
+            key = Condition.get_key(value), frozenset(tags), tuple(sorted(options.items()))
+            condition = Condition._interned.get(key)
+
+        except TypeError:
+            return Condition(value, *tags, **options)
+
+        if condition is None:
+            condition = Condition._interned[key] = Condition(value, *tags, **options)
+
+        return condition
+
+    @staticmethod
+    def interned_count():
+        """
+        Gets the number of conditions in the intern table.
+        """
+        return len(Condition._interned)
+
+    @staticmethod
+    def clear_interned():
+        """
+        Evicts all the conditions from the intern table, the conditions in use are kept by their relations.
+        """
+        Condition._interned.clear()
+
 
 class TrueCondition(Condition):
     """
@@ -378,10 +729,26 @@ class TrueCondition(Condition):
         super(TrueCondition, self).__init__(id(self))
         self.check = lambda message, context: (0, True)
 
+    def __reduce__(self):
+        return 'TRUE_CONDITION'  # The only instance is pickled by name
+
 
 TRUE_CONDITION = TrueCondition()
 
 
+def _get_interned(value, tags, options):
+    """
+    Unpickles the condition, see :meth:`Condition.__reduce__`.
+    """
+    return Condition.get_interned(value, *tags, **options)
+
+_CHECK_STRING_MATCH = get_function(Condition.check_string_match)
+_CHECK_COMPARE = get_function(Condition.check_compare)
+_CHECK_BOOLEAN = get_function(Condition.check_boolean)
+_CHECK_LIST = get_function(Condition.check_list)
+_CHECK_TRIE = get_function(Condition.check_trie)
+
+
 class Event(Access):
     """
     Event contains the user object (value or function) to be called if the :class:`Condition` was satisfied.
@@ -458,6 +825,162 @@ class Event(Access):
         self.post_event = Event(value) if value is not None else None
 
 
+class EventIndex(object):
+    """
+    Dispatch index of the condition-event pairs. Literal conditions (strings, numbers, booleans, other hashable values
+    and lists of them) are bucketed by their first character or the exact value, so only the matching bucket plus
+    the conditions that cannot be indexed (functions, regexes, string searches, etc.) are checked for the message.
+
+    Candidates keep the order of the original events, so the ranking is the same as when checking all of them.
+    """
+    #: Case-sensitive string conditions, keyed by the first character.
+    PREFIX = 'prefix'
+    #: Case-insensitive string conditions, keyed by the upper-cased first character.
+    FOLDED = 'folded'
+    #: Conditions comparing the first message item with the value, keyed by the value.
+    EXACT = 'exact'
+
+    def __init__(self, events=(), layout=None):
+        """
+        Builds the index for the events.
+
+        :param events:  sequence of (condition, event) pairs.
+        :param layout:  layout of another index with the same conditions, see :attr:`EventIndex.layout`, to be used
+         instead of indexing the conditions.
+        """
+        #: Indexed events (read-only).
+        self.events = tuple(events)
+
+        self._chars, self._values = {}, {}
+
+        if layout:
+            self._general, self._prefix, self._folded, self._exact = layout
+        else:
+            self._general, self._prefix, self._folded, self._exact = [], {}, {}, {}
+
+            buckets = {self.PREFIX: self._prefix, self.FOLDED: self._folded, self.EXACT: self._exact}
+
+            for i, (condition, _) in enumerate(self.events):
+                keys = self.get_keys(condition)
+
+                if keys is None:
+                    self._general.append(i)
+                else:
+                    for kind, key in keys:
+                        buckets[kind].setdefault(key, []).append(i)
+
+        #: Events to be checked for any message (read-only).
+        self.general = self.merge()
+
+    @property
+    def layout(self):
+        """
+        Index layout: the positions of the events in the buckets, it does not refer to the events.
+        """
+        return self._general, self._prefix, self._folded, self._exact
+
+    @staticmethod
+    def get_keys(condition):
+        """
+        Gets the index keys of the condition, the keys are cached in the condition.
+
+        :param condition:   condition to index.
+        :type condition:    Condition.
+        :returns:           list of (kind, key) tuples or None if the condition cannot be indexed.
+        :rtype:             list.
+        """
+        try:
+            return condition._index_keys
+        except AttributeError:
+            keys = condition._index_keys = EventIndex.build_keys(condition)
+
+            return keys
+
+    @staticmethod
+    def build_keys(condition):
+        """
+        Calculates the index keys of the condition depending on its check method.
+        """
+        check = get_function(getattr(condition, 'check', None))
+
+        if check is _CHECK_STRING_MATCH:
+            if not condition.value:
+                return None
+
+            return [(EventIndex.FOLDED if condition._ignore_case else EventIndex.PREFIX, condition.value[0])]
+
+        elif check is _CHECK_COMPARE or check is _CHECK_BOOLEAN:
+            try:
+                hash(condition.value)
+            except TypeError:
+                return None
+
+            return [(EventIndex.EXACT, condition.value)]
+
+        elif check is _CHECK_LIST or check is _CHECK_TRIE:
+            keys = []
+
+            for c in condition.list:
+                c_keys = EventIndex.build_keys(c)
+
+                if c_keys is None:
+                    return None
+
+                keys += c_keys
+
+            return keys
+
+    def merge(self, *indexes):
+        """
+        Merges the event indexes with the general ones keeping the original order.
+
+        :returns:   tuple of (condition, event) pairs.
+        :rtype:     tuple.
+        """
+        return tuple(self.events[i] for i in sorted(set(self._general).union(*indexes)))
+
+    def candidates(self, message):
+        """
+        Gets the condition-event pairs that could be satisfied by the message.
+
+        :param message:     message to check.
+        :type message:      list.
+        :returns:           tuple of (condition, event) pairs.
+        :rtype:             tuple.
+        """
+        if not message:
+            return self.general
+
+        first = message[0]
+
+        if is_string(first) or first.__class__ is TextCursor:
+            if not first:
+                return self.general
+
+            c = first[0]
+
+            try:
+                return self._chars[c]
+            except KeyError:
+                candidates = self._chars[c] = self.merge(self._prefix.get(c, ()), self._folded.get(c.upper()[0], ()))
+
+                return candidates
+
+        try:
+            if first not in self._exact:
+                return self.general
+
+        except TypeError:
+            return self.events  # Unhashable item, no way to know
+
+        try:
+            return self._values[first]
+        except KeyError:
+            candidates = self._values[first] = self.merge(self._exact[first])
+
+            return candidates
+
+
 class Handler(Abstract):
     """
     Handler is used for routing of messages to handling functions called events (:class:`Event`) basing on the
@@ -467,6 +990,8 @@ class Handler(Abstract):
 
     The condition could be limited to be active only if its set of tags (:attr:`Condition.tags`) is a subset
     of the Handler set of tags. List of active conditions and events is in :attr:`Handler.active_events` property.
+    Active events are cached for each set of tags, so switching between the known states does not filter the events
+    again; the cache is cleared when the events are added or removed.
     """
     #: Answer context parameter, if equal to :attr:`Handler.RANK` the condition rank will be included in the answer.
     ANSWER = 'answer'
@@ -482,13 +1007,24 @@ class Handler(Abstract):
     #: Returned by :meth:`Handler.handle` if no handler found.
     NO_HANDLE = (False, -1, None)
 
+    #: Active events cache hits statistics key.
+    HITS = 'hits'
+    #: Active events cache misses statistics key.
+    MISSES = 'misses'
+    #: Active events cache size statistics key.
+    SIZE = 'size'
+
     def __init__(self):
         Access.get_access(self, True)
 
-        self._tags = set()
+        self._tags = frozenset()
         self._events = []
         #: Tuple of events which are eligible for the current tags (read-only).
         self.active_events = tuple()
+        self._event_index = EventIndex()
+
+        self._events_cache = {}
+        self._cache_hits = self._cache_misses = 0
         #: Event to be executed when no handler found for the message.
         self.unknown_event = None
 
@@ -504,6 +1040,7 @@ class Handler(Abstract):
         if (condition_access, event_access) not in self._events:
             self._events.append((condition_access, event_access))
 
+            self.reset_events_cache()
             self.update_events()
 
     def on(self, condition, event, *tags):
@@ -534,6 +1071,7 @@ class Handler(Abstract):
         if (condition, event) in self._events:
             self._events.remove((condition, event))
 
+            self.reset_events_cache()
             self.update_events()
 
     def off_any(self, event):
@@ -552,6 +1090,7 @@ class Handler(Abstract):
         """
         self._events = list(filter(lambda e: not (e[0] == condition), self._events))
 
+        self.reset_events_cache()
         self.update_events()
 
     def off_event(self, event):
@@ -562,6 +1101,7 @@ class Handler(Abstract):
         """
         self._events = list(filter(lambda e: not (e[1] == event), self._events))
 
+        self.reset_events_cache()
         self.update_events()
 
     def get_events(self, condition=None):
@@ -584,6 +1124,15 @@ class Handler(Abstract):
         """
         del self._events[:]
         self.active_events = tuple()
+        self._event_index = EventIndex()
+
+        self.reset_events_cache()
+
+    def reset_events_cache(self):
+        """
+        Clears the cache of active events, called when the list of events changes.
+        """
+        self._events_cache.clear()
 
     def update_tags(self):
         """
@@ -597,9 +1146,32 @@ class Handler(Abstract):
     def update_events(self):
         """
         Called by :meth:`Handler.update` when the list of active events needs to be updated
-        (for example, after the new event was added or tags were changed).
+        (for example, after the new event was added or tags were changed). The active events and their
+        :class:`EventIndex` are taken from the cache if the current tags were seen before.
+        """
+        try:
+            self.active_events, self._event_index = self._events_cache[self._tags]
+            self._cache_hits += 1
+
+        except KeyError:
+            self._cache_misses += 1
+
+            self.active_events, self._event_index = self._events_cache[self._tags] = \
+                self.get_active_events(self._tags)
+
+    def get_active_events(self, tags):
+        """
+        Filters the events eligible for the tags and indexes them, called by :meth:`Handler.update_events` if the
+        tags were not seen before.
+
+        :param tags:    set of tags.
+        :type tags:     frozenset.
+        :returns:       tuple of (active events, :class:`EventIndex`).
+        :rtype:         tuple.
         """
-        self.active_events = tuple(filter(lambda e: e[0].tags.issubset(self._tags), self._events))
+        active_events = tuple(filter(lambda e: e[0].tags.issubset(tags), self._events))
+
+        return active_events, EventIndex(active_events)
 
     def update(self):
         """
@@ -632,8 +1204,8 @@ class Handler(Abstract):
         if not self.SENDER in context:
             context[self.SENDER] = self
 
-        # Searching for the best event
-        for condition_access, event_access in self.active_events:
+        # Searching for the best event among the candidates
+        for condition_access, event_access in self._event_index.candidates(message):
             # Condition check, if no condition the result is true with zero rank
             c_rank, c_check = condition_access.check(message, context)
 
@@ -691,6 +1263,14 @@ class Handler(Abstract):
         """
         return self._events
 
+    @property
+    def events_cache_stats(self):
+        """
+        Gets the active events cache statistics: a dict with :attr:`Handler.HITS`, :attr:`Handler.MISSES` and
+        :attr:`Handler.SIZE` (number of cached tag sets) keys.
+        """
+        return {self.HITS: self._cache_hits, self.MISSES: self._cache_misses, self.SIZE: len(self._events_cache)}
+
 
 class Element(Handler):
     """
@@ -710,6 +1290,12 @@ class Element(Handler):
     OLD_VALUE = 'old-value'
     #: New value context parameter for notifications.
     NEW_VALUE = 'new-value'
+    #: Events name for the change notifications, see :meth:`Element.check_mutable`.
+    EVENTS = 'events'
+
+    #: Properties referring to the containers of the element: the change is not allowed if the old or new container
+    #: is frozen, see :meth:`Element.freeze`.
+    CONTAINERS = frozenset([OWNER])
 
     def __init__(self, owner=None):
         """
@@ -718,6 +1304,7 @@ class Element(Handler):
         :param owner:   graph to own this element.
         :type owner:    Graph.
         """
+        self._frozen = False  # The events are set up by the Handler constructor
         super(Element, self).__init__()
 
         self._owner = None
@@ -832,6 +1419,11 @@ class Element(Handler):
         if old_value == value:
             return
 
+        if name in self.CONTAINERS:
+            self.check_mutable(name, old_value, value)
+        else:
+            self.check_mutable(name)
+
         set_message, context = self.add_prefix(name, self.SET_PREFIX), \
                                {self.NEW_VALUE: value, self.OLD_VALUE: old_value, self.SENDER: self}
 
@@ -845,6 +1437,39 @@ class Element(Handler):
 
         return True
 
+    def check_mutable(self, name, *containers):
+        """
+        Makes sure the property could be changed: raises AttributeError if the element or any of the containers
+        affected by the change is frozen, see :meth:`Element.freeze`.
+
+        :param name:        property name.
+        :type name:         str.
+        :param containers:  containers notified about the change, e.g. the old and new owners.
+        """
+        for element in (self, ) + containers:
+            if getattr(element, 'frozen', False):
+                raise AttributeError('Cannot change %s of %r, %r is frozen' % (name, self, element))
+
+    def freeze(self):
+        """
+        Makes the element immutable: changing its properties raises AttributeError, so the element could
+        precompute the data it uses on each pass, see :meth:`Graph.freeze`.
+        """
+        self._frozen = True
+
+    def unfreeze(self):
+        """
+        Makes the element mutable again, dropping the data precomputed by :meth:`Element.freeze`.
+        """
+        self._frozen = False
+
+    @property
+    def frozen(self):
+        """
+        Gets the frozen flag, see :meth:`Element.freeze` (read-only).
+        """
+        return self._frozen
+
     @property
     def owner(self):
         """
@@ -856,11 +1481,73 @@ class Element(Handler):
     def owner(self, value):
         self.change_property('owner', value)
 
+    def on_access(self, condition_access, event_access):
+        """
+        Adds the Condition and Event instances pair if the element is not frozen, see :meth:`Handler.on_access`.
+        """
+        self.check_mutable(self.EVENTS)
+        super(Element, self).on_access(condition_access, event_access)
+
+    def off(self, condition, event):
+        self.check_mutable(self.EVENTS)
+        super(Element, self).off(condition, event)
+
+    def off_condition(self, condition):
+        self.check_mutable(self.EVENTS)
+        super(Element, self).off_condition(condition)
+
+    def off_event(self, event):
+        self.check_mutable(self.EVENTS)
+        super(Element, self).off_event(event)
+
+    def clear_events(self):
+        self.check_mutable(self.EVENTS)
+        super(Element, self).clear_events()
+
+    def get_args(self):
+        """
+        Gets the constructor arguments to create the element again when unpickling.
+
+        :returns:   arguments without the references to other elements, see :meth:`Element.__reduce__`.
+        :rtype:     tuple.
+        """
+        return ()
+
+    def __reduce__(self):
+        """
+        Pickling support. The element is created again by its constructor, so its events are set up as usual, and
+        then its state is restored by :meth:`Element.__setstate__` using the properties setters. The references to
+        other elements are kept in the state only, so the elements referring to each other are pickled without
+        recursion and the owners receive the notifications about their elements. The events added to the element
+        after its creation are not saved.
+        """
+        return self.__class__, self.get_args(), self.__getstate__()
+
+    def __getstate__(self):
+        """
+        Gets the element state to be pickled.
+
+        :rtype: dict.
+        """
+        return {self.OWNER: self.owner}
+
+    def __setstate__(self, state):
+        """
+        Restores the element state when unpickling.
+
+        :param state:   state from :meth:`Element.__getstate__`.
+        :type state:    dict.
+        """
+        self.owner = state[self.OWNER]
+
 
 class Notion(Element):
     """
     Notion is an element with name. Represent the graph vertex.
     """
+    #: Packrat mode flag state parameter.
+    MEMOIZE = 'memoize'
+
     def __init__(self, name, owner=None):
         """
         Creates the new Notion with the specified name.
@@ -872,6 +1559,7 @@ class Notion(Element):
         """
         super(Notion, self).__init__(owner)
         self._name, self.name = None, name
+        self._memoize = True
 
     def __str__(self):
         return '"%s"' % self.name
@@ -895,6 +1583,32 @@ class Notion(Element):
     def name(self, value):
         self.change_property(self.NAME, value)
 
+    @property
+    def memoize(self):
+        """
+        Sets/gets the packrat mode flag, see :class:`ParsingProcess`. Set to False if passing the notion has outside
+        side effects: neither this notion nor the notions around it will be replayed from the memo.
+        """
+        return self._memoize
+
+    @memoize.setter
+    def memoize(self, value):
+        self.check_mutable(self.MEMOIZE)
+        self._memoize = value
+
+    def get_args(self):
+        return self.name,
+
+    def __getstate__(self):
+        state = super(Notion, self).__getstate__()
+        state[self.MEMOIZE] = self.memoize
+
+        return state
+
+    def __setstate__(self, state):
+        super(Notion, self).__setstate__(state)
+        self.memoize = state[self.MEMOIZE]
+
 
 class ActionNotion(Notion):
     """
@@ -922,9 +1636,15 @@ class ActionNotion(Notion):
 
     @action.setter
     def action(self, value):
+        self.check_mutable('action')
+
         self.off_forward()
         self.on_forward(value)
 
+    def get_args(self):
+        action = self.action
+        return self.name, action.value if action else None
+
 
 class Relation(Element):
     """
@@ -935,6 +1655,8 @@ class Relation(Element):
     #: Object context parameter, used in change object notifications.
     OBJECT = 'object'
 
+    CONTAINERS = Element.CONTAINERS | frozenset([SUBJECT])
+
     def __init__(self, subj, obj, owner=None):
         """
         Creates the new Relation between subj and obj.
@@ -978,16 +1700,33 @@ class Relation(Element):
     def __repr__(self):
         return self.__str__()
 
+    def get_args(self):
+        return None, None
+
+    def __getstate__(self):
+        state = super(Relation, self).__getstate__()
+        state[self.SUBJECT], state[self.OBJECT] = self.subject, self.object
+
+        return state
+
+    def __setstate__(self, state):
+        super(Relation, self).__setstate__(state)
+        self.subject, self.object = state[self.SUBJECT], state[self.OBJECT]
+
 
 class ComplexNotion(Notion):
     """
     Complex notion is a notion that contains other notions via relations. To add a relation just set its subject to
     the corresponding ComplexNotion.
     """
+    #: Relations state parameter.
+    RELATIONS = 'relations'
+
     def __init__(self, name, owner=None):
         super(ComplexNotion, self).__init__(name, owner)
 
         self._relations = []
+        self._relations_tuple = self._forward_reply = None
 
         self.on(self.add_prefix(Relation.SUBJECT, self.SET_PREFIX), self.do_relation)
         self.on_forward(self.do_forward)
@@ -1017,6 +1756,9 @@ class ComplexNotion(Notion):
 
         :returns: the list of relations or just single relation if the relations list length == 1
         """
+        if self._frozen:
+            return self._forward_reply
+
         if self._relations:
             return self._relations[0] if len(self._relations) == 1 else tuple(self.relations)
 
@@ -1027,7 +1769,21 @@ class ComplexNotion(Notion):
         :returns: the list of relations to visit.
         :rtype: tuple.
         """
-        return tuple(self.relations)
+        return self._relations_tuple if self._frozen else tuple(self.relations)
+
+    def freeze(self):
+        """
+        Freezes the notion, precomputing the replies of :meth:`ComplexNotion.do_forward` and
+        :meth:`ComplexNotion.do_visit`.
+        """
+        self._relations_tuple = tuple(self._relations)
+        self._forward_reply = ComplexNotion.do_forward(self)
+
+        super(ComplexNotion, self).freeze()
+
+    def unfreeze(self):
+        super(ComplexNotion, self).unfreeze()
+        self._relations_tuple = self._forward_reply = None
 
     def remove_all(self):
         """
@@ -1039,9 +1795,19 @@ class ComplexNotion(Notion):
     @property
     def relations(self):
         """
-        Gets the list of relations (read-only).
+        Gets the list of relations (read-only), the tuple if the notion is frozen.
         """
-        return self._relations
+        return self._relations_tuple if self._frozen else self._relations
+
+    def __getstate__(self):
+        state = super(ComplexNotion, self).__getstate__()
+        state[self.RELATIONS] = list(self._relations)
+
+        return state
+
+    def __setstate__(self, state):
+        super(ComplexNotion, self).__setstate__(state)
+        sort_as(self._relations, state[self.RELATIONS])  # Relations are attached in the order of unpickling
 
 
 class NextRelation(Relation):
@@ -1049,6 +1815,9 @@ class NextRelation(Relation):
     Next relation returns its :attr:`Relation.object` to the forward message if the specified condition was satisfied.
     If the condition is not set, :class:`TrueCondition` is used.
     """
+    #: Condition options state parameter.
+    OPTIONS = 'options'
+
     def __init__(self, subj, obj, condition=None, owner=None, **options):
         """
         Creates the new NextRelation with the specified condition.
@@ -1108,11 +1877,15 @@ class NextRelation(Relation):
 
     def set_condition(self, value):
         """
-        Sets the new condition, wrapping the value in the :class:`Condition`.
+        Sets the new condition, wrapping the value in the interned :class:`Condition`.
 
         :param value: new condition value.
         """
-        self.condition_access = Condition(value, **self.options)
+        self.check_mutable(self.CONDITION)
+        self.condition_access = Condition.get_interned(value, **self.options)
+
+        if self.subject:  # Subject may keep the information about the conditions
+            self.subject(self.add_prefix(self.CONDITION, self.SET_PREFIX), **{self.SENDER: self})
 
     @property
     def condition(self):
@@ -1126,6 +1899,21 @@ class NextRelation(Relation):
     def condition(self, value):
         self.set_condition(value)
 
+    def __getstate__(self):
+        state = super(NextRelation, self).__getstate__()
+        state[self.OPTIONS] = self.options
+        state[self.CONDITION] = None if self.condition_access is TRUE_CONDITION else self.condition
+
+        return state
+
+    def __setstate__(self, state):
+        self.options = state[self.OPTIONS]
+
+        if state[self.CONDITION] is not None:  # Before the subject, it is notified when the condition is changed
+            self.set_condition(state[self.CONDITION])
+
+        super(NextRelation, self).__setstate__(state)
+
 
 class ActionRelation(Relation):
     """
@@ -1173,8 +1961,52 @@ class ActionRelation(Relation):
 
     @action.setter
     def action(self, value):
+        self.check_mutable('action')
         self.action_access = Access(value)
 
+    def get_args(self):
+        return None, None, self.action
+
+
+class QueueItem(object):
+    """
+    Process queue item: the element to ask for directions and the message to be processed.
+    """
+    __slots__ = ['current', 'message']
+
+    def __init__(self, current=None, message=None):
+        self.current = current
+        self.message = MessageDeque(message) if message else MessageDeque()
+
+    def update(self, values):
+        """
+        Updates the item fields from the dictionary with :attr:`Process.CURRENT` and :attr:`Process.MESSAGE` keys.
+
+        :param values:  new field values.
+        :type values:   dict.
+        """
+        if Process.CURRENT in values:
+            self.current = values[Process.CURRENT]
+
+        if Process.MESSAGE in values:
+            message = values[Process.MESSAGE]
+            self.message = MessageDeque(message) if message else MessageDeque()
+
+    def __repr__(self):
+        return '<%s: %s>' % (self.current, list(self.message))
+
+
+class PackratRecord(object):
+    """
+    Packrat mode record of the notion passing: where it started and what has been changed since then.
+    """
+    __slots__ = ['notion', 'offset', 'level', 'depth', 'context_log', 'states_log', 'valid']
+
+    def __init__(self, notion, offset, level, depth, context_log, states_log):
+        self.notion, self.offset, self.level, self.depth = notion, offset, level, depth
+        self.context_log, self.states_log = context_log, states_log
+        self.valid = True
+
 
 class Process(Handler):
     """
@@ -1198,6 +2030,8 @@ class Process(Handler):
     STOP = 'stop'
     #: Query command (needs dict). Sets :attr:`Process.query` to the specified value.
     QUERY = 'query'
+    #: Limit result: the process stopped because one of :attr:`Process.limits` was reached.
+    LIMIT = 'limit'
 
     #: Next element command.
     NEXT = 'next'
@@ -1219,13 +2053,41 @@ class Process(Handler):
     STOP_CRITERIA = (OK, STOP, False)
     GO_CRITERIA = (None, True)
 
+    #: Steps limit: maximal number of the handling steps; statistics key with the number of steps.
+    STEPS = 'steps'
+    #: Timeout limit: maximal wall-clock time of the handling in seconds.
+    TIMEOUT = 'timeout'
+
+    #: Statistics key with the maximal queue length.
+    PEAK_QUEUE = 'peak_queue'
+    #: Statistics key with the numbers of the process events dispatches by the event name.
+    EVENTS = 'events'
+    #: Statistics key with the counters of the elements, see :attr:`Process.stats`.
+    ELEMENTS = 'elements'
+    #: Element counter: queries sent to the element.
+    QUERIES = 'queries'
+    #: Element counter: conditions checked by the element to answer the queries.
+    CHECKS = 'checks'
+    #: Element counter: events dispatched by the element to answer the queries.
+    DISPATCHES = 'dispatches'
+
+    #: Event table sharing flag: the class defining :meth:`Process.setup_events` sets it to show that the set up does
+    #: not depend on the instance, so the events are set up once per class, see :meth:`Process.make_event_table`.
+    SHARED_EVENTS = True
+
+    #: Handler attributes changed when the events are set up.
+    EVENT_ATTRS = frozenset(['_events', 'active_events', '_event_index', '_cache_hits', '_cache_misses', '_layouts'])
+
+    _event_tables = {}
+    _event_layouts = {}
+
     def __init__(self):
         """
         Creates the new Process, sets the current query to :attr:`Process.NEXT`, initializes queue, events, and state.
         """
         super(Process, self).__init__()
 
-        self._queue = NotifyList(self.update_fields)
+        self._queue = []
 
         #: Process context.
         self.context = {}
@@ -1233,28 +2095,134 @@ class Process(Handler):
         #: Current query. An initial value is :attr:`Process.NEXT`.
         self.query = self.NEXT
 
-        #: Current message (read-only).
-        self.message = None
+        #: Limits of each :meth:`Process.handle` call: the limit names (e.g. :attr:`Process.STEPS`) and values,
+        #: None means no limit.
+        self.limits = {}
+        #: Report of the limit reached by the last handle call, see :meth:`Process.get_limit_report`.
+        self.limit_report = None
 
-        #: Current element (read-only).
-        self.current = None
+        self._steps, self._max_steps, self._deadline = 0, None, None
+
+        #: Statistics collection flag, see :attr:`Process.stats`.
+        self.collect_stats = False
+        self._stats = None
 
         self.new_queue_item({})
-        self.setup_events()
+        self._layouts = None
+
+        table = Process._event_tables.get(self.__class__)
+
+        if table:
+            self.bind_event_table(table)
+        else:
+            attrs = dict(self.__dict__)
+            self.setup_events()
+
+            if table is None:
+                table = Process._event_tables[self.__class__] = self.make_event_table(attrs)
+
+                if table:
+                    self._layouts = Process._event_layouts.setdefault(self.__class__, {})
+
+    def make_event_table(self, attrs):
+        """
+        Makes the class-level event table from the events set up by :meth:`Process.setup_events`, so other instances
+        of the class just bind it instead of setting the events up. The events could be shared if they are the
+        methods of the process or the values and functions not referring to the process, and the class defining
+        :meth:`Process.setup_events` has set :attr:`Process.SHARED_EVENTS`.
+
+        :param attrs:   process attributes before the events were set up.
+        :type attrs:    dict.
+        :returns:       tuple of (condition, condition function, event, event function) or False, if the events
+         cannot be shared: the setup has changed other attributes or the events refer to the process.
+        :rtype:         tuple.
+        """
+        owner = next(c for c in self.__class__.__mro__ if 'setup_events' in c.__dict__)
+
+        if not owner.__dict__.get('SHARED_EVENTS') or set(attrs) != set(self.__dict__) or \
+                any(attrs[k] is not v for k, v in self.__dict__.items() if k not in self.EVENT_ATTRS):
+            return False
+
+        table = []
+
+        for condition, event in self._events:
+            functions = []
+
+            for access in (condition, event):
+                value = access.value
+
+                if getattr(value, '__self__', None) is self:
+                    functions.append(get_function(value))
+                elif not callable(value) or getattr(value, '__closure__', True) is None:
+                    functions.append(None)
+                else:
+                    return False
+
+            # Templates do not keep the process
+            table.append((condition.rebind(functions[0]) if functions[0] else condition, functions[0],
+                          event.rebind(functions[1] or event.value), functions[1]))
+
+        return tuple(table)
+
+    def bind_event_table(self, table):
+        """
+        Binds the class-level event table to the process: the conditions and events of the process methods
+        are copied from the table templates with no introspection.
+
+        :param table:   event table, see :meth:`Process.make_event_table`.
+        :type table:    tuple.
+        """
+        cls = self.__class__
+
+        self._events = [(condition.rebind(c_function.__get__(self, cls)) if c_function else condition,
+                         event.rebind(e_function.__get__(self, cls) if e_function else event.value))
+                        for condition, c_function, event, e_function in table]
+
+        self.reset_events_cache()
+        self._layouts = Process._event_layouts.setdefault(cls, {})
+
+        self.update_events()
+
+    def reset_events_cache(self):
+        """
+        Clears the cache of active events, the class-level layouts of the active events cannot be used anymore.
+        """
+        super(Process, self).reset_events_cache()
+        self._layouts = None
+
+    def get_active_events(self, tags):
+        """
+        Gets the active events using their class-level layout for the tags, if the events were bound from the
+        class-level event table and did not change.
+        """
+        if self._layouts is None:
+            return super(Process, self).get_active_events(tags)
+
+        try:
+            positions, layout = self._layouts[tags]
+            active_events = tuple([self._events[i] for i in positions])
+
+            return active_events, EventIndex(active_events, layout)
+
+        except KeyError:
+            active_events, index = super(Process, self).get_active_events(tags)
+            positions = tuple([i for i, e in enumerate(self._events) if e[0].tags.issubset(tags)])
+
+            self._layouts[tags] = positions, index.layout
+
+            return active_events, index
 
     def new_queue_item(self, values):
         """
-        Generates the new queue item (a dictionary) and adds it to the queue updated with values dictionary.
+        Generates the new queue item (a :class:`QueueItem`) and adds it to the queue filled with values dictionary.
 
-        :param values:  dictionary to update the queue item, should at least contain :attr:`Process.CURRENT` and
+        :param values:  dictionary with the queue item fields, should at least contain :attr:`Process.CURRENT` and
          :attr:`Process.MESSAGE`.
         :type values:   dict.
         :returns:       new queue item.
-        :rtype:         dict.
+        :rtype:         QueueItem.
         """
-        item = NotifyDict(self.update_fields,
-                          ((self.CURRENT, values.get(self.CURRENT)),
-                           (self.MESSAGE, values.get(self.MESSAGE, NotifyList(self.update_message)))))
+        item = QueueItem(values.get(self.CURRENT), values.get(self.MESSAGE))
 
         self._queue.append(item)
 
@@ -1285,27 +2253,26 @@ class Process(Handler):
         :param insert:      insert or replace the old message (False by default).
         :type insert:       bool.
         """
-        message = NotifyList(self.update_message, [message] if not is_list(message) else message)
+        top = self._queue[-1]
 
         if insert:
-            message.extend(self.message)
-
-        self._queue[-1][self.MESSAGE] = message
+            top.message.extendleft(reversed([message] if not is_list(message) else message))
+        else:
+            top.message = MessageDeque([message] if not is_list(message) else message)
 
-    def update_message(self):
+    @property
+    def message(self):
         """
-        Updates the :attr:`Process.message` property. This is a callback to be called by queue if its content changes.
+        Current message, the message of the queue's top item (read-only).
         """
-        self.message = self._queue[-1].get(self.MESSAGE)
+        return self._queue[-1].message
 
-    def update_fields(self):
+    @property
+    def current(self):
         """
-        Updates :attr:`Process.message` and :attr:`Process.current` properties. This is a callback to be called by
-        queue if its content changes.
+        Current element, the element of the queue's top item (read-only).
         """
-        top = self._queue[-1]
-        self.message = top.get(self.MESSAGE)
-        self.current = top.get(self.CURRENT)
+        return self._queue[-1].current
 
     def skip(self):
         """
@@ -1325,7 +2292,7 @@ class Process(Handler):
         Queue push condition: if the first item of the :attr:`Process.message` is an Abstract or function,
         the process has to ask it about directions and handle the reply. To do this, a new queue item is created.
         """
-        return Access.get_access(self.message[0], True).mode in Access.CACHEABLE
+        return callable(self.message[0])  # Abstracts and functions are cacheable
 
     def do_queue_push(self):
         """
@@ -1356,14 +2323,18 @@ class Process(Handler):
         """
         self.message.pop(0)
 
+        if self.collect_stats:
+            return self.count_query(self.current) or True
+
         # If abstract returns False/None, we just continue to the next one
-        return Access.get_access(self.current)(self.query, **self.context) or True
+        return Access.get_access(self.current, True)(self.query, **self.context) or True
 
+    @Access.ignore_message
     def can_clear_message(self, *message):
         """
         Cleanup condition: can we remove an empty message item.
         """
-        return not message[0]
+        return not self.message[0]
 
     def do_clear_message(self):
         """
@@ -1420,6 +2391,10 @@ class Process(Handler):
             - :attr:`Process.CURRENT`: current element is not empty.
             - :attr:`Process.EMPTY_MESSAGE`: current message is empty.
             - :attr:`Process.MESSAGE`: current message is not empty (has items).
+
+        The events are set up once per class, other instances bind the class-level event table, see
+        :meth:`Process.make_event_table`. Subclasses overriding the set up run it per instance unless they set
+        :attr:`Process.SHARED_EVENTS` to show the set up does not depend on the instance.
         """
         self.on((self.STOP, self.OK), self.do_finish, Condition.STRING)
         self.on((True, False), self.do_finish, Condition.BOOLEAN)
@@ -1442,6 +2417,7 @@ class Process(Handler):
         del self._queue[:-1]  # And kill the rest
 
         self.context = context
+        self._stats = self.new_stats() if self.collect_stats else None
 
     def on_resume(self, message, context):
         """
@@ -1451,10 +2427,177 @@ class Process(Handler):
         self.to_queue({self.MESSAGE: message})
         self.context.update(context)
 
-    def handle(self, message, context):
+        if self.collect_stats and self._stats is None:
+            self._stats = self.new_stats()
+
+    def on_limit(self, limit):
         """
-        In contrast with :meth:`Handler.handle`, process handle does not stop when the message is handled,
-        but continues handling with the result of the previous call.
+        Limit 'special' event: called by :meth:`Process.handle` when the limit is reached, saves the report to
+        :attr:`Process.limit_report`. The queue is kept, so the process could be resumed, e.g. with higher limits.
+
+        :param limit:   name of the limit reached.
+        :type limit:    str.
+        :returns:       the handling result with :attr:`Process.LIMIT`.
+        :rtype:         tuple.
+        """
+        self.limit_report = self.get_limit_report(limit)
+
+        return self.LIMIT, 0, None
+
+    def get_limit_report(self, limit):
+        """
+        Gets the report of the reached limit: where the process stopped and the counters.
+
+        :param limit:   name of the limit reached.
+        :type limit:    str.
+        :returns:       dict with :attr:`Process.LIMIT`, :attr:`Process.STEPS`, :attr:`Process.CURRENT` and
+         :attr:`Process.QUERY` keys.
+        :rtype:         dict.
+        """
+        return {self.LIMIT: limit, self.STEPS: self._steps, self.CURRENT: self.current, self.QUERY: self.query}
+
+    # Statistics #
+    def new_stats(self):
+        """
+        Creates the empty statistics, see :attr:`Process.stats`.
+
+        :rtype: dict.
+        """
+        return {self.STEPS: 0, self.PEAK_QUEUE: 0, self.EVENTS: {}, self.ELEMENTS: {}}
+
+    def new_element_stats(self):
+        """
+        Creates the empty counters of the element, see :attr:`Process.stats`.
+
+        :rtype: dict.
+        """
+        return {self.QUERIES: 0, self.CHECKS: 0, self.DISPATCHES: 0}
+
+    def get_element_stats(self, element):
+        """
+        Gets the counters of the element, creates them if the element is met for the first time.
+
+        :param element: element to get the counters.
+        :returns:       counters dictionary.
+        :rtype:         dict.
+        """
+        elements = self._stats[self.ELEMENTS]
+        counters = elements.get(element)
+
+        if counters is None:
+            counters = elements[element] = self.new_element_stats()
+
+        return counters
+
+    def count_step(self, result):
+        """
+        Counts the handled step, called after each step when collecting the statistics.
+
+        :param result:  result of the step handling, see :meth:`Handler.handle`.
+        :type result:   tuple.
+        """
+        stats = self._stats
+        stats[self.STEPS] += 1
+
+        if len(self._queue) > stats[self.PEAK_QUEUE]:
+            stats[self.PEAK_QUEUE] = len(self._queue)
+
+        if result[2] is not None:
+            events, name = stats[self.EVENTS], get_object_name(result[2])
+            events[name] = events.get(name, 0) + 1
+
+    def count_query(self, element):
+        """
+        Sends the query to the element like :meth:`Process.do_query` does, counting the query, the conditions
+        checked and the event dispatched by the element.
+
+        :param element: element to query.
+        :returns:       the answer of the element.
+        """
+        counters = self.get_element_stats(element)
+        counters[self.QUERIES] += 1
+
+        if not isinstance(element, Handler):
+            return Access.get_access(element, True)(self.query, **self.context)
+
+        message = (self.query, )
+        counters[self.CHECKS] += len(element._event_index.candidates(message))
+
+        result = element.handle(message, dict(self.context))
+
+        if result[-1] is not None:
+            counters[self.DISPATCHES] += 1
+            self.count_dispatch(element, result[-1], counters)
+
+        return result[0]
+
+    def count_dispatch(self, element, event, counters):
+        """
+        Called by :meth:`Process.count_query` when the element dispatched the event, override to count the
+        specific events.
+
+        :param element:     element queried.
+        :param event:       event dispatched.
+        :param counters:    counters of the element.
+        :type counters:     dict.
+        """
+        pass
+
+    @property
+    def stats(self):
+        """
+        Gets the statistics collected if :attr:`Process.collect_stats` is True, the statistics are reset
+        by :attr:`Process.NEW` command. The dictionary keys are:
+
+            - :attr:`Process.STEPS`: number of the handling steps.
+            - :attr:`Process.PEAK_QUEUE`: maximal length of the queue.
+            - :attr:`Process.EVENTS`: numbers of the process event dispatches by the event name.
+            - :attr:`Process.ELEMENTS`: counters by the element: :attr:`Process.QUERIES`, :attr:`Process.CHECKS`,
+              :attr:`Process.DISPATCHES` and the counters of the subclasses.
+
+        :rtype: dict.
+        """
+        return self._stats
+
+    # Limits #
+    def start_limits(self):
+        """
+        Starts the limits of the handle call: resets the counters and sets the deadline.
+
+        :returns:   True if any limit is set, so :meth:`Process.check_limits` should be called on each step.
+        :rtype:     bool.
+        """
+        self.limit_report = None
+        self._steps, self._max_steps = 0, self.limits.get(self.STEPS)
+
+        timeout = self.limits.get(self.TIMEOUT)
+        self._deadline = default_timer() + timeout if timeout is not None else None
+
+        return any(value is not None for value in self.limits.values())
+
+    def check_limits(self):
+        """
+        Checks the limits and counts the step if none is reached, called before each step if any limit is set.
+
+        :returns:   name of the limit reached or None.
+        :rtype:     str.
+        """
+        if self._max_steps is not None and self._steps >= self._max_steps:
+            return self.STEPS
+
+        if self._deadline is not None and default_timer() > self._deadline:
+            return self.TIMEOUT
+
+        self._steps += 1
+
+    def start_handle(self, message, context):
+        """
+        Starts the handle call: calls :meth:`Process.on_new` if :attr:`Process.NEW` command is specified, otherwise
+        :meth:`Process.on_resume`.
+
+        :param message: message of the handle call.
+        :param context: context of the handle call.
+        :type context:  dict.
         """
         message = list(message)
         if has_first(message, self.NEW):  # Very special case
@@ -1462,21 +2605,80 @@ class Process(Handler):
         else:
             self.on_resume(message, context)
 
-        result = self.NO_HANDLE
+    def step(self):
+        """
+        Handles the first message item by the process events, one step of :meth:`Process.run_loop`.
+
+        :returns:   the handling result, see :meth:`Handler.handle`.
+        :rtype:     tuple.
+        """
+        self.update()
+
+        return super(Process, self).handle(self.message, self.context)
 
-        while self.message or len(self._queue) > 1:
-            self.update()
-            result = super(Process, self).handle(self.message, self.context)
+    def run_loop(self, step, result, limited, steps=None):
+        """
+        Runs the handle loop: calls the step function while there are messages to handle, until the result meets
+        :attr:`Process.STOP_CRITERIA` or one of :attr:`Process.limits` is reached. The results not meeting
+        :attr:`Process.GO_CRITERIA` become the new message.
 
-            if result[0] in self.STOP_CRITERIA:
+        :param step:    step function, e.g. :meth:`Process.step`, returns the handling result or None to pause
+         the loop before the step.
+        :param result:  the last handling result.
+        :type result:   tuple.
+        :param limited: check the limits, see :meth:`Process.start_limits`.
+        :type limited:  bool.
+        :param steps:   maximal number of steps before pausing the loop, None means no maximum.
+        :type steps:    int.
+        :returns:       tuple of (the last handling result, True if the loop finished or False if paused), the
+         paused loop could be continued by the next call.
+        :rtype:         tuple.
+        """
+        queue, counted = self._queue, self.collect_stats
+        stop_criteria, go_criteria = self.STOP_CRITERIA, self.GO_CRITERIA
+
+        while queue[-1].message or len(queue) > 1:
+            if steps is not None:
+                if steps <= 0:
+                    return result, False
+
+                steps -= 1
+
+            if limited:
+                limit = self.check_limits()
+
+                if limit:
+                    return self.on_limit(limit), True
+
+            step_result = step()
+
+            if step_result is None:
+                return result, False
+
+            result = step_result
+
+            if counted:
+                self.count_step(result)
+
+            if result[0] in stop_criteria:
                 break
 
-            elif result[0] in self.GO_CRITERIA:
+            elif result[0] in go_criteria:
                 continue  # No need to put it into the message
 
             self.set_message(result[0], True)
 
-        return result
+        return result, True
+
+    def handle(self, message, context):
+        """
+        In contrast with :meth:`Handler.handle`, process handle does not stop when the message is handled,
+        but continues handling with the result of the previous call, see :meth:`Process.run_loop`. If one of
+        :attr:`Process.limits` is reached, stops with :attr:`Process.LIMIT` result, see :meth:`Process.on_limit`.
+        """
+        self.start_handle(message, context)
+
+        return self.run_loop(self.step, self.NO_HANDLE, self.start_limits())[0]
 
 
 class SharedProcess(Process):
@@ -1493,6 +2695,9 @@ class SharedProcess(Process):
     #: Delete context command (requires key or key list). Deletes the specified keys(s) from the context.
     DELETE_CONTEXT = 'delete_context'
 
+    #: The set up of the events does not depend on the instance, see :attr:`Process.SHARED_EVENTS`.
+    SHARED_EVENTS = True
+
     def context_add(self, key, value):
         self.context[key] = value
 
@@ -1503,11 +2708,12 @@ class SharedProcess(Process):
         del self.context[key]
 
     # Events #
+    @Access.ignore_message
     def can_add_context(self, *message):
         """
         Add context condition: checks if there is a :attr:`SharedProcess.ADD_CONTEXT` command with data in the dictionary.
         """
-        return isinstance(message[0].get(self.ADD_CONTEXT), dict)
+        return isinstance(self.message[0].get(self.ADD_CONTEXT), dict)
 
     def do_add_context(self):
         """
@@ -1519,12 +2725,13 @@ class SharedProcess(Process):
             if not k in self.context:
                 self.context_add(k, v)
 
+    @Access.ignore_message
     def can_update_context(self, *message):
         """
         Update context condition: checks if there is a :attr:`SharedProcess.UPDATE_CONTEXT` command with data in the
         dictionary.
         """
-        return isinstance(message[0].get(self.UPDATE_CONTEXT), dict)
+        return isinstance(self.message[0].get(self.UPDATE_CONTEXT), dict)
 
     def do_update_context(self):
         """
@@ -1535,11 +2742,12 @@ class SharedProcess(Process):
         for k, v in update.items():
             self.context_set(k, v)
 
+    @Access.ignore_message
     def can_delete_context(self, *message):
         """
         Delete context condition: checks if there is a :attr:`SharedProcess.DELETE_CONTEXT` command.
         """
-        return self.DELETE_CONTEXT in message[0]
+        return self.DELETE_CONTEXT in self.message[0]
 
     def do_delete_context(self):
         """
@@ -1573,6 +2781,11 @@ class StackingProcess(SharedProcess):
 
     To perform the rollback, the process records all change actions done via :class:`SharedProcess` commands
     and plays them back in "undo" command style. If no rollback is needed, the saved context can be discarded.
+
+    In the persistent mode the context is a :class:`gt.utils.PersistentDict`, the process saves its snapshot instead
+    of recording the changes, so saving and restoring the context do not depend on the number of changes. The restore
+    brings back the whole saved context, including the parameters changed directly and the changes discarded from
+    the nested saves: unlike the undo stack, they are rolled back by the outer restore.
     """
     #: Push the current context to the undo stack.
     PUSH_CONTEXT = 'push_context'
@@ -1584,17 +2797,52 @@ class StackingProcess(SharedProcess):
     #: Non-empty undo stack tag.
     TRACKING = 'tracking'
 
-    def __init__(self):
+    #: Depth limit: maximal number of the saved contexts, see :attr:`Process.limits`.
+    DEPTH = 'depth'
+    #: Backtracks limit: maximal number of the context restores (e.g. :class:`SelectiveNotion` retries).
+    BACKTRACKS = 'backtracks'
+    #: Element counter: :class:`SelectiveNotion` retries, see :attr:`Process.stats`.
+    RETRIES = 'retries'
+
+    #: The set up of the events does not depend on the instance, see :attr:`Process.SHARED_EVENTS`.
+    SHARED_EVENTS = True
+
+    def __init__(self, persistent=False):
+        """
+        Creates the new StackingProcess.
+
+        :param persistent:  use the persistent mode: keep the context snapshots instead of the undo records.
+        :type persistent:   bool.
+        """
+        #: Persistent mode flag (read-only).
+        self.persistent = persistent
+
         super(StackingProcess, self).__init__()
 
+        if persistent:
+            self.context = PersistentDict()
+
         self._context_stack = []
+        self._backtracks, self._max_depth, self._max_backtracks = 0, None, None
 
     def run_tracking_operation(self, operation):
-        if self._context_stack:
+        if self._context_stack and not self.persistent:
             self._context_stack[-1].add(operation)
         else:
             operation.do()
 
+    def save_context(self):
+        """
+        Gets the snapshot of the persistent mode data to be restored by :meth:`StackingProcess.restore_context`.
+        """
+        return self.context.snapshot()
+
+    def restore_context(self, snapshot):
+        """
+        Restores the persistent mode data from the snapshot made by :meth:`StackingProcess.save_context`.
+        """
+        self.context.restore(snapshot)
+
     # Tracking changes in the context, if needed
     def context_add(self, key, value):
         self.run_tracking_operation(DictChangeOperation(self.context, DictChangeOperation.ADD, key, value))
@@ -1608,24 +2856,79 @@ class StackingProcess(SharedProcess):
     # Events #
     def do_push_context(self):
         """
-        Push context event: start recording changes.
+        Push context event: start recording changes or save the context snapshot in the persistent mode.
         """
         self.message.pop(0)
-        self._context_stack.append(DictChangeGroup())
+        self._context_stack.append(self.save_context() if self.persistent else DictChangeGroup())
 
     def do_pop_context(self):
         """
-        Pop context event: un-does changes from the top of the undo stack and removes the saved context.
+        Pop context event: un-does changes from the top of the undo stack (restores the snapshot in the persistent
+        mode) and removes the saved context.
+        """
+        self.message.pop(0)
+        self._backtracks += 1
+
+        if self.persistent:
+            self.restore_context(self._context_stack.pop())
+        else:
+            self._context_stack.pop().undo()
+
+    def do_forget_context(self):
+        """
+        Forget context event: discard the top context from the undo stack.
+        """
+        self.message.pop(0)
+        self._context_stack.pop()
+
+    def get_limit_report(self, limit):
+        """
+        Adds the number of the saved contexts (:attr:`StackingProcess.DEPTH`) and the context restores
+        (:attr:`StackingProcess.BACKTRACKS`) to the report.
         """
-        self.message.pop(0)
-        self._context_stack.pop().undo()
+        report = super(StackingProcess, self).get_limit_report(limit)
+        report[self.DEPTH], report[self.BACKTRACKS] = len(self._context_stack), self._backtracks
 
-    def do_forget_context(self):
+        return report
+
+    def new_element_stats(self):
         """
-        Forget context event: discard the top context from the undo stack.
+        Adds the counters of the context saves (:attr:`StackingProcess.PUSH_CONTEXT`), restores
+        (:attr:`StackingProcess.POP_CONTEXT`) and :class:`SelectiveNotion` retries
+        (:attr:`StackingProcess.RETRIES`), the commands are counted for the element replied with them.
         """
-        self.message.pop(0)
-        self._context_stack.pop()
+        counters = super(StackingProcess, self).new_element_stats()
+        counters[self.PUSH_CONTEXT] = counters[self.POP_CONTEXT] = counters[self.RETRIES] = 0
+
+        return counters
+
+    def count_step(self, result):
+        super(StackingProcess, self).count_step(result)
+
+        if result[2] == self.do_push_context:
+            self.get_element_stats(self.current)[self.PUSH_CONTEXT] += 1
+
+        elif result[2] == self.do_pop_context:
+            self.get_element_stats(self.current)[self.POP_CONTEXT] += 1
+
+    def count_dispatch(self, element, event, counters):
+        if isinstance(element, SelectiveNotion) and event == element.do_retry:
+            counters[self.RETRIES] += 1
+
+    def start_limits(self):
+        self._backtracks = 0
+        self._max_depth, self._max_backtracks = self.limits.get(self.DEPTH), self.limits.get(self.BACKTRACKS)
+
+        return super(StackingProcess, self).start_limits()
+
+    def check_limits(self):
+        if self._max_depth is not None and len(self._context_stack) > self._max_depth:
+            return self.DEPTH
+
+        if self._max_backtracks is not None and self._backtracks > self._max_backtracks:
+            return self.BACKTRACKS
+
+        return super(StackingProcess, self).check_limits()
 
     def update_tags(self):
         tags = super(StackingProcess, self).update_tags()
@@ -1648,11 +2951,14 @@ class StackingProcess(SharedProcess):
 
     def on_new(self, message, context):
         """
-        Clears the undo stack if a new process started.
+        Clears the undo stack if a new process started, makes the context persistent in the persistent mode.
         """
         super(StackingProcess, self).on_new(message, context)
         del self._context_stack[:]
 
+        if self.persistent and not isinstance(self.context, PersistentDict):
+            self.context = PersistentDict(self.context)
+
 
 class StatefulProcess(StackingProcess):
     """
@@ -1675,9 +2981,12 @@ class StatefulProcess(StackingProcess):
     #: 'Has previously saved states' tag.
     HAS_STATES = 'has_states'
 
-    def __init__(self):
-        super(StatefulProcess, self).__init__()
-        self.states = {}
+    #: The set up of the events does not depend on the instance, see :attr:`Process.SHARED_EVENTS`.
+    SHARED_EVENTS = True
+
+    def __init__(self, persistent=False):
+        super(StatefulProcess, self).__init__(persistent)
+        self.states = PersistentDict() if persistent else {}
 
     def has_states(self):
         return len(self.states) > 0
@@ -1698,6 +3007,19 @@ class StatefulProcess(StackingProcess):
         if abstract in self.states:
             self.run_tracking_operation(DictChangeOperation(self.states, DictChangeOperation.DELETE, abstract))
 
+    def save_context(self):
+        """
+        Adds the states to the snapshot.
+        """
+        return super(StatefulProcess, self).save_context(), self.states.snapshot()
+
+    def restore_context(self, snapshot):
+        """
+        Restores the states as well.
+        """
+        super(StatefulProcess, self).restore_context(snapshot[0])
+        self.states.restore(snapshot[1])
+
     def do_query(self):
         """
         Query event: adds the current element's state as the :attr:`StatefulProcess.STATE`
@@ -1713,11 +3035,12 @@ class StatefulProcess(StackingProcess):
         return result
 
     # Events #
+    @Access.ignore_message
     def can_set_state(self, *message):
         """
         Set state condition: checks for :attr:`StatefulProcess.SET_STATE` command in the message.
         """
-        return self.SET_STATE in message[0]
+        return self.SET_STATE in self.message[0]
 
     def do_set_state(self):
         """
@@ -1768,6 +3091,26 @@ class ParsingProcess(StatefulProcess):
     Supports :attr:`ParsingProcess.ERROR` command to indicate a problem and possible stop of lookahead.
     Supports looping commands :attr:`ParsingProcess.BREAK` and :attr:`ParsingProcess.CONTINUE`; to change the direction
     back to forward uses :attr:`Process.NEXT`.
+
+    In the cursor mode the text is not cut off: :attr:`ParsingProcess.TEXT` keeps a :class:`gt.utils.TextCursor` view
+    of the original buffer and the proceeding only moves its position, so parsing of a long text does not copy it
+    over and over. Conditions match the text at the cursor position; the regexes looking behind the match start
+    (``^``, ``\b``, lookbehind assertions) are matched against the remaining text, see :meth:`Condition.looks_behind`.
+    User functions (actions, function conditions) get the cursor that behaves like the remaining text string but is
+    not a ``str``: ``str(text)`` gives the string.
+
+    In the packrat mode the process memoizes the outcome of passing the :class:`ComplexNotion` at the text offset:
+    the final direction, the length of the parsed text and the changes of the context and states. When the notion
+    is passed forward at the same offset again, e.g. when :class:`SelectiveNotion` re-tries the cases, the outcome
+    is replayed without walking the notion's subgraph. The outcome is supposed to depend only on the offset, so the
+    notions with the outside side effects should be marked with :attr:`Notion.memoize` False. The memo is
+    bounded, the least recently used outcomes are evicted.
+
+    If :attr:`ParsingProcess.TEXT` is a file object or an iterator of text chunks, the process works in the streaming
+    mode: the text is read by chunks into the window and :attr:`ParsingProcess.TEXT` is the cursor in it. The window
+    keeps at least :attr:`ParsingProcess.LOOKAHEAD` characters after the cursor (unless the stream is over) and
+    the text back to the oldest saved context (see :class:`StackingProcess`) for the rollback, the rest is dropped,
+    so the memory does not depend on the text length. The conditions see the text up to the window end only.
     """
     #: Proceed command (requires a dict with numeric positive value); goes with the length of the parsed text piece.
     PROCEED = 'proceed'
@@ -1785,6 +3128,89 @@ class ParsingProcess(StatefulProcess):
     #: Context parameter with the last parsed text piece.
     LAST_PARSED = 'last_parsed'
 
+    #: Streaming mode: minimal number of characters in the window after the cursor.
+    LOOKAHEAD = 1 << 12
+    #: Streaming mode: number of characters to read from the file object at once.
+    CHUNK_SIZE = 1 << 16
+
+    #: The set up of the events does not depend on the instance, see :attr:`Process.SHARED_EVENTS`.
+    SHARED_EVENTS = True
+
+    def __init__(self, cursor=False, persistent=False, packrat=0):
+        """
+        Creates the new ParsingProcess.
+
+        :param cursor:      use the cursor mode: keep the original text and the position instead of cutting off the
+         text.
+        :type cursor:       bool.
+        :param persistent:  use the persistent context mode, see :class:`StackingProcess`.
+        :type persistent:   bool.
+        :param packrat:     the packrat mode memo size, 0 to switch the mode off.
+        :type packrat:      int.
+        """
+        #: Cursor mode flag (read-only).
+        self.cursor = cursor
+        #: Packrat mode memo size (read-only).
+        self.packrat = packrat
+
+        self._memo = OrderedDict()
+        self._memo_hits = self._memo_misses = 0
+        self._records, self._context_log, self._states_log = [], [], []
+
+        self._stream, self._window, self._base = None, None, 0
+        self._saved_offsets = []
+
+        super(ParsingProcess, self).__init__(persistent)
+
+    def set_cursor(self):
+        """
+        Wraps the plain :attr:`ParsingProcess.TEXT` context parameter into the :class:`gt.utils.TextCursor`
+        if the process is in the cursor mode, starts the streaming mode if the text is a stream.
+        """
+        text = self.context.get(self.TEXT)
+
+        if is_stream(text):
+            self._stream = iter(lambda: text.read(self.CHUNK_SIZE), None) if hasattr(text, 'read') else text
+            self._window, self._base = '', self.parsed_length
+
+            self.context[self.TEXT] = TextCursor(self._window)
+            self.fill_text()
+
+        elif is_string(text):
+            self._stream = self._window = None
+
+            if self.cursor:
+                self.context[self.TEXT] = TextCursor(text)
+
+    def fill_text(self):
+        """
+        Streaming mode: makes sure the window has :attr:`ParsingProcess.LOOKAHEAD` characters after the cursor,
+        reading the new chunks if needed, and drops the text before the oldest saved context position.
+        """
+        text = self.context[self.TEXT]
+
+        if len(text) >= self.LOOKAHEAD or (self._stream is None and text.buffer is self._window):
+            return
+
+        offset, window, base = self.parsed_length, self._window, self._base
+        start = max(min(offset, self._saved_offsets[0]) if self._saved_offsets else offset, base)
+
+        chunks = [window[start - base:]]
+        available = base + len(window) - offset
+
+        while available < self.LOOKAHEAD and self._stream is not None:
+            chunk = next(self._stream, None)
+
+            if not chunk:
+                self._stream = None  # The stream is over
+                break
+
+            chunks.append(chunk)
+            available += len(chunk)
+
+        self._window, self._base = ''.join(chunks), start
+        self.context_set(self.TEXT, TextCursor(self._window, offset - start))
+
     def is_parsed(self):
         """
         Checks whether the text was completely and successfully parsed.
@@ -1797,19 +3223,163 @@ class ParsingProcess(StatefulProcess):
         """
         Calls the :meth:`Process.handle`.
 
-        :returns: If the text was not fully parsed (see :meth:`ParsingProcess.is_parsed`), returns False;
-         otherwise returns the result of the superclass handle call.
+        :returns: If the text was not fully parsed (see :meth:`ParsingProcess.is_parsed`), returns False unless
+         stopped or limited; otherwise returns the result of the superclass handle call.
+        """
+        return self.get_result(super(ParsingProcess, self).handle(message, context))
+
+    def get_result(self, result):
+        """
+        Makes the parsing result from the result of :meth:`Process.handle` loop.
+
+        :param result:  the last handling result.
+        :type result:   tuple.
+        :returns:       False instead of the result if the text was not fully parsed (see
+         :meth:`ParsingProcess.is_parsed`) unless stopped or limited, the parsed length and the event.
+        :rtype:         tuple.
+        """
+        return False if not self.is_parsed() and result[0] not in (self.STOP, self.LIMIT) else result[0], \
+            self.parsed_length, result[2]
+
+    def get_limit_report(self, limit):
+        """
+        Adds the length of the parsed text (:attr:`ParsingProcess.PARSED_LENGTH`) to the report.
+        """
+        report = super(ParsingProcess, self).get_limit_report(limit)
+        report[self.PARSED_LENGTH] = self.parsed_length
+
+        return report
+
+    # Packrat mode #
+    def context_add(self, key, value):
+        if self._records:
+            self._context_log.append(key)
+
+        super(ParsingProcess, self).context_add(key, value)
+
+    def context_set(self, key, value):
+        if self._records:
+            self._context_log.append(key)
+
+        super(ParsingProcess, self).context_set(key, value)
+
+    def context_delete(self, key):
+        if self._records:
+            self._context_log.append(key)
+
+        super(ParsingProcess, self).context_delete(key)
+
+    def _set_state(self, abstract, state):
+        if self._records:
+            self._states_log.append(abstract)
+
+        super(ParsingProcess, self)._set_state(abstract, state)
+
+    def _clear_state(self, abstract):
+        if self._records:
+            self._states_log.append(abstract)
+
+        super(ParsingProcess, self)._clear_state(abstract)
+
+    def start_record(self, notion):
+        """
+        Starts recording the passing of the notion just pushed to the queue.
+
+        :param notion:  notion to record.
+        :type notion:   ComplexNotion.
+        """
+        self._records.append(PackratRecord(notion, self.parsed_length, len(self._queue) - 1,
+                                           len(self._context_stack), len(self._context_log), len(self._states_log)))
+
+    def stop_record(self, record):
+        """
+        Saves the outcome of the record to the memo if the record is still valid and the saved contexts stack is
+        the same as at the start.
+
+        :param record:  finished record.
+        :type record:   PackratRecord.
+        """
+        if record.valid and record.depth == len(self._context_stack):
+            context_keys, states_keys = set(self._context_log[record.context_log:]), \
+                set(self._states_log[record.states_log:])
+
+            outcome = (self.query, self.parsed_length - record.offset,
+                       tuple((k, self.context[k]) for k in context_keys if k in self.context),
+                       tuple(k for k in context_keys if not k in self.context),
+                       tuple((k, self.states[k]) for k in states_keys if k in self.states),
+                       tuple(k for k in states_keys if not k in self.states))
+
+            self._memo[record.notion, record.offset] = outcome
+
+            if len(self._memo) > self.packrat:
+                self._memo.popitem(False)
+
+        if not self._records:
+            del self._context_log[:]
+            del self._states_log[:]
+
+    def replay(self, outcome):
+        """
+        Applies the memoized outcome of the notion passing instead of passing it.
+
+        :param outcome: the outcome saved by :meth:`ParsingProcess.stop_record`.
+        :type outcome:  tuple.
+        """
+        query, length, context_set, context_deleted, states_set, states_deleted = outcome
+
+        for k in context_deleted:
+            if k in self.context:
+                self.context_delete(k)
+
+        for k, v in context_set:
+            self.context_set(k, v)
+
+        for k in states_deleted:
+            self._clear_state(k)
+
+        for k, v in states_set:
+            self._set_state(k, v)
+
+        self.query = query
+
+    def reset_memo(self):
+        """
+        Clears the packrat mode memo and the records.
+        """
+        self._memo.clear()
+
+        del self._records[:]
+        del self._context_log[:]
+        del self._states_log[:]
+
+    @property
+    def memo_stats(self):
+        """
+        Gets the packrat mode memo statistics: a dict with :attr:`Handler.HITS`, :attr:`Handler.MISSES` and
+        :attr:`Handler.SIZE` (number of memoized outcomes) keys.
+        """
+        return {self.HITS: self._memo_hits, self.MISSES: self._memo_misses, self.SIZE: len(self._memo)}
+
+    @property
+    def stats(self):
         """
-        result = super(ParsingProcess, self).handle(message, context)
+        Adds the length of the parsed text (:attr:`ParsingProcess.PARSED_LENGTH`) to :attr:`Process.stats`, so the
+        number of steps per character could be tracked.
+        """
+        stats = super(ParsingProcess, self).stats
+
+        if stats is not None:
+            stats[self.PARSED_LENGTH] = self.parsed_length
 
-        return False if not self.is_parsed() and not result[0] == self.STOP else result[0], self.parsed_length, result[2]
+        return stats
 
     # Events #
+    @Access.ignore_message
     def can_proceed(self, *message):
         """
         Proceed condition: checks for :attr:`ParsingProcess.PROCEED` and the positive distance.
         """
-        distance = message[0].get(self.PROCEED)
+        distance = self.message[0].get(self.PROCEED)
         return is_number(distance) and len(self.context.get(self.TEXT)) >= distance
 
     def do_proceed(self):
@@ -1818,12 +3388,94 @@ class ParsingProcess(StatefulProcess):
         :attr:`ParsingProcess.PARSED_LENGTH` and :attr:`ParsingProcess.LAST_PARSED` context parameters.
         """
         proceed = self.message[0].pop(self.PROCEED)
-        last_parsed = self.context[self.TEXT][0:proceed]
+        text = self.context[self.TEXT]
+        last_parsed = text[0:proceed]
 
-        self.context_set(self.TEXT, self.context[self.TEXT][proceed:])
+        self.context_set(self.TEXT, text.advance(proceed) if text.__class__ is TextCursor else text[proceed:])
         self.context_set(self.PARSED_LENGTH, self.parsed_length + proceed)
         self.context_set(self.LAST_PARSED, last_parsed)
 
+        if self._window is not None:
+            self.fill_text()
+
+    def do_queue_push(self):
+        """
+        Queue push event: in the packrat mode replays the memoized outcome of the notion passing forward or starts
+        recording it. The notions with :attr:`Notion.memoize` False invalidate the current records.
+        """
+        notion = self.message[0]
+
+        if self.packrat and isinstance(notion, Notion):
+            if not notion.memoize:
+                for record in self._records:
+                    record.valid = False
+
+            elif self.query == self.NEXT and isinstance(notion, ComplexNotion) and not notion in self.states:
+                key = notion, self.parsed_length
+                outcome = self._memo.get(key)
+
+                if outcome:
+                    self._memo_hits += 1
+                    self._memo[key] = self._memo.pop(key)  # Recently used
+
+                    self.message.pop(0)
+                    self.replay(outcome)
+                else:
+                    self._memo_misses += 1
+
+                    super(ParsingProcess, self).do_queue_push()
+                    self.start_record(notion)
+
+                return
+
+        super(ParsingProcess, self).do_queue_push()
+
+    def do_queue_pop(self):
+        """
+        Queue pop event: in the packrat mode stops the records of the notions passed.
+        """
+        super(ParsingProcess, self).do_queue_pop()
+
+        while self._records and self._records[-1].level >= len(self._queue):
+            self.stop_record(self._records.pop())
+
+    def do_push_context(self):
+        """
+        Push context event: keeps the text position to be rolled back to.
+        """
+        super(ParsingProcess, self).do_push_context()
+        self._saved_offsets.append(self.parsed_length)
+
+    def do_pop_context(self):
+        """
+        Pop context event: drops the saved text position, in the packrat mode invalidates the records started
+        with more contexts saved.
+        """
+        super(ParsingProcess, self).do_pop_context()
+        self._saved_offsets.pop()
+
+        self.check_records()
+
+    def do_forget_context(self):
+        """
+        Forget context event: drops the saved text position, in the packrat mode invalidates the records started
+        with more contexts saved.
+        """
+        super(ParsingProcess, self).do_forget_context()
+        self._saved_offsets.pop()
+
+        self.check_records()
+
+    def check_records(self):
+        """
+        Invalidates the packrat mode records started with more contexts saved than now.
+        """
+        depth = len(self._context_stack)
+
+        for record in self._records:
+            if record.depth > depth:
+                record.valid = False
+
     def do_turn(self):
         """
         Turn event: sets :attr:`Process.query` to the value of :attr:`ParsingProcess.BREAK`,
@@ -1854,10 +3506,28 @@ class ParsingProcess(StatefulProcess):
         """
         super(ParsingProcess, self).on_new(message, context)
 
+        self.reset_memo()
+        del self._saved_offsets[:]
+        self._stream = self._window = None
+
         self.query = self.NEXT
         self.context_set(self.PARSED_LENGTH, 0)
         self.context_set(self.LAST_PARSED, '')
 
+        self.set_cursor()
+
+    def on_resume(self, message, context):
+        """
+        Resume event: makes sure the new text is wrapped into the cursor in the cursor mode, clears the packrat
+        mode memo if there is a new text.
+        """
+        super(ParsingProcess, self).on_resume(message, context)
+
+        if self.TEXT in context:
+            self._memo.clear()
+
+        self.set_cursor()
+
     @property
     def text(self):
         """
@@ -1898,6 +3568,7 @@ class VisitorProcess(Process):
 
         #: The visited path.
         self.visited = []
+        self._visited_set = set()  # For the fast lookup, the path is kept in order
 
         super(VisitorProcess, self).__init__()
         self.query = self.VISIT
@@ -1906,7 +3577,7 @@ class VisitorProcess(Process):
         """
         For this class only :class:`Abstract` instances could be put to the queue.
         """
-        return Access.get_access(self.message[0], True).mode == Access.CALL
+        return isinstance(self.message[0], Abstract)
 
     def do_query(self):
         """
@@ -1924,11 +3595,21 @@ class VisitorProcess(Process):
         This method checks is the :attr:`Process.current` already visited and if no calls
         :attr:`VisitorProcess.visit_event` before allowing to visit it.
         """
-        if not self.current in self.visited:
+        current = self.current
+
+        try:
+            hashable, visited = True, current in self._visited_set
+        except TypeError:  # Unhashable abstracts are looked up in the path
+            hashable, visited = False, current in self.visited
+
+        if not visited:
             result = self.visit_event.run(self.message, self.context)[0] if self.visit_event else True
 
             if result:
-                self.visited.append(self.current)
+                self.visited.append(current)
+
+                if hashable:
+                    self._visited_set.add(current)
 
                 return result
 
@@ -1938,6 +3619,7 @@ class VisitorProcess(Process):
         """
         super(VisitorProcess, self).on_new(message, context)
         del self.visited[:]
+        self._visited_set.clear()
 
 
 class ParsingRelation(NextRelation):
@@ -1945,6 +3627,11 @@ class ParsingRelation(NextRelation):
     Parsing relation: should be passable in a forward direction (otherwise returns :attr:`ParsingProcess.ERROR`).
     If passed, consumes the amount of text equal to the rank using :attr:`ParsingProcess.PROCEED` command.
     """
+    #: Optional flag state parameter.
+    OPTIONAL = 'optional'
+    #: Check only flag state parameter.
+    CHECK_ONLY = 'check_only'
+
     def __init__(self, subj, obj, condition=None, owner=None, **options):
         """
         New options in addition to :meth:`NextRelation.__init__`:
@@ -1956,13 +3643,35 @@ class ParsingRelation(NextRelation):
         """
         super(ParsingRelation, self).__init__(subj, obj, condition, owner, **options)
 
-        #: Do not return error if cannot be passed
-        self.optional = options.get('optional', False)
-        #: Do not consume text when passed.
-        self.check_only = options.get('check_only', False)
+        self._optional = options.get('optional', False)
+        self._check_only = options.get('check_only', False)
 
         self.unknown_event = Event(self.on_error)
 
+    @property
+    def optional(self):
+        """
+        Sets/gets the optional flag: do not return error if cannot be passed.
+        """
+        return self._optional
+
+    @optional.setter
+    def optional(self, value):
+        self.check_mutable(self.OPTIONAL)
+        self._optional = value
+
+    @property
+    def check_only(self):
+        """
+        Sets/gets the check only flag: do not consume text when passed.
+        """
+        return self._check_only
+
+    @check_only.setter
+    def check_only(self, value):
+        self.check_mutable(self.CHECK_ONLY)
+        self._check_only = value
+
     def check_condition(self, message, context):
         """
         Checks the :attr:`NextRelation.condition` against the value of :attr:`ParsingProcess.TEXT` context parameter.
@@ -1991,6 +3700,16 @@ class ParsingRelation(NextRelation):
         if not self.optional and self.is_forward(message):
             return ParsingProcess.ERROR
 
+    def __getstate__(self):
+        state = super(ParsingRelation, self).__getstate__()
+        state[self.OPTIONAL], state[self.CHECK_ONLY] = self.optional, self.check_only
+
+        return state
+
+    def __setstate__(self, state):
+        super(ParsingRelation, self).__setstate__(state)
+        self.optional, self.check_only = state[self.OPTIONAL], state[self.CHECK_ONLY]
+
 
 class SelectiveNotion(ComplexNotion):
     """
@@ -1999,17 +3718,87 @@ class SelectiveNotion(ComplexNotion):
     one with the highest rank and processed without errors. After each try, the context state will be restored to make
     sure all relations use the same context data. Like in the original switch statement it is possible to specify the
     :attr:`SelectiveNotion.default` relation to be used if nothing worked.
+
+    The :class:`ParsingRelation` cases with string (or list of strings) conditions are kept in the prefix trees, so
+    they are matched in a single scan of the text; other cases are checked one by one. The trees are rebuilt when
+    the relations or their conditions change.
     """
     #: Cases state parameter, keeps the list of remaining cases for re-tries.
     CASES = 'cases'
+    #: Default relation state parameter.
+    DEFAULT = 'default'
 
     def __init__(self, name, owner=None):
         super(SelectiveNotion, self).__init__(name, owner)
 
         self.on(self.can_retry, self.do_retry)
         self.on(self.can_finish, self.do_finish)
+        self.on(self.add_prefix(self.CONDITION, self.SET_PREFIX), self.do_condition)
 
         self._default = None
+        self._cases_index = None
+        self._cases = None
+
+    @staticmethod
+    def get_literals(relation):
+        """
+        Gets the strings to match the relation condition if the relation is a :class:`ParsingRelation` with the
+        default events and the condition is a string or a list of strings to be matched at the beginning of the text.
+
+        :param relation:    relation to check.
+        :type relation:     Relation.
+        :returns:           tuple of (list of the condition strings, ignore case flag) or None.
+        :rtype:             tuple.
+        """
+        if type(relation) is not ParsingRelation or len(relation.events) != 2:
+            return None
+
+        condition = relation.condition_access
+        conditions = condition.list if condition.spec == Condition.LIST else (condition, )
+
+        for c in conditions:
+            if get_function(c.check) is not _CHECK_STRING_MATCH or (c._ignore_case and len(c._value) != c._value_len):
+                return None
+
+        return [c._value for c in conditions], condition._ignore_case
+
+    def get_cases_index(self):
+        """
+        Gets the index of the string cases: tuple of (set of indexed relations, case-sensitive trie, ignore case trie).
+        The index is built on the first use.
+        """
+        if self._cases_index is None:
+            indexed, exact, folded = set(), Trie(), Trie()
+
+            for rel in self.relations:
+                literals = self.get_literals(rel)
+
+                if literals is not None:
+                    indexed.add(rel)
+
+                    for value in literals[0]:
+                        (folded if literals[1] else exact).add(value, rel)
+
+            self._cases_index = indexed, exact, folded
+
+        return self._cases_index
+
+    def reset_cases_index(self):
+        """
+        Drops the index of the string cases, it will be re-built on the next use.
+        """
+        self._cases_index = None
+
+    def get_cases(self):
+        """
+        Gets the relations to select from: all the relations except the :attr:`SelectiveNotion.default` one.
+
+        :rtype: tuple.
+        """
+        if self._frozen:
+            return self._cases
+
+        return tuple(rel for rel in self.relations if rel != self._default)
 
     def get_best_cases(self, message, context):
         """
@@ -2025,13 +3814,52 @@ class SelectiveNotion(ComplexNotion):
         """
         context[self.ANSWER] = self.RANK
 
+        return self.select_cases(message, context, lambda rel: rel(*message, **context))  # With the rank, please
+
+    def select_cases(self, message, context, rank):
+        """
+        Selects the cases with the highest rank, see :meth:`SelectiveNotion.get_best_cases`.
+
+        :param message:     message items.
+        :type message:      list.
+        :param context:     message handling context.
+        :type context:      dict.
+        :param rank:        function to get the (result, rank) reply of the relation, used for the cases which are
+          not in the index.
+        :returns:           the relation(s) with the highest rank or :attr:`SelectiveNotion.default` relation.
+        :rtype: list.
+        """
+        indexed, exact, folded = self.get_cases_index()
+        text, matched = context.get(ParsingProcess.TEXT), {}
+
+        if indexed and self.is_forward(message) and (is_string(text) or text.__class__ is TextCursor):
+            buffer, position = (text.buffer, text.position) if text.__class__ is TextCursor else (text, 0)
+
+            for tree, fold in ((exact, False), (folded, True)):
+                found = tree.match(buffer, position, fold) if tree else []
+
+                if found is None:  # Cannot compare folded text, checking one by one
+                    indexed = set(rel for rel in indexed if not self.get_literals(rel)[1])
+                    continue
+
+                for length, relations in found:  # Longer matches come later and have a higher rank
+                    for rel in relations:
+                        matched[rel] = length
+        else:
+            indexed = ()
+
         cases = []
         max_len = -1
-        for rel in self.relations:
-            if rel == self._default:  # Not now
-                continue
-
-            result, length = rel(*message, **context)  # With the rank, please
+        for rel in self.get_cases():
+            if rel in indexed and not rel.optional:
+                if rel not in matched:
+                    continue  # Error
+
+                length = matched[rel]
+                result = ({ParsingProcess.PROCEED: length}, rel.object) if length and not rel.check_only \
+                    else rel.object
+            else:
+                result, length = rank(rel)
 
             if result != ParsingProcess.ERROR and length >= 0:
                 max_len = max(length, max_len)
@@ -2053,6 +3881,16 @@ class SelectiveNotion(ComplexNotion):
         if self._default and not self._default in self.relations:
             self.default = None
 
+        self.reset_cases_index()
+
+    def do_condition(self):
+        """
+        Condition change event: the condition of a relation was changed, the index of the cases should be re-built.
+        """
+        self.reset_cases_index()
+
+        return True
+
     # Events #
     def can_go_forward(self, *message, **context):
         """
@@ -2144,8 +3982,34 @@ class SelectiveNotion(ComplexNotion):
         if self._default == value or (value and value.subject != self):
             return
 
+        self.check_mutable(self.DEFAULT)
         self._default = value
 
+    def freeze(self):
+        """
+        Freezes the notion, building the index of the string cases and the list of cases in advance.
+        """
+        super(SelectiveNotion, self).freeze()
+
+        self.get_cases_index()
+        self._cases = tuple(rel for rel in self.relations if rel != self._default)
+
+    def unfreeze(self):
+        super(SelectiveNotion, self).unfreeze()
+        self._cases = None
+
+    def __getstate__(self):
+        state = super(SelectiveNotion, self).__getstate__()
+        state[self.DEFAULT] = self.default
+
+        return state
+
+    def __setstate__(self, state):
+        super(SelectiveNotion, self).__setstate__(state)
+
+        self.default = state[self.DEFAULT]
+        self.reset_cases_index()
+
 
 class LoopRelation(NextRelation):
     """
@@ -2160,6 +4024,7 @@ class LoopRelation(NextRelation):
 
     def __init__(self, subj, obj, condition=None, owner=None):
         super(LoopRelation, self).__init__(subj, obj, condition, owner)
+        self._kind = None
 
         # General loop
         self.on(self.can_start_general, self.do_start_general, Condition.VALUE)
@@ -2178,6 +4043,9 @@ class LoopRelation(NextRelation):
         """
         Forward condition. In this class this condition works only for infinite loops.
         """
+        if self._frozen:
+            return self._kind[0]
+
         return self.condition_access == TRUE_CONDITION  # Here we check only the simplest case
 
     def set_condition(self, value):
@@ -2228,12 +4096,18 @@ class LoopRelation(NextRelation):
         """
         Is a flexible loop: the condition has no finite limit of repetitions, either lower or higher.
         """
+        if self._frozen:
+            return self._kind[1]
+
         return (self.is_numeric() and self.condition_access.spec == Condition.LIST) or self.is_wildcard()
 
     def is_general(self):
         """
         Is a general type: numeric, wildcard or infinite, but not a custom.
         """
+        if self._frozen:
+            return self._kind[2]
+
         return self.is_numeric() or self.is_wildcard() or self.is_infinite()
 
     def is_looping(self, context):
@@ -2253,6 +4127,9 @@ class LoopRelation(NextRelation):
          for loops with no upper bound it equals to infinity.
         :rtype:     tuple.
         """
+        if self._frozen:
+            return self._kind[3]
+
         lower, upper = 0, self.INFINITY
 
         if self.is_numeric():
@@ -2275,6 +4152,18 @@ class LoopRelation(NextRelation):
 
         return lower, upper
 
+    def freeze(self):
+        """
+        Freezes the loop, precomputing its kind and bounds.
+        """
+        self._kind = self.check_condition(None, None), self.is_flexible(), self.is_general(), self.get_bounds()
+
+        super(LoopRelation, self).freeze()
+
+    def unfreeze(self):
+        super(LoopRelation, self).unfreeze()
+        self._kind = None
+
     def get_next_iteration_reply(self, i=1):
         """
         Gets the next iteration reply: sets the state to the iteration number using :attr:`StatefulProcess.SET_STATE`
@@ -2437,8 +4326,22 @@ class LoopRelation(NextRelation):
 class Graph(Element):
     """
     Graph is a container for elements like Notions, Relations, and other Graphs. It allows easy search and processing
-    of the elements.
+    of the elements. Graphs are picklable: actions and conditions are pickled by value, so the functions should be
+    importable or registered by name, see :mod:`gt.pickling`.
+
+    The graph that is not changed while processed could be traversed by many processes on different threads at once
+    without locks, each thread should use its own process; use :meth:`Graph.freeze` to make sure of it. The elements
+    do not keep the traversal data: it is in the process context and states, the element handlers get a copy of the
+    context and the dictionary values returned by the actions are copied. The caches built on the first use (the
+    selective cases index, the event indexes, the accesses) are published by a single assignment when complete, so
+    a concurrent use could only build them twice.
     """
+    #: Root notion state parameter.
+    ROOT = 'root'
+    #: Notions state parameter.
+    NOTIONS = 'notions'
+    #: Relations state parameter.
+    RELATIONS = 'relations'
 
     def __init__(self, root=None, owner=None):
         """
@@ -2626,6 +4529,27 @@ class Graph(Element):
             collection.append(element)
             return True
 
+    def freeze(self):
+        """
+        Freezes the graph and all its elements, including the sub-graphs. Changing the frozen elements or attaching
+        the new ones raises AttributeError, so the elements precompute the data they use on each pass: the relations
+        of the complex notions, the kinds and bounds of the loops, the cases of the selective notions. The frozen flag
+        is not pickled, freeze the graph again after loading.
+        """
+        for element in self._notions + self._relations:
+            element.freeze()
+
+        super(Graph, self).freeze()
+
+    def unfreeze(self):
+        """
+        Unfreezes the graph and all its elements, dropping the precomputed data.
+        """
+        super(Graph, self).unfreeze()
+
+        for element in self._notions + self._relations:
+            element.unfreeze()
+
     def do_forward(self):
         """
         Forward event. Returns :attr:`Graph.root` value.
@@ -2680,6 +4604,20 @@ class Graph(Element):
     def name(self, value):
         self.root.name = value
 
+    def __getstate__(self):
+        state = super(Graph, self).__getstate__()
+        state[self.ROOT], state[self.NOTIONS], state[self.RELATIONS] = self.root, self._notions, self._relations
+
+        return state
+
+    def __setstate__(self, state):
+        super(Graph, self).__setstate__(state)
+
+        # The elements are added by their owner notifications, the root could still be unpickling its owner
+        sort_as(self._notions, state[self.NOTIONS])
+        sort_as(self._relations, state[self.RELATIONS])
+        self.change_property(self.ROOT, state[self.ROOT])
+
 
 class GraphBuilder(object):
     """
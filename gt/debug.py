@@ -7,20 +7,150 @@
 
 """
 
-from gt.core import Handler, Event
+import json
+import sys
+import threading
 
-from collections import defaultdict
+from gt.core import Handler, Event, Process, ParsingProcess, Notion
+from gt.utils import is_string
+
+from collections import defaultdict, deque, namedtuple
+from timeit import default_timer
+
+#: Trace record of :class:`ProcessTracer`: the step number, the element queried, the query, the kind of the reply,
+#: the parsed text length, the queue length and the time.
+#: Record of :class:`ProcessTracer`: the step, the id and the label of the element queried (the element itself is not
+#: kept), the query, the kind of the reply, the parsed text length, the queue length and the time.
+TraceRecord = namedtuple('TraceRecord', 'step element_id label query reply offset depth time')
+
+
+class ContextEvent(Event):
+    """
+    Post-event calling its function with the message and the context as they are, so the function could change
+    the context of the caller. The post-events are chained: the next post-event in :attr:`gt.core.Event.post_event`
+    is called as well, the first result that is not None is returned. The :attr:`gt.core.Event.RESULT` put to the
+    context for the post-events is removed afterwards, so the process context stays the same as without them.
+    """
+    def run(self, message, context):
+        result = self._value(message, context)
+
+        if self.post_event:
+            post_result = self.post_event.run(message, context)[0]
+
+            if result is None:
+                result = post_result
+
+        context.pop(self.RESULT, None)
+
+        return result, self._value
+
+
+def add_post_event(process, function, values=None):
+    """
+    Puts the function before the post-events of the process events using :class:`ContextEvent`, see
+    :func:`remove_post_event`.
+
+    :param process:     process to hook.
+    :type process:      Process.
+    :param function:    function to call with the message and the context after the events.
+    :param values:      event values (process methods) to hook, all events if not specified.
+    :type values:       list.
+    """
+    for _, event in process.events:
+        if values is None or event.value in values:
+            post = ContextEvent(function)
+            post.post_event, event.post_event = event.post_event, post
+
+
+def remove_post_event(process, function):
+    """
+    Removes the function added by :func:`add_post_event` from the post-events of the process events, the other
+    post-events are kept in order.
+
+    :param process:     hooked process.
+    :type process:      Process.
+    :param function:    function to remove.
+    """
+    for _, event in process.events:
+        holder = event
+
+        while holder.post_event is not None:
+            post = holder.post_event
+
+            if isinstance(post, ContextEvent) and post.value == function:
+                holder.post_event = post.post_event
+            else:
+                holder = post
+
+
+class Breakpoint(object):
+    """
+    Breakpoint of :class:`ProcessDebugger`: when the process is going to query the element and the conditions are
+    met, the process gets the reply from the breakpoint instead of the element reply, :attr:`gt.core.Process.STOP`
+    by default. The stopped process continues with the query of the element when resumed.
+    """
+    def __init__(self, element, reply=Process.STOP, offset=None, hits=None, condition=None):
+        """
+        Creates the new breakpoint.
+
+        :param element:     element to stop at.
+        :type element:      Abstract.
+        :param reply:       reply to return to the process instead of the element.
+        :param offset:      stop only if the parsed text length is at least the offset.
+        :type offset:       int.
+        :param hits:        stop only if the element was reached with the other conditions met this number of
+         times or more.
+        :type hits:         int.
+        :param condition:   function of the process, stop only if returns True.
+        """
+        self.element, self.reply = element, reply
+        self.offset, self.hits, self.condition = offset, hits, condition
+
+        #: Number of the times the element was reached with the offset and condition met.
+        self.count = 0
+
+    def check(self, process, context):
+        """
+        Checks the breakpoint conditions, counts the hit.
+
+        :param process: process to check.
+        :type process:  Process.
+        :param context: process context.
+        :type context:  dict.
+        :returns:       True if the process should stop.
+        :rtype:         bool.
+        """
+        if self.offset is not None and context.get(ParsingProcess.PARSED_LENGTH, 0) < self.offset:
+            return False
+
+        if self.condition and not self.condition(process):
+            return False
+
+        self.count += 1
+
+        return self.hits is None or self.count >= self.hits
 
 
 class ProcessDebugger(Handler):
     """
-    Process analyzer/debugger, use to see the process logs or to emulate the reply from a certain element.
+    Process analyzer/debugger, use to see the process logs, to stop the process at a certain element or to emulate
+    the reply from it. The breakpoints and the log points are indexed by the element. The debugger hooks the process
+    events only while it has points of the kind: the queue push for the breakpoints and the query for the logs,
+    the process without points runs as if the debugger were not attached::
+
+        d = ProcessDebugger(process)
+        d.break_at(token, offset=1200)
+
+        if process(process.NEW, graph, text=text) == process.STOP:
+            print(d.stopped_at.element, process.parsed_length)
+            process()  # Continue
+
     """
     AT = 'at'
     REPLY = 'reply'
     LOG = 'log'
 
-    def __init__(self, process=None, log=False):
+    def __init__(self, process=None, log=False, stream=None):
         """
         Creates the new debugger.
 
@@ -28,11 +158,22 @@ class ProcessDebugger(Handler):
         :type process: Process.
         :param log: start logging the process queries.
         :type log: bool.
+        :param stream: writable stream for the log, :data:`sys.stdout` if not specified.
         """
         super(ProcessDebugger, self).__init__()
-        self._points = defaultdict(dict)
+
+        #: Writable stream for the log, :data:`sys.stdout` if None.
+        self.stream = stream
+
+        self._points = {}
+        self._logs = set()
+        self._log_all = False
+        self._hooks = set()
         self._process = None
 
+        #: The last breakpoint reached.
+        self.stopped_at = None
+
         self.attach(process)
 
         if log:
@@ -45,82 +186,549 @@ class ProcessDebugger(Handler):
         :param process: the process to attach.
         :type process: Process.
         """
-        if self._process == process:
+        if self._process is process:
             return
 
         elif self._process:
             self.detach()
 
-        if process:
-            self._process = process
-
-        for _, event in process.events:
-            if event.value == process.do_queue_push:
-                event.post = self.do_reply_at
-
-            elif event.value == process.do_query:
-                event.post = self.is_log
+        self._process = process
+        self.update_hooks()
 
     def detach(self):
         """
-        Detaches the debugger from the process.
+        Detaches the debugger from the process, removing all its hooks.
         """
         if self._process:
-            self._process.off_event(self)
+            for hook in self._hooks:
+                remove_post_event(self._process, hook)
+
+            self._hooks.clear()
             self._process = None
-        
+
+    def update_hooks(self):
+        """
+        Hooks the process events needed for the current points and removes the hooks not needed.
+        """
+        if not self._process:
+            return
+
+        for hook, event, needed in ((self.do_reply_at, self._process.do_queue_push, bool(self._points)),
+                                    (self.is_log, self._process.do_query, self._log_all or bool(self._logs))):
+            if needed and hook not in self._hooks:
+                add_post_event(self._process, hook, [event])
+                self._hooks.add(hook)
+
+            elif not needed and hook in self._hooks:
+                remove_post_event(self._process, hook)
+                self._hooks.remove(hook)
+
     def clear_points(self):
         """
-        Clears the reply and log hooks.
+        Clears the breakpoints, replies and logs.
         """
         self._points.clear()
+        self._logs.clear()
+        self._log_all = False
+
+        self.update_hooks()
+
+    def break_at(self, element, reply=Process.STOP, offset=None, hits=None, condition=None):
+        """
+        Adds the breakpoint, see :class:`Breakpoint` for the parameters.
+
+        :returns:   the breakpoint added.
+        :rtype:     Breakpoint.
+        """
+        point = Breakpoint(element, reply, offset, hits, condition)
+        self._points.setdefault(element, []).append(point)
+
+        self.update_hooks()
+
+        return point
+
+    def remove_point(self, point):
+        """
+        Removes the breakpoint.
+
+        :param point:   breakpoint to remove.
+        :type point:    Breakpoint.
+        """
+        points = self._points.get(point.element, [])
+
+        if point in points:
+            points.remove(point)
+
+            if not points:
+                del self._points[point.element]
+
+        self.update_hooks()
+
+    def clear_at(self, element):
+        """
+        Removes the breakpoints, replies and the log point of the element.
+
+        :param element: element to clear.
+        :type element:  Abstract.
+        """
+        self._points.pop(element, None)
+        self._logs.discard(element)
+
+        self.update_hooks()
 
     def reply_at(self, abstract, reply):
         """
-        Emulates the reply.
+        Emulates the reply, replacing the other breakpoints of the element.
 
         :param abstract: element to emulate the reply.
         :type abstract: Abstract.
         :param reply: reply to return on the process' query.
         """
-        self._points[abstract] = {ProcessDebugger.REPLY: reply}
+        self._points.pop(abstract, None)
+        self.break_at(abstract, reply)
+
+    def log_at(self, element):
+        """
+        Adds the log point: logs the queries of the element.
+
+        :param element: element to log.
+        :type element:  Abstract.
+        """
+        self._logs.add(element)
+        self.update_hooks()
 
     def show_log(self):
         """
-        Adds the show log hook to the query event.
+        Logs the queries of all elements.
         """
-        self._points[self._process] = {ProcessDebugger.LOG: True}
+        self._log_all = True
+        self.update_hooks()
 
     def hide_log(self):
         """
-        Removes the show log hook.
+        Stops logging the queries of all elements, the log points of the elements are kept.
+        """
+        self._log_all = False
+        self.update_hooks()
+
+    def do_reply_at(self, message, context):
+        """
+        Queue push post-event: returns the reply of the first breakpoint of the pushed element that is reached.
+        """
+        process = self._process
+
+        for point in self._points.get(process.current, ()):
+            if point.check(process, context):
+                self.stopped_at = point
+
+                return point.reply
+
+    def is_log(self, message, context):
+        """
+        Query post-event: writes the process' query and the element's reply on it to the log stream.
         """
-        if self._process in self._points:
-            del self._points[self._process]
+        process = self._process
+
+        if self._log_all or process.current in self._logs:
+            query = process.text + ', ' + process.query if hasattr(process, 'text') else process.query
+            (self.stream or sys.stdout).write("%s: '%s'? - '%s'\n" % (process.current, query,
+                                                                      context.get(Event.RESULT)))
+
+
+class ProcessProfiler(object):
+    """
+    Sampling profiler attributing the wall time to the graph elements. While running, the sampler thread wakes up
+    every :attr:`ProcessProfiler.interval` seconds and takes the stack of the current elements of the process
+    queue items, from the first one to :attr:`gt.core.Process.current`; the time since the previous sample goes to
+    this stack. The queue of :class:`gt.core.Process` has one item, so the stacks are the paths for the
+    :class:`gt.core.StackingProcess` and its descendants only; the item with nothing left to do is reused for the
+    last element it queries, so this element replaces its parent in the stack. The process itself is not changed,
+    so there is no cost when the profiler is not running::
 
-    def do_reply_at(self, **context):
+        profiler = ProcessProfiler(process)
+
+        with profiler:
+            process(process.NEW, graph, text=text)
+
+        print(profiler.collapsed())  # For the flame graph tools
+        print(format_table(profiler.get_top_table(10)))
+
+    With the global interpreter lock the samples are taken when the process thread switches, so the interval is
+    at least :func:`sys.getswitchinterval`.
+    """
+    #: Default sampling interval in seconds.
+    INTERVAL = 0.001
+    #: Separator of the elements in the collapsed stacks.
+    SEP = ';'
+
+    def __init__(self, process, interval=INTERVAL):
         """
-        Reply event: returns the specified reply to the process.
+        Creates the new profiler.
+
+        :param process:     process to profile.
+        :type process:      Process.
+        :param interval:    sampling interval in seconds.
+        :type interval:     float.
         """
-        process = context[self.SENDER]
-        point = self._points.get(process.current)
+        self.process = process
+        self.interval = interval
+
+        #: Collected stacks: tuples of the elements mapped to the time in seconds.
+        self.stacks = defaultdict(float)
+        #: Number of the samples taken.
+        self.samples = 0
 
-        if not point:
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """
+        Starts the sampler thread, the stacks collected before are kept.
+        """
+        if self._thread:
             return
 
-        if ProcessDebugger.REPLY in point:
-            return self._points[process.current].get(self.REPLY)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='%s sampler' % self.__class__.__name__)
+        self._thread.daemon = True
+        self._thread.start()
 
-    def is_log(self, **context):
+    def stop(self):
         """
-        Log event: prints the process' query and the element's reply on it.
+        Stops the sampler thread.
         """
-        process = context[self.SENDER]
-        point = self._points.get(process)
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
 
-        if not point:
+    def clear(self):
+        """
+        Clears the collected stacks.
+        """
+        self.stacks.clear()
+        self.samples = 0
+
+    def run(self):
+        """
+        Sampler thread loop.
+        """
+        last = default_timer()
+
+        while True:
+            stopped = self._stop.wait(self.interval)
+            now = default_timer()
+
+            self.sample(now - last)
+            last = now
+
+            if stopped or self._stop.is_set():  # Python 2 wait returns None
+                break
+
+    def sample(self, elapsed):
+        """
+        Takes the stack of the process elements and adds the elapsed time to it.
+
+        :param elapsed: time since the previous sample in seconds.
+        :type elapsed:  float.
+        """
+        stack = tuple(item.current for item in list(self.process._queue) if item.current is not None)
+
+        if stack:
+            self.stacks[stack] += elapsed
+            self.samples += 1
+
+    @staticmethod
+    def get_label(element):
+        """
+        Gets the label of the element in the stacks and tables: the name of the notions, the string of other elements.
+        """
+        return element.name if isinstance(element, Notion) else str(element)
+
+    def collapsed(self):
+        """
+        Gets the collapsed stacks for the flame graph tools: one line per stack with the labels of the elements
+        separated by :attr:`ProcessProfiler.SEP` and the time in microseconds.
+
+        :rtype: str.
+        """
+        lines = []
+
+        for stack, elapsed in self.stacks.items():
+            labels = [str(self.get_label(e)).replace(self.SEP, ',').replace('\n', ' ') for e in stack]
+            lines.append('%s %d' % (self.SEP.join(labels), round(elapsed * 1e6)))
+
+        return '\n'.join(sorted(lines))
+
+    def get_top_table(self, top=None):
+        """
+        Gets the table of the element labels with the most time spent: the self time, when the element was the
+        current one, and the total time, when the element was on the stack.
+
+        :param top:     number of the labels to include, all if not specified.
+        :type top:      int.
+        :returns:       list of rows: the header and the rows with the label, self and total time in seconds.
+        :rtype:         list.
+        """
+        own, total = defaultdict(float), defaultdict(float)
+
+        for stack, elapsed in self.stacks.items():
+            labels = [self.get_label(e) for e in stack]
+            own[labels[-1]] += elapsed
+
+            for label in set(labels):
+                total[label] += elapsed
+
+        rows = sorted(total, key=lambda label: (own[label], total[label]), reverse=True)[:top]
+
+        return [['element', 'self', 'total']] + [[label, '%.6f' % own[label], '%.6f' % total[label]]
+                                                 for label in rows]
+
+    def get_element_times(self, total=False):
+        """
+        Gets the time spent by the elements, for example, for :attr:`gt.export.DotExport.HEAT`.
+
+        :param total:   use the total time, when the element was on the stack, instead of the self time.
+        :type total:    bool.
+        :returns:       mapping of the elements to the time in seconds.
+        :rtype:         dict.
+        """
+        times = defaultdict(float)
+
+        for stack, elapsed in self.stacks.items():
+            for element in set(stack) if total else stack[-1:]:
+                times[element] += elapsed
+
+        return dict(times)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class ProcessTracer(object):
+    """
+    Process tracer, records the queries to the elements into the ring buffer of :class:`TraceRecord` items, only
+    the last :attr:`ProcessTracer.size` records are kept. While tracing, the tracer is the post-event of the process
+    events: it counts the steps and records the queries; when stopped, the events are restored, so there is no cost
+    when the tracer is not running::
+
+        tracer = ProcessTracer(process)
+
+        with tracer:
+            process(process.NEW, graph, text=text)
+
+        tracer.save_chrome_trace('parse.json')  # Open in chrome://tracing or Perfetto
+
+    The process events with the post-events are handled in the interpretive way, see
+    :meth:`gt.compiler.CompiledProcess.can_run_compiled`.
+    """
+    #: Default size of the ring buffer.
+    SIZE = 65536
+
+    def __init__(self, process, size=SIZE):
+        """
+        Creates the new tracer.
+
+        :param process: process to trace.
+        :type process:  Process.
+        :param size:    number of the records to keep.
+        :type size:     int.
+        """
+        self.process = process
+
+        #: Ring buffer of the records.
+        self.records = deque(maxlen=size)
+        #: Number of the steps handled by the process events while tracing.
+        self.steps = 0
+
+        self._tracing = False
+        self._query_event = None
+        self._stopped = None
+
+    @property
+    def size(self):
+        """
+        Size of the ring buffer (read-only).
+        """
+        return self.records.maxlen
+
+    @property
+    def tracing(self):
+        """
+        Tracing state (read-only).
+        """
+        return self._tracing
+
+    def start(self):
+        """
+        Starts the tracing: puts the tracer before the post-events of the process events, see
+        :func:`add_post_event`.
+        """
+        if self._tracing:
             return
 
-        if self.LOG in point:
-            query = process.text + ', ' + process.query if hasattr(process, 'text') else process.query
-            print("%s: '%s'? - '%s'" % (process.current, query, context.get(Event.RESULT)))
+        self._tracing, self._stopped = True, None
+        self._query_event = self.process.do_query
+
+        add_post_event(self.process, self.do_trace)
+
+    def stop(self):
+        """
+        Stops the tracing, removes the tracer from the post-events of the process events.
+        """
+        if not self._tracing:
+            return
+
+        remove_post_event(self.process, self.do_trace)
+        self._tracing, self._stopped = False, default_timer()
+
+    def clear(self):
+        """
+        Clears the records and the steps counter.
+        """
+        self.records.clear()
+        self.steps = 0
+
+    @staticmethod
+    def get_reply_kind(reply):
+        """
+        Gets the kind of the element reply: the command name or the boolean value, the class name for others.
+
+        :rtype: str.
+        """
+        if reply is None or reply is True or reply is False or is_string(reply):
+            return str(reply)
+
+        return reply.__class__.__name__
+
+    def do_trace(self, message, context):
+        """
+        Post-event of the process events: counts the step and records the query.
+
+        :param message: message of the event.
+        :type message:  list.
+        :param context: context of the event, with the event result.
+        :type context:  dict.
+        """
+        self.steps += 1
+        event = context.get(Handler.EVENT)
+
+        if event == self._query_event:
+            process, current = self.process, self.process.current
+            self.records.append(TraceRecord(self.steps, id(current), str(ProcessProfiler.get_label(current)),
+                                            str(process.query), self.get_reply_kind(context.get(Event.RESULT)),
+                                            context.get(ParsingProcess.PARSED_LENGTH, 0), len(process._queue),
+                                            default_timer()))
+
+    def get_chrome_trace(self):
+        """
+        Gets the records in Chrome trace event format: the element lasts from its query until the next query
+        of the element at the same or upper queue level, so the nested elements are shown inside their parents.
+
+        :returns:   dict with the "traceEvents" list, ready for JSON.
+        :rtype:     dict.
+        """
+        records = list(self.records)
+        if not records:
+            return {'traceEvents': []}
+
+        start = records[0].time
+        events, stack = [], []
+
+        def get_ts(time):
+            return round((time - start) * 1e6, 3)  # Microseconds
+
+        def close(index, finish):
+            events[index]['dur'] = round(finish - events[index]['ts'], 3)
+
+        for index, record in enumerate(records):
+            ts = get_ts(record.time)
+
+            while stack and records[stack[-1]].depth >= record.depth:
+                close(stack.pop(), ts)
+
+            events.append({'name': record.label, 'cat': record.query,
+                           'ph': 'X', 'pid': 1, 'tid': 1, 'ts': ts,
+                           'args': {'step': record.step, 'reply': record.reply, 'offset': record.offset,
+                                    'depth': record.depth}})
+            stack.append(index)
+
+        end = get_ts(self._stopped or records[-1].time)
+
+        while stack:
+            close(stack.pop(), end)
+
+        return {'traceEvents': events}
+
+    def save_chrome_trace(self, filename):
+        """
+        Saves the records in Chrome trace event format, see :meth:`ProcessTracer.get_chrome_trace`.
+
+        :param filename:    name of the file to write.
+        :type filename:     str.
+        """
+        with open(filename, 'w') as f:
+            json.dump(self.get_chrome_trace(), f)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def get_stats_table(stats, key=Process.QUERIES, top=None):
+    """
+    Gets the table of the element counters from the process statistics (see :attr:`gt.core.Process.stats`),
+    sorted by the counter in descending order.
+
+    :param stats:   process statistics.
+    :type stats:    dict.
+    :param key:     counter to sort by.
+    :type key:      str.
+    :param top:     number of the elements to include, all if not specified.
+    :type top:      int.
+    :returns:       list of rows: the header with the counter names and the rows with the element and its counters.
+    :rtype:         list.
+    """
+    elements = stats[Process.ELEMENTS]
+    first = (Process.QUERIES, Process.CHECKS, Process.DISPATCHES)
+    names = list(first) + sorted(set(name for counters in elements.values() for name in counters) - set(first))
+
+    rows = sorted(elements.items(), key=lambda item: item[1].get(key, 0), reverse=True)[:top]
+
+    return [['element'] + names] + [[element] + [counters.get(name, 0) for name in names] for element, counters in rows]
+
+
+def get_stats_heat(stats, key=Process.QUERIES):
+    """
+    Gets the heat map of the element counter from the process statistics for :attr:`gt.export.DotExport.HEAT`.
+
+    :param stats:   process statistics.
+    :type stats:    dict.
+    :param key:     counter to use.
+    :type key:      str.
+    :returns:       mapping of the elements to the counter values.
+    :rtype:         dict.
+    """
+    return dict((element, counters.get(key, 0)) for element, counters in stats[Process.ELEMENTS].items())
+
+
+def format_table(rows):
+    """
+    Formats the table rows as a text with the aligned columns, the first row is the header.
+
+    :param rows:    table rows, the values are converted to strings.
+    :type rows:     list.
+    :rtype:         str.
+    """
+    rows = [[str(value) for value in row] for row in rows]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))] if rows else []
+
+    return '\n'.join('  '.join(value.ljust(width) if i == 0 else value.rjust(width)
+                                for i, (value, width) in enumerate(zip(row, widths))).rstrip() for row in rows)
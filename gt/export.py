@@ -56,7 +56,7 @@ class ExportProcess(VisitorProcess):
         self._filename = ''
         self._file = None
         self._exported = {}
-        self._out = ''
+        self._out = []
 
     def start_export(self, new=True):
         """
@@ -79,7 +79,7 @@ class ExportProcess(VisitorProcess):
         if self._file:
             self._file.write(data)
         else:
-            self._out += data
+            self._out.append(data)  # Joined once, adding to the string could copy it every time
 
     def stop_export(self, finished=True):
         """
@@ -92,7 +92,7 @@ class ExportProcess(VisitorProcess):
             self._file.close()
             self._file = None
         else:
-            print(self._out)
+            print(self.out)
 
     def get_type_id(self, element):
         """
@@ -218,7 +218,7 @@ class ExportProcess(VisitorProcess):
 
         self._filename = self.context.pop(self.FILENAME) if self.FILENAME in self.context else None
         self._exported.clear()
-        self._out = ''
+        self._out = []
         self.start_export()
 
     def on_resume(self, message, context):
@@ -265,19 +265,83 @@ class ExportProcess(VisitorProcess):
         :return: export buffer, if no output file specified.
         :rtype:  str.
         """
-        return self._out
+        return ''.join(self._out)
 
 
 class DotExport(ExportProcess):
     """
     Exports the graph to the DOT language (http://en.wikipedia.org/wiki/DOT_(graph_description_language)) format.
+
+    The heat map of the runtime values, like the counters of :attr:`gt.core.Process.stats` or the times of
+    :class:`gt.debug.ProcessProfiler`, could be put over the graph using :attr:`DotExport.HEAT` start context
+    parameter: the mapping of the elements to the numbers. The elements are colored from blue to red and get the
+    wider pen as their values grow towards the maximal one, the values are added to the labels. The elements not in
+    the mapping are gray::
+
+        d = DotExport()
+        d(d.NEW, graph, file='heat.gv', heat=get_stats_heat(process.stats, Process.CHECKS))
+
     """
     EMPTY = 'empty'
     OBJECTS_ID = 'objects'
 
+    #: Heat map parameter, a part of the start context.
+    HEAT = 'heat'
+
     MAX_RELATION_LABEL = 80
     MAX_NOTION_LABEL = 20
 
+    #: Hue of the coldest and the hottest elements.
+    HEAT_HUES = (0.667, 0.0)
+    #: Color of the elements without the heat value.
+    NO_HEAT_COLOR = 'gray'
+    #: Pen width of the hottest elements, the coldest ones have 1.
+    MAX_PEN_WIDTH = 5.0
+
+    def __init__(self):
+        super(DotExport, self).__init__()
+
+        self._heat, self._heat_max = None, 0
+
+    def set_heat(self, heat):
+        """
+        Sets the heat map for the export, finds the maximal value once so the export stays linear.
+
+        :param heat:    mapping of the elements to the numbers or None to export without the heat.
+        :type heat:     dict.
+        """
+        self._heat = heat
+        self._heat_max = max(heat.values()) if heat else 0
+
+    def get_heat_attributes(self, element, attributes):
+        """
+        Puts the heat of the element to its DOT attributes: the color, pen width and the label.
+
+        :param element:     exported element.
+        :type element:      Element.
+        :param attributes:  DOT attributes of the element, the label should be quoted.
+        :type attributes:   dict.
+        :return:            updated attributes.
+        :rtype:             dict.
+        """
+        if self._heat is None:
+            return attributes
+
+        value = self._heat.get(element)
+
+        if value is None:
+            attributes['color'] = self.NO_HEAT_COLOR
+            return attributes
+
+        ratio = float(value) / self._heat_max if self._heat_max > 0 else 0.0
+        cold, hot = self.HEAT_HUES
+
+        attributes['color'] = '"%.3f 1.000 1.000"' % (cold + (hot - cold) * ratio)
+        attributes['penwidth'] = '%.1f' % (1 + (self.MAX_PEN_WIDTH - 1) * ratio)
+        attributes['label'] = '%s\\n%g"' % (attributes['label'][:-1], value)
+
+        return attributes
+
     def write_data(self, data):
         super(DotExport, self).write_data(data + '\n')
 
@@ -368,21 +432,24 @@ class DotExport(ExportProcess):
         return 'digraph %s {' % self.get_element_id(graph)
 
     def export_notion(self, notion):
-        return self.get_dot_string(self.get_element_id(notion),
-                                   label='"%s"' % get_printable(notion.name, True),
-                                   shape='doublecircle' if isinstance(notion, SelectiveNotion) else 'circle',
-                                   color='red' if isinstance(notion, ActionNotion) else 'black',
-                                   max_len=self.MAX_NOTION_LABEL)
+        attributes = dict(label='"%s"' % get_printable(notion.name, True),
+                          shape='doublecircle' if isinstance(notion, SelectiveNotion) else 'circle',
+                          color='red' if isinstance(notion, ActionNotion) else 'black',
+                          max_len=self.MAX_NOTION_LABEL)
+
+        return self.get_dot_string(self.get_element_id(notion), **self.get_heat_attributes(notion, attributes))
 
     def export_relation(self, relation):
+        attributes = dict(label='"%s"' % self.get_condition_string(relation),
+                          color='red' if isinstance(relation, ActionRelation) else 'black',
+                          style='"bold"' if (isinstance(relation.subject, SelectiveNotion) and
+                                             relation.subject.default == relation) else '""',
+                          max_len=self.MAX_RELATION_LABEL,
+                          fontcolor='blue')
+
         return self.get_dot_string('%s -> %s' % (self.get_element_id(relation.subject),
                                                  self.get_element_id(relation.object)),
-                                   label='"%s"' % self.get_condition_string(relation),
-                                   color='red' if isinstance(relation, ActionRelation) else 'black',
-                                   style='"bold"' if (isinstance(relation.subject, SelectiveNotion) and
-                                                      relation.subject.default == relation) else '""',
-                                   max_len=self.MAX_RELATION_LABEL,
-                                   fontcolor='blue')
+                                   **self.get_heat_attributes(relation, attributes))
 
     def export_empty(self, counter):
         """
@@ -405,6 +472,14 @@ class DotExport(ExportProcess):
         """
         return self.get_dot_string(name, color='red', shape='"rect"')
 
+    def on_new(self, message, context):
+        """
+        In addition to :meth:`ExportProcess.on_new` gets the heat map from :attr:`DotExport.HEAT` context parameter.
+        """
+        super(DotExport, self).on_new(message, context)
+
+        self.set_heat(self.context.pop(self.HEAT, None))
+
     def stop_export(self, finished=True):
         """
         When finished dumps empty and non-graph objects and puts the closing bracket.
@@ -0,0 +1,132 @@
+"""
+.. module:: gt.pickling
+   :platform: Unix, Windows
+   :synopsis: Graph-talk graphs pickling
+
+.. moduleauthor:: Stas Kravets (krvss) <stas.kravets@gmail.com>
+
+"""
+
+import pickle
+import sys
+import types
+
+from io import BytesIO
+
+from gt.core import *
+
+#: Objects pickled by their names, see :func:`register`.
+REGISTRY = {}
+
+
+def register(name, value):
+    """
+    Registers the object to be pickled by name, for example, the function that cannot be imported. The methods of
+    the registered object are pickled by the object name too. The object with the same name should be registered
+    in the process that unpickles the graph.
+
+    :param name:    name of the object, unique within the registry.
+    :type name:     str.
+    :param value:   object to register.
+    :returns:       the object itself, so it could be registered in place.
+    """
+    REGISTRY[name] = value
+    return value
+
+
+def unregister(name):
+    """
+    Removes the object from the registry.
+
+    :param name:    name of the object.
+    :type name:     str.
+    """
+    REGISTRY.pop(name, None)
+
+
+class GraphPickler(pickle.Pickler):
+    """
+    Pickler that saves the registered objects by their names. Graph elements save their structure only, see
+    :meth:`Element.__reduce__`, conditions save their values and options, see :meth:`Condition.__reduce__`.
+    """
+    if sys.version_info[0] < 3:  # Bound methods are pickled by their owner and name, like in Python 3
+        dispatch = dict(pickle.Pickler.dispatch)
+
+        def save_method(self, method):
+            self.save_reduce(getattr, (method.__self__, method.__func__.__name__), obj=method)
+
+        dispatch[types.MethodType] = save_method
+
+    def __init__(self, file, protocol=pickle.HIGHEST_PROTOCOL, registry=None):
+        """
+        Creates the new pickler.
+
+        :param file:        file to write into.
+        :param protocol:    pickle protocol.
+        :type protocol:     int.
+        :param registry:    additional named objects, used along with :data:`REGISTRY`.
+        :type registry:     dict.
+        """
+        pickle.Pickler.__init__(self, file, protocol)
+
+        self.registry = dict(REGISTRY, **(registry or {}))
+        self._names = dict((id(v), k) for k, v in self.registry.items())
+
+    def persistent_id(self, obj):
+        name = self._names.get(id(obj))
+
+        if name is not None and self.registry[name] is obj:
+            return name
+
+
+class GraphUnpickler(pickle.Unpickler):
+    """
+    Unpickler that gets the objects saved by :class:`GraphPickler` by their names from the registry.
+    """
+    def __init__(self, file, registry=None):
+        """
+        Creates the new unpickler.
+
+        :param file:        file to read from.
+        :param registry:    additional named objects, used along with :data:`REGISTRY`.
+        :type registry:     dict.
+        """
+        pickle.Unpickler.__init__(self, file)
+        self.registry = dict(REGISTRY, **(registry or {}))
+
+    def persistent_load(self, name):
+        if name not in self.registry:
+            raise pickle.UnpicklingError('Object %s is not registered' % name)
+
+        return self.registry[name]
+
+
+def dumps(obj, registry=None, protocol=pickle.HIGHEST_PROTOCOL):
+    """
+    Pickles the graph (or any object with graph elements) using :class:`GraphPickler`.
+
+    :param obj:         object to pickle.
+    :param registry:    additional named objects.
+    :type registry:     dict.
+    :param protocol:    pickle protocol.
+    :type protocol:     int.
+    :returns:           pickled data.
+    :rtype:             bytes.
+    """
+    f = BytesIO()
+    GraphPickler(f, protocol, registry).dump(obj)
+
+    return f.getvalue()
+
+
+def loads(data, registry=None):
+    """
+    Unpickles the data from :func:`dumps` using :class:`GraphUnpickler`.
+
+    :param data:        pickled data.
+    :type data:         bytes.
+    :param registry:    additional named objects, should contain the objects with the same names as when pickling.
+    :type registry:     dict.
+    :returns:           unpickled object.
+    """
+    return GraphUnpickler(BytesIO(data), registry).load()
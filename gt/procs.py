@@ -7,7 +7,17 @@
 
 """
 
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+except ImportError:  # Python 2 without the futures package
+    ProcessPoolExecutor = as_completed = None
+
 from gt.core import *
+from gt.compiler import CompiledProcess
+from gt.pickling import dumps, loads
 
 
 class FileProcessor(Process):
@@ -16,18 +26,63 @@ class FileProcessor(Process):
     """
     FILENAME = 'filename'
 
-    def __init__(self, name):
+    def __init__(self, name, compiled=False, streaming=False, graph=None):
+        """
+        Creates the new file processor.
+
+        :param name:        name of the graph.
+        :type name:         str.
+        :param compiled:    use :class:`gt.compiler.CompiledProcess` as a parser, the graph will be compiled after
+          it is built.
+        :type compiled:     bool.
+        :param streaming:   read the files by chunks of :attr:`ParsingProcess.CHUNK_SIZE` instead of the whole
+          content, see the streaming mode of :class:`ParsingProcess`.
+        :type streaming:    bool.
+        :param graph:       the graph pickled by :meth:`FileProcessor.dump_graph` to be used instead of building
+          the new one.
+        :type graph:        bytes.
+        """
         super(FileProcessor, self).__init__()
-        self.parser = ParsingProcess()
+        self.parser = CompiledProcess() if compiled else ParsingProcess()
         self.builder = GraphBuilder(name)
 
         self.filename = None
+        self.streaming = streaming
 
-        self.build_graph()
+        if graph:
+            self.load_graph(graph)
+        else:
+            self.build_graph()
+
+        if compiled:
+            self.parser.compile(self.builder.graph)
 
     def build_graph(self):
         pass
 
+    def dump_graph(self):
+        """
+        Pickles the graph to be loaded by another processor of the same class, for example, in a worker process.
+        The methods of the processor used as actions or conditions are pickled by the graph name.
+
+        :returns:   pickled graph.
+        :rtype:     bytes.
+        """
+        return dumps([self.builder.graph, self.context], {self.builder.graph.name: self})
+
+    def load_graph(self, data):
+        """
+        Loads the graph pickled by :meth:`FileProcessor.dump_graph`, the methods of the graph owner are bound to
+        this processor.
+
+        :param data:    pickled graph.
+        :type data:     bytes.
+        """
+        graph, context = loads(data, {self.builder.graph.name: self})
+
+        self.builder = GraphBuilder(graph)
+        self.context.update(context)
+
     def parser_call(self, message=None, context=None):
         """
         Call the parser with specified message and context; default values is graph root and self context
@@ -40,7 +95,8 @@ class FileProcessor(Process):
         Process the new file
         """
         self.filename = message[0].pop(self.FILENAME)
-        message[0][self.parser.TEXT] = get_content(self.filename)
+        message[0][self.parser.TEXT] = get_chunks(self.filename, self.parser.CHUNK_SIZE) if self.streaming \
+            else get_content(self.filename)
 
     def on_text(self, *message):
         self.context[self.parser.TEXT] = message[0].pop(self.parser.TEXT)
@@ -74,3 +130,191 @@ class FileProcessor(Process):
             result = self.parser.handle(message, context)
 
         return self.get_reply(result[0]), result[1], result[2]
+
+
+class ProcessPool(object):
+    """
+    Pool of the parsing processes for the graph: hands out the reset processes ready to parse, the released ones
+    are reused instead of creating the new processes for each text::
+
+        pool = ProcessPool(graph)
+
+        with pool.process() as process:
+            process(graph, text='...')
+    """
+    def __init__(self, graph, size=16, factory=ParsingProcess, **options):
+        """
+        Creates the new process pool.
+
+        :param graph:   graph to parse with, the processes with the compile method (like
+          :class:`gt.compiler.CompiledProcess`) compile it when created.
+        :param size:    maximal number of the free processes to keep.
+        :type size:     int.
+        :param factory: process class or function to create the new process.
+        :param options: process creation options, e.g. cursor or persistent.
+        """
+        self.graph = graph
+        self.size = size
+        self.factory = factory
+        self.options = options
+
+        self._free = []
+
+    def acquire(self):
+        """
+        Gets the free process or creates the new one.
+
+        :returns:   process ready to parse.
+        :rtype:     ParsingProcess.
+        """
+        try:
+            return self._free.pop()  # Atomic, so the pool could be shared by threads
+        except IndexError:
+            pass
+
+        process = self.factory(**self.options)
+
+        if hasattr(process, 'compile'):
+            process.compile(self.graph)
+
+        return process
+
+    def release(self, process):
+        """
+        Resets the process, so it does not keep the last context, and returns it to the pool if the pool is not full.
+
+        :param process: process got from :meth:`ProcessPool.acquire`.
+        :type process:  ParsingProcess.
+        """
+        process(process.NEW)
+
+        if len(self._free) < self.size:
+            self._free.append(process)
+
+    @contextmanager
+    def process(self):
+        """
+        Context manager to acquire the process and release it when done.
+        """
+        process = self.acquire()
+
+        try:
+            yield process
+        finally:
+            self.release(process)
+
+    def __len__(self):
+        return len(self._free)
+
+
+#: Batch item result: the item position, the item itself, the processor reply and the error, if any.
+BatchResult = namedtuple('BatchResult', 'index item result error')
+
+_batch_processors = {}
+
+
+def get_batch_processor(processor_class, args, kwargs):
+    """
+    Gets the processor of the worker, the processor (and its graph) is created once per worker.
+    """
+    key = processor_class, args, tuple(sorted(kwargs.items()))
+    processor = _batch_processors.get(key)
+
+    if processor is None:
+        processor = _batch_processors[key] = processor_class(*args, **kwargs)
+
+    return processor
+
+
+def process_chunk(processor_class, args, kwargs, key, chunk):
+    """
+    Processes the chunk of the batch items one by one, the errors are caught for each item.
+
+    :returns:   list of :class:`BatchResult`.
+    :rtype:     list.
+    """
+    processor, results = get_batch_processor(processor_class, args, kwargs), []
+
+    for index, item in chunk:
+        try:
+            results.append(BatchResult(index, item, processor(processor.NEW, {key: item}), None))
+
+        except Exception as e:
+            results.append(BatchResult(index, item, None, e))
+
+    return results
+
+
+def process_batch(processor_class, items, texts=False, workers=None, chunk_size=1, ordered=True, args=(),
+                  kwargs=None):
+    """
+    Processes the files or texts with the :class:`FileProcessor` subclass in parallel, using the
+    :class:`concurrent.futures.ProcessPoolExecutor`. Each worker creates the processor once and processes the
+    chunks of items, the error of an item does not stop the others::
+
+        for r in process_batch(CoolLexer, filenames, workers=4, chunk_size=16):
+            print(r.error or r.result)
+
+    :param processor_class:     :class:`FileProcessor` subclass, should be importable by the workers.
+    :param items:               iterable of the filenames or texts.
+    :param texts:               items are texts, not filenames.
+    :type texts:                bool.
+    :param workers:             number of the worker processes, the number of CPUs by default; 0 processes the items
+      in the current process.
+    :type workers:              int.
+    :param chunk_size:          number of items sent to a worker at once.
+    :type chunk_size:           int.
+    :param ordered:             yield the results in the order of the items or as they are completed.
+    :type ordered:              bool.
+    :param args:                processor creation arguments.
+    :type args:                 tuple.
+    :param kwargs:              processor creation keyword arguments.
+    :type kwargs:               dict.
+    :returns:                   generator of :class:`BatchResult`, closing it before the end cancels the pending
+      chunks.
+    """
+    key = ParsingProcess.TEXT if texts else FileProcessor.FILENAME
+    args, kwargs = tuple(args), kwargs or {}
+    chunks, chunk = [], []
+
+    for indexed_item in enumerate(items):
+        chunk.append(indexed_item)
+
+        if len(chunk) >= chunk_size:
+            chunks.append(chunk)
+            chunk = []
+
+    if chunk:
+        chunks.append(chunk)
+
+    if workers == 0:
+        for chunk in chunks:
+            for result in process_chunk(processor_class, args, kwargs, key, chunk):
+                yield result
+
+        return
+
+    if ProcessPoolExecutor is None:
+        raise ImportError('concurrent.futures is required to process in parallel, use the futures package')
+
+    executor, futures = ProcessPoolExecutor(workers), []
+
+    try:
+        futures.extend(executor.submit(process_chunk, processor_class, args, kwargs, key, chunk) for chunk in chunks)
+        future_chunks = dict(zip(futures, chunks))
+
+        for future in (futures if ordered else as_completed(futures)):
+            try:
+                results = future.result()
+
+            except Exception as e:  # Whole chunk failed, e.g. the result cannot be pickled
+                results = [BatchResult(index, item, None, e) for index, item in future_chunks[future]]
+
+            for result in results:
+                yield result
+
+    finally:  # The consumer could stop early, the pending chunks are cancelled instead of waiting for them
+        for future in futures:
+            future.cancel()
+
+        executor.shutdown(wait=False)
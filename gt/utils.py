@@ -7,23 +7,56 @@
 
 """
 
+import re
 import sys
 import string
 
+from collections import deque, namedtuple
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+_REGEX_TYPE = type(re.compile(''))
+
+#: Function arguments specification, like the one of Python 2 :func:`inspect.getargspec`.
+ArgSpec = namedtuple('ArgSpec', 'args varargs keywords defaults')
+
 if sys.version > '3':
+    from inspect import getfullargspec
+
     long = int
     basestring = str
 
+    def get_argspec(func):
+        spec = getfullargspec(func)
+        return ArgSpec(spec.args, spec.varargs, spec.varkw, spec.defaults)
+
     def get_content(filename):
         with open(filename, 'r', newline='') as f:
             return f.read()
 
+    def get_chunks(filename, size):
+        with open(filename, 'r', newline='') as f:
+            for chunk in iter(lambda: f.read(size), ''):
+                yield chunk
+
 else:
+    from inspect import getargspec
+
+    def get_argspec(func):
+        return ArgSpec(*getargspec(func))
 
     def get_content(filename):
         with open(filename) as f:
             return f.read()
 
+    def get_chunks(filename, size):
+        with open(filename) as f:
+            for chunk in iter(lambda: f.read(size), ''):
+                yield chunk
+
 
 class DictChangeOperation(object):
     """
@@ -178,6 +211,450 @@ class NotifyList(list):
     pop = _wrap(list.pop)
 
 
+class TextCursor(object):
+    """
+    Read-only view of the text buffer starting at the position. Behaves like the remaining text string
+    (length, comparison, slicing, common string methods) but moving the cursor does not copy the buffer
+    """
+    __slots__ = ['buffer', 'position']
+
+    def __init__(self, buffer, position=0):
+        self.buffer, self.position = buffer, position
+
+    def advance(self, distance):
+        return TextCursor(self.buffer, self.position + distance)
+
+    def value(self):
+        return self.buffer[self.position:] if self.position else self.buffer
+
+    def startswith(self, prefix, start=0):
+        return self.buffer.startswith(prefix, self.position + start)
+
+    def find(self, sub, start=0):
+        pos = self.buffer.find(sub, self.position + start)
+        return pos - self.position if pos >= 0 else pos
+
+    def __len__(self):
+        return len(self.buffer) - self.position
+
+    def __bool__(self):
+        return self.position < len(self.buffer)
+
+    __nonzero__ = __bool__
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                return self.value()[key]  # The bounds of the reversed slices cannot be shifted
+
+            start, stop, _ = key.indices(len(self))
+            return self.buffer[self.position + start:self.position + stop]
+
+        if key < 0:
+            key += len(self)
+
+        if key < 0:
+            raise IndexError(key)
+
+        return self.buffer[self.position + key]
+
+    def __contains__(self, item):
+        return self.buffer.find(item, self.position) >= 0
+
+    def __iter__(self):
+        return iter(self.value())
+
+    def __eq__(self, other):
+        if isinstance(other, TextCursor):
+            other = other.value()
+
+        if not is_string(other):
+            return False
+
+        return len(other) == len(self) and self.buffer.startswith(other, self.position)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.value())
+
+    def __add__(self, other):
+        return self.value() + other
+
+    def __radd__(self, other):
+        return other + self.value()
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name in TextCursor.__slots__:
+            raise AttributeError(name)
+
+        return getattr(self.value(), name)  # Other string methods work with the materialized text
+
+    def __str__(self):
+        return str(self.value())
+
+    def __repr__(self):
+        return repr(self.value())
+
+
+class MessageDeque(deque):
+    """
+    Deque with the list-style pop(index) and slice deletion, so the message items are removed from the front in O(1).
+    It is equal to the list with the same items and could be concatenated with lists, giving a list
+    """
+    __slots__ = []
+
+    __hash__ = None
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            return list(self) == other
+
+        return deque.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __add__(self, other):
+        if isinstance(other, list):
+            return list(self) + other
+
+        return deque.__add__(self, other) if hasattr(deque, '__add__') else NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, list):
+            return other + list(self)
+
+        return NotImplemented
+
+    def pop(self, index=-1):
+        if index == 0:
+            return self.popleft()
+
+        elif index == -1:
+            return deque.pop(self)
+
+        value = self[index]
+        del self[index]
+
+        return value
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return list(self)[key]
+
+        return deque.__getitem__(self, key)
+
+    def __delitem__(self, key):
+        if isinstance(key, slice):
+            items = list(self)
+            del items[key]
+
+            self.clear()
+            self.extend(items)
+        else:
+            deque.__delitem__(self, key)
+
+
+class Trie(object):
+    """
+    Prefix tree of strings with values attached, finds all the stored strings the text starts with in a single scan
+    """
+    __slots__ = ['root']
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, key, value):
+        node = self.root
+        for c in key:
+            node = node.setdefault(c, {})
+
+        node.setdefault(None, []).append(value)
+
+    def match(self, text, start=0, fold=False):
+        """
+        Returns the list of (length, values) for the stored strings the text starts with from the start position,
+        the shortest first. If fold is True, the text characters are upper-cased; if some character changes its
+        length when upper-cased the result is None, because the lengths would not be comparable.
+        """
+        node, found = self.root, []
+        i, end = start, len(text)
+
+        while True:
+            if None in node:
+                found.append((i - start, node[None]))
+
+            if i >= end:
+                break
+
+            c = text[i]
+            if fold:
+                c = c.upper()
+
+                if len(c) != 1:
+                    return None
+
+            node = node.get(c)
+            if node is None:
+                break
+
+            i += 1
+
+        return found
+
+    def __bool__(self):
+        return bool(self.root)
+
+    __nonzero__ = __bool__
+
+
+class _HashNode(object):
+    """
+    Node of the :class:`PersistentDict` trie: the bitmap of the used slots and the tuple of entries, every entry is
+    either a (key, value) pair or a child node. The node with zero bitmap keeps the pairs with the same hash
+    """
+    __slots__ = ['bitmap', 'entries']
+
+    def __init__(self, bitmap, entries):
+        self.bitmap, self.entries = bitmap, entries
+
+
+class PersistentDict(MutableMapping):
+    """
+    Mutable mapping over the persistent hash array mapped trie. The nodes are never changed, the change of a key
+    copies only the nodes on the way to it, so the whole content can be saved with :meth:`PersistentDict.snapshot`
+    and brought back with :meth:`PersistentDict.restore` in O(1) regardless of the number of changes in between
+    """
+    __slots__ = ['_root', '_size']
+
+    #: Number of hash bits used by the trie level.
+    LEVEL_BITS = 5
+    #: Mask of the slot index at the trie level.
+    SLOT_MASK = (1 << LEVEL_BITS) - 1
+    #: Number of the hash bits used, keys with equal bits are kept in the collision nodes.
+    HASH_BITS = 64
+    #: Mask of the used hash bits.
+    HASH_MASK = (1 << HASH_BITS) - 1
+
+    def __init__(self, *args, **kwargs):
+        self._root, self._size = None, 0
+        self.update(*args, **kwargs)
+
+    def _find(self, key, default):
+        node = self._root
+        if node is None:
+            return default
+
+        h, mask, bits = hash(key) & self.HASH_MASK, self.SLOT_MASK, self.LEVEL_BITS
+
+        while True:
+            bitmap = node.bitmap
+
+            if not bitmap:
+                for k, v in node.entries:
+                    if k is key or k == key:
+                        return v
+
+                return default
+
+            bit = 1 << (h & mask)
+            if not bitmap & bit:
+                return default
+
+            entry = node.entries[bin(bitmap & (bit - 1)).count('1')]
+
+            if entry.__class__ is _HashNode:
+                node, h = entry, h >> bits
+
+            elif entry[0] is key or entry[0] == key:
+                return entry[1]
+
+            else:
+                return default
+
+    def _pair(self, shift, h1, e1, h2, e2):
+        if shift >= self.HASH_BITS:
+            return _HashNode(0, (e1, e2))
+
+        i1, i2 = (h1 >> shift) & self.SLOT_MASK, (h2 >> shift) & self.SLOT_MASK
+
+        if i1 == i2:
+            return _HashNode(1 << i1, (self._pair(shift + self.LEVEL_BITS, h1, e1, h2, e2), ))
+
+        return _HashNode((1 << i1) | (1 << i2), (e1, e2) if i1 < i2 else (e2, e1))
+
+    def _assoc(self, node, shift, h, key, value):
+        """
+        Returns the tuple of (new node, key added flag), the node itself if nothing is changed.
+        """
+        entries = node.entries
+
+        if not node.bitmap:
+            for i, (k, v) in enumerate(entries):
+                if k is key or k == key:
+                    if v is value:
+                        return node, False
+
+                    return _HashNode(0, entries[:i] + ((k, value), ) + entries[i + 1:]), False
+
+            return _HashNode(0, entries + ((key, value), )), True
+
+        bit = 1 << ((h >> shift) & self.SLOT_MASK)
+        index = bin(node.bitmap & (bit - 1)).count('1')
+
+        if not node.bitmap & bit:
+            return _HashNode(node.bitmap | bit, entries[:index] + ((key, value), ) + entries[index:]), True
+
+        entry = entries[index]
+
+        if entry.__class__ is _HashNode:
+            child, added = self._assoc(entry, shift + self.LEVEL_BITS, h, key, value)
+
+            if child is entry:
+                return node, False
+
+        elif entry[0] is key or entry[0] == key:
+            if entry[1] is value:
+                return node, False
+
+            child, added = (entry[0], value), False
+
+        else:
+            child = self._pair(shift + self.LEVEL_BITS, hash(entry[0]) & self.HASH_MASK, entry, h, (key, value))
+            added = True
+
+        return _HashNode(node.bitmap, entries[:index] + (child, ) + entries[index + 1:]), added
+
+    def _dissoc(self, node, shift, h, key):
+        """
+        Returns the new node without the key, the single pair left or None if nothing is left.
+        """
+        entries = node.entries
+
+        if not node.bitmap:
+            for i, (k, v) in enumerate(entries):
+                if k is key or k == key:
+                    entries = entries[:i] + entries[i + 1:]
+                    return entries[0] if len(entries) == 1 else _HashNode(0, entries)
+
+            raise KeyError(key)
+
+        bit = 1 << ((h >> shift) & self.SLOT_MASK)
+        if not node.bitmap & bit:
+            raise KeyError(key)
+
+        index = bin(node.bitmap & (bit - 1)).count('1')
+        entry = entries[index]
+
+        if entry.__class__ is _HashNode:
+            child = self._dissoc(entry, shift + self.LEVEL_BITS, h, key)
+
+        elif entry[0] is key or entry[0] == key:
+            child = None
+
+        else:
+            raise KeyError(key)
+
+        if child is None:
+            entries = entries[:index] + entries[index + 1:]
+
+            if not entries:
+                return None
+
+            if len(entries) == 1 and entries[0].__class__ is not _HashNode:
+                return entries[0]  # The single pair goes up to the parent
+
+            return _HashNode(node.bitmap & ~bit, entries)
+
+        if len(entries) == 1 and child.__class__ is not _HashNode:
+            return child
+
+        return _HashNode(node.bitmap, entries[:index] + (child, ) + entries[index + 1:])
+
+    def _pairs(self, node):
+        for entry in node.entries:
+            if entry.__class__ is _HashNode:
+                for pair in self._pairs(entry):
+                    yield pair
+            else:
+                yield entry
+
+    def snapshot(self):
+        """
+        Gets the current content to be restored later, does not copy anything.
+
+        :returns:   opaque snapshot object.
+        """
+        return self._root, self._size
+
+    def restore(self, snapshot):
+        """
+        Brings back the content saved by :meth:`PersistentDict.snapshot`.
+
+        :param snapshot:    snapshot to restore.
+        """
+        self._root, self._size = snapshot
+
+    def copy(self):
+        copy = PersistentDict()
+        copy.restore(self.snapshot())
+
+        return copy
+
+    def get(self, key, default=None):
+        return self._find(key, default)
+
+    def clear(self):
+        self._root, self._size = None, 0
+
+    def __getitem__(self, key):
+        value = self._find(key, _HashNode)
+
+        if value is _HashNode:
+            raise KeyError(key)
+
+        return value
+
+    def __contains__(self, key):
+        return self._find(key, _HashNode) is not _HashNode
+
+    def __setitem__(self, key, value):
+        h = hash(key) & self.HASH_MASK
+
+        if self._root is None:
+            self._root, self._size = _HashNode(1 << (h & self.SLOT_MASK), ((key, value), )), 1
+        else:
+            self._root, added = self._assoc(self._root, 0, h, key, value)
+
+            if added:
+                self._size += 1
+
+    def __delitem__(self, key):
+        if self._root is None:
+            raise KeyError(key)
+
+        root = self._dissoc(self._root, 0, hash(key) & self.HASH_MASK, key)
+
+        if root is not None and root.__class__ is not _HashNode:
+            root = _HashNode(1 << (hash(root[0]) & self.SLOT_MASK), (root, ))
+
+        self._root = root
+        self._size -= 1
+
+    def __iter__(self):
+        if self._root is not None:
+            for pair in self._pairs(self._root):
+                yield pair[0]
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, dict(self))
+
+
 # Utility functions #
 def is_number(n):
     return type(n) in (int, long)
@@ -188,13 +665,20 @@ def is_list(l):
 
 
 def is_regex(r):
-    return type(r).__name__ == 'SRE_Pattern'
+    return isinstance(r, _REGEX_TYPE)
 
 
 def is_string(s):
     return isinstance(s, basestring)
 
 
+def is_stream(s):
+    if is_string(s) or s.__class__ is TextCursor:
+        return False
+
+    return hasattr(s, 'read') or hasattr(s, '__next__') or hasattr(s, 'next')
+
+
 def has_first(l, value):
     return l and l[0] == value
 
@@ -223,6 +707,15 @@ def tupled(*args):
     return res
 
 
+def sort_as(items, order):
+    index = dict((id(item), i) for i, item in enumerate(order))
+    items.sort(key=lambda item: index.get(id(item), len(index)))  # Not in the order go last
+
+
+def get_function(f):
+    return getattr(f, '__func__', f)
+
+
 def get_object_name(obj):
     return obj.__name__ if hasattr(obj, '__name__') else str(obj)
 
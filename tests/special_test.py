@@ -9,9 +9,15 @@
 
 import datetime
 import glob
+import os
+import sys
+import threading
+import time
 
 from examples.cool_lexer import *
 from gt.debug import *
+from gt.export import DotExport
+from gt.procs import ProcessPool, process_batch
 
 
 class Timer(object):
@@ -177,6 +183,613 @@ class CoolGradingTest(SpecialTest):
                 print(' ok, ' + str(t.delta()))
 
 
+class LinearEventIndex(EventIndex):
+    """
+    Event index that does no indexing, checks all the events like a linear scan
+    """
+    layout = None
+
+    def __init__(self, events=(), layout=None):
+        self.events = tuple(events)
+
+    def candidates(self, message):
+        return self.events
+
+
+class CommandProcess(Process):
+    """
+    Process with a lot of string commands, like hot handlers with many literal conditions
+    """
+    COMMANDS = tuple(sorted(TOKEN_DICT.keys())) + SINGLE_CHAR_OP
+
+    def __init__(self):
+        self.counter = 0
+        super(CommandProcess, self).__init__()
+
+    def do_command(self):
+        self.message.pop(0)
+        self.counter += 1
+
+    def setup_events(self):
+        super(CommandProcess, self).setup_events()
+
+        for command in self.COMMANDS:
+            self.on(command, self.do_command, Condition.STRING)
+
+
+class DispatchTest(SpecialTest):
+    """
+    Process.handle dispatch benchmark: indexed events vs the linear scan of all active events
+    """
+    def setup(self):
+        commands = CommandProcess.COMMANDS
+        self.info.setdefault('message', [commands[i % len(commands)] for i in range(self.info.get('steps', 5000))])
+
+    def handle(self):
+        process = CommandProcess()
+        t = Timer()
+        process(*self.info['message'])
+
+        return process.counter, t.delta()
+
+    def run(self):
+        import gt.core
+
+        indexed, t_indexed = self.handle()
+
+        try:
+            gt.core.EventIndex = LinearEventIndex
+            linear, t_linear = self.handle()
+        finally:
+            gt.core.EventIndex = EventIndex
+
+        assert indexed == linear == len(self.info['message'])
+
+        print('Linear: %s, indexed: %s, speedup: %.2f' % (t_linear, t_indexed,
+                                                        t_linear.total_seconds() / t_indexed.total_seconds()))
+
+
+class QueueTest(SpecialTest):
+    """
+    Process.handle per-step overhead: queue pushes, queries and pops for messages of the growing length
+    """
+    def run(self):
+        notion = ActionNotion('action', True)
+
+        for length in self.info.get('lengths', (1000, 10000, 50000)):
+            process = Process()
+            message = [notion] * length
+
+            t = Timer()
+            process(*message)
+            delta = t.delta()
+
+            print('%s items: %s, %.2f us per item' % (length, delta, delta.total_seconds() * 1e6 / length))
+
+
+class BacktrackingTest(SpecialTest):
+    """
+    Backtracking benchmark: undo log vs persistent context on a grammar with many tied cases, only the last one fits
+    """
+    def setup(self):
+        cases, length = self.info.get('cases', 50), self.info.get('length', 50)
+
+        root = SelectiveNotion('root')
+        count = ActionNotion('count', lambda **c: {SharedProcess.UPDATE_CONTEXT: {'count': c.get('count', 0) + 1}})
+
+        for i in range(cases):
+            case = ComplexNotion('case %s' % i)
+            NextRelation(root, case)
+
+            for j in range(length):
+                ParsingRelation(case, count, 'a')
+
+            ParsingRelation(case, ActionNotion('end', None), '<%s>' % i)
+
+        self.info['graph'] = root
+        self.info['text'] = 'a' * length + '<%s>' % (cases - 1)
+
+    def handle(self, persistent):
+        process = ParsingProcess(persistent=persistent)
+        t = Timer()
+        result = process(self.info['graph'], text=self.info['text'])
+
+        return (result, process.parsed_length, process.context.get('count')), t.delta()
+
+    def run(self):
+        undo, t_undo = self.handle(False)
+        persistent, t_persistent = self.handle(True)
+
+        assert undo == persistent and undo[1] == len(self.info['text'])
+
+        print('Undo log: %s, persistent: %s, speedup: %.2f' % (t_undo, t_persistent,
+                                                               t_undo.total_seconds() / t_persistent.total_seconds()))
+
+
+class KwargsAccess(Access):
+    """
+    Access that binds the function arguments looking the context up on every call, like a generic binder
+    """
+    def call_general(self, message, context):
+        i, args = len(self._spec.defaults) - 1 if self._spec.defaults else -1, {}
+        for arg in reversed(self._spec.args):
+            if arg != 'self':
+                args[arg] = context[arg] if arg in context else self._spec.defaults[i] if i >= 0 else None
+                i -= 1
+
+        return self._value(**args)
+
+
+class BinderTest(SpecialTest):
+    """
+    Action invocation benchmark: precompiled argument binders vs the generic per-call binding
+    """
+    def run(self):
+        calls = self.info.get('calls', 100000)
+        context = {'line_no': 1, 'last_parsed': 'class', 'text': '', 'state': {}}
+        actions = (lambda last_parsed: last_parsed,
+                   lambda line_no, last_parsed: last_parsed,
+                   lambda line_no, last_parsed, token=None: token or last_parsed)
+
+        for action in actions:
+            results, deltas = [], []
+
+            for access in (KwargsAccess(action), Access(action)):
+                t = Timer()
+                for _ in range(calls):
+                    result = access(**context)
+
+                results.append(result)
+                deltas.append(t.delta())
+
+            assert results[0] == results[1]
+
+            print('%s args, generic: %s, binder: %s, speedup: %.2f' %
+                  (len(access.spec.args), deltas[0], deltas[1], deltas[0].total_seconds() / deltas[1].total_seconds()))
+
+
+class CreateParseTest(SpecialTest):
+    """
+    Create-and-parse latency for small inputs: events set up per instance vs class-level event tables vs process pool
+    """
+    def setup(self):
+        root, words = ComplexNotion('root'), ComplexNotion('words')
+        LoopRelation(root, words, '*')
+        ParsingRelation(words, ActionNotion('word', lambda last_parsed: None), re.compile('[a-z0-9]+ ?'))
+
+        self.info['graph'] = root
+        self.info.setdefault('texts', ['small text %s ' % i for i in range(self.info.get('count', 2000))])
+
+    def handle(self, get_process, release=None):
+        results = []
+        t = Timer()
+
+        for text in self.info['texts']:
+            process = get_process()
+            results.append((process(self.info['graph'], text=text), process.parsed_length))
+
+            if release:
+                release(process)
+
+        return results, t.delta()
+
+    def run(self):
+        def per_instance():
+            Process._event_tables.pop(ParsingProcess, None)
+            return ParsingProcess()
+
+        pool = ProcessPool(self.info['graph'])
+
+        setup, t_setup = self.handle(per_instance)
+        table, t_table = self.handle(ParsingProcess)
+        pooled, t_pooled = self.handle(pool.acquire, pool.release)
+
+        assert setup == table == pooled
+
+        count = len(self.info['texts'])
+        print('Per item, set up: %.2f us, class table: %.2f us, pool: %.2f us' %
+              tuple(t.total_seconds() * 1e6 / count for t in (t_setup, t_table, t_pooled)))
+
+
+class BatchTest(SpecialTest):
+    """
+    COOL lexer batch throughput: lexing the grading files in the current process vs the worker processes
+    """
+    def run(self):
+        files = sorted(glob.glob('grading/*.cool')) * self.info.get('repeat', 4)
+        workers, chunk_size = self.info.get('workers'), self.info.get('chunk_size', 4)
+
+        t = Timer()
+        serial = list(process_batch(CoolLexer, files, workers=0))
+        t_serial = t.delta()
+
+        t = Timer()
+        parallel = list(process_batch(CoolLexer, files, workers=workers, chunk_size=chunk_size))
+        t_parallel = t.delta()
+
+        assert [(r.result, str(r.error)) for r in serial] == [(r.result, str(r.error)) for r in parallel]
+
+        print('%s files, serial: %s, parallel: %s, speedup: %.2f' %
+              (len(files), t_serial, t_parallel, t_serial.total_seconds() / t_parallel.total_seconds()))
+
+
+class AsyncTest(SpecialTest):
+    """
+    Many parses on one event loop: the word actions push to a sink with latency, blocking calls vs awaitables
+    """
+    def setup(self):
+        self.info.setdefault('count', 50)
+        self.info.setdefault('words', 20)
+        self.info.setdefault('latency', 0.001)
+
+    @staticmethod
+    def make_graph(sink):
+        root, words = ComplexNotion('root'), ComplexNotion('words')
+        LoopRelation(root, words, '*')
+        ParsingRelation(words, ActionNotion('word', sink), re.compile('[a-z0-9]+ ?'))
+
+        return root
+
+    def run(self):
+        import asyncio
+        from gt.aio import AsyncParsingProcess
+
+        latency, log = self.info['latency'], []
+        texts = ['word%s ' % i * self.info['words'] for i in range(self.info['count'])]
+
+        def blocking_sink(name):
+            time.sleep(latency)
+            log.append(name)
+
+        def async_sink(name):
+            log.append(name)
+            return asyncio.sleep(latency)
+
+        graph, results = self.make_graph(blocking_sink), []
+        t = Timer()
+
+        for i, text in enumerate(texts):
+            process = ParsingProcess()
+            results.append((process(process.NEW, graph, text=text, name=i), process.parsed_length))
+
+        t_blocking = t.delta()
+
+        graph, processes, loop = self.make_graph(async_sink), [AsyncParsingProcess() for _ in texts], \
+            asyncio.new_event_loop()
+        del log[:]
+        t = Timer()
+
+        tasks = [loop.create_task(p(p.NEW, graph, text=text, name=i))
+                 for i, (p, text) in enumerate(zip(processes, texts))]
+        replies = loop.run_until_complete(asyncio.gather(*tasks))
+
+        t_async = t.delta()
+        loop.close()
+
+        assert results == [(r, p.parsed_length) for r, p in zip(replies, processes)]
+
+        switches = sum(1 for a, b in zip(log, log[1:]) if a != b)
+        print('%s parses, blocking: %s, concurrent: %s, speedup: %.2f, switches between parses: %s of %s actions' %
+              (len(texts), t_blocking, t_async, t_blocking.total_seconds() / t_async.total_seconds(), switches,
+               len(log)))
+
+
+class ThreadsTest(SpecialTest):
+    """
+    Parsing throughput of the threads sharing one graph, each thread has its own process. The throughput scales on
+    the free-threaded CPython builds only, the GIL builds show the locking overhead
+    """
+    def setup(self):
+        root, token = ComplexNotion('root'), SelectiveNotion('token')
+        LoopRelation(root, token, True)
+
+        ParsingRelation(token, ActionNotion('keyword', lambda keywords=0: {SharedProcess.UPDATE_CONTEXT:
+                                                                           {'keywords': keywords + 1}}),
+                        list(TOKEN_DICT.keys()), ignore_case=True)
+        ParsingRelation(token, ActionNotion('id', {SharedProcess.UPDATE_CONTEXT: {'id': True}}), R_OBJECT_ID)
+        ParsingRelation(token, None, R_TYPE_ID)
+        ParsingRelation(token, None, R_INTEGER)
+        ParsingRelation(token, ParsingProcess.OK, EOF)
+        token.default = ParsingRelation(token, None, re.compile('[ \n(){};:<=.,+-]+'))
+
+        self.info['graph'] = root
+        self.info.setdefault('texts', ['class Main { x : Int <- %s; if x <= 10 then y else z fi; };\n' % i * 3 + EOF
+                                       for i in range(self.info.get('count', 100))])
+        self.info.setdefault('threads', (1, 2, 4, 8))
+
+    def parse(self, texts, results):
+        process = ParsingProcess(cursor=True)
+
+        for text in texts:
+            results.append((process(process.NEW, self.info['graph'], text=text), process.parsed_length,
+                            process.context.get('keywords')))
+
+    def run(self):
+        texts, base, expected = self.info['texts'], None, None
+
+        print('GIL enabled: %s' % getattr(sys, '_is_gil_enabled', lambda: True)())
+
+        for count in self.info['threads']:
+            results = [[] for _ in range(count)]
+            threads = [threading.Thread(target=self.parse, args=(texts[i::count], results[i])) for i in range(count)]
+
+            t = Timer()
+
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            delta = t.delta()
+
+            results = sorted(r for thread_results in results for r in thread_results)
+            expected = expected or results
+
+            assert results == expected and all(r[0] is not False for r in results)
+
+            throughput = len(texts) / delta.total_seconds()
+            base = base or throughput
+
+            print('%s threads: %s, %.0f parses/s, scaling: %.2f' % (count, delta, throughput, throughput / base))
+
+
+class FreezeTest(SpecialTest):
+    """
+    Parsing with the graph before and after freezing: precomputed relations, loop kinds and selective cases
+    """
+    def setup(self):
+        graph = Graph('root')
+        line, token = ComplexNotion('line', graph), SelectiveNotion('token', graph)
+        LoopRelation(graph.root, line, '*', graph)
+        LoopRelation(line, token, (1, None), graph)
+        ParsingRelation(line, None, '\n', graph)
+
+        ParsingRelation(token, ActionNotion('keyword', lambda keywords=0: {SharedProcess.UPDATE_CONTEXT:
+                                                                           {'keywords': keywords + 1}}, graph),
+                        list(TOKEN_DICT.keys()), graph, ignore_case=True)
+        ParsingRelation(token, None, R_OBJECT_ID, graph)
+        ParsingRelation(token, None, R_TYPE_ID, graph)
+        ParsingRelation(token, None, R_INTEGER, graph)
+        token.default = ParsingRelation(token, None, re.compile('[ (){};:<=.,+-]+'), graph)
+
+        self.info['graph'] = graph
+        self.info.setdefault('texts', ['class Main { x : Int <- %s; if x <= 10 then y else z fi; };\n' % i * 3
+                                       for i in range(self.info.get('count', 100))])
+
+    def parse(self):
+        results, t = [], Timer()
+
+        for text in self.info['texts']:
+            process = ParsingProcess(cursor=True)
+            results.append((process(process.NEW, self.info['graph'], text=text), process.parsed_length,
+                            process.context.get('keywords')))
+
+        return results, t.delta()
+
+    def run(self):
+        graph = self.info['graph']
+
+        results, t_thawed = self.parse()
+        graph.freeze()
+
+        try:
+            frozen_results, t_frozen = self.parse()
+        finally:
+            graph.unfreeze()
+
+        assert results == frozen_results and all(r[1] == len(t) for r, t in zip(results, self.info['texts']))
+
+        print('%s parses, thawed: %s, frozen: %s, speedup: %.2f' %
+              (len(results), t_thawed, t_frozen, t_thawed.total_seconds() / t_frozen.total_seconds()))
+
+
+class LimitsTest(SpecialTest):
+    """
+    Pathological backtracking bounded by the limits, and the cost of the limits checks
+    """
+    def setup(self):
+        # root -(*)-> select [-> case -(*)-> a -'a'->; -end->] for the ends, the text matches the last one only
+        root, select = ComplexNotion('root'), SelectiveNotion('select')
+        LoopRelation(root, select, '*')
+
+        for end in 'bcdefgh':
+            case, a = ComplexNotion('c' + end), ComplexNotion('a' + end)
+            NextRelation(select, case)
+            LoopRelation(case, a, '*')
+            ParsingRelation(a, None, 'a')
+            ParsingRelation(case, None, end)
+
+        self.info['graph'] = root
+        self.info.setdefault('text', ('a' * self.info.get('length', 50) + 'h') * 20)
+        self.info.setdefault('timeout', 0.05)
+
+    def parse(self, limits):
+        process = ParsingProcess(cursor=True)
+        process.limits = limits
+
+        t = Timer()
+        result = process(process.NEW, self.info['graph'], text=self.info['text'])
+
+        return result, t.delta(), process.limit_report
+
+    def run(self):
+        huge = 1 << 30
+        result, t_free, _ = self.parse({})
+        assert result is not False
+
+        limited, t_limited, _ = self.parse({Process.STEPS: huge, StackingProcess.BACKTRACKS: huge})
+        assert limited == result
+
+        print('Unlimited: %s, with limits not reached: %s, overhead: %.2f' %
+              (t_free, t_limited, t_limited.total_seconds() / t_free.total_seconds()))
+
+        timeout = self.info['timeout']
+        result, t_timeout, report = self.parse({Process.TIMEOUT: timeout})
+        assert result == Process.LIMIT and report[Process.LIMIT] == Process.TIMEOUT
+
+        print('Timeout %ss: stopped in %s after %s steps, %s backtracks, at %s of %s' %
+              (timeout, t_timeout, report[Process.STEPS], report[StackingProcess.BACKTRACKS],
+               report[ParsingProcess.PARSED_LENGTH], len(self.info['text'])))
+
+
+class StatsTest(FreezeTest):
+    """
+    Statistics of the parsing: cost of the collection, steps per character and the elements dominating the parse
+    """
+    def parse(self, collect=False):
+        results, t, stats = [], Timer(), []
+
+        for text in self.info['texts']:
+            process = ParsingProcess(cursor=True)
+            process.collect_stats = collect
+
+            results.append((process(process.NEW, self.info['graph'], text=text), process.parsed_length))
+            stats.append(process.stats)
+
+        return results, t.delta(), stats
+
+    def run(self):
+        results, t_off, _ = self.parse()
+        collected, t_on, stats = self.parse(True)
+
+        assert results == collected
+
+        steps, length = sum(s[Process.STEPS] for s in stats), sum(s[ParsingProcess.PARSED_LENGTH] for s in stats)
+        print('%s parses, without statistics: %s, with: %s, overhead: %.2f, steps per char: %.2f' %
+              (len(results), t_off, t_on, t_on.total_seconds() / t_off.total_seconds(), float(steps) / length))
+
+        print(format_table(get_stats_table(stats[-1], Process.CHECKS, self.info.get('top', 5))))
+
+
+class ProfilerTest(FreezeTest):
+    """
+    Sampling profiler of the parsing: cost of the sampling and the elements taking the most of the time
+    """
+    def parse(self, profiler=None):
+        results, t = [], Timer()
+        process = ParsingProcess(cursor=True)
+
+        if profiler:
+            profiler.process = process
+            profiler.start()
+
+        for text in self.info['texts']:
+            results.append((process(process.NEW, self.info['graph'], text=text), process.parsed_length))
+
+        if profiler:
+            profiler.stop()
+
+        return results, t.delta()
+
+    def run(self):
+        results, t_off = self.parse()
+
+        profiler = ProcessProfiler(None, self.info.get('interval', ProcessProfiler.INTERVAL))
+        profiled, t_on = self.parse(profiler)
+
+        assert results == profiled
+
+        print('%s parses, without profiler: %s, with: %s, overhead: %.2f, samples: %s' %
+              (len(results), t_off, t_on, t_on.total_seconds() / t_off.total_seconds(), profiler.samples))
+
+        print(format_table(profiler.get_top_table(self.info.get('top', 5))))
+
+
+class TraceTest(FreezeTest):
+    """
+    Tracing of the parsing: cost of the tracing into the ring buffer, the trace is saved if the file is specified
+    """
+    def parse(self, tracer=None):
+        results, t = [], Timer()
+        process = ParsingProcess(cursor=True)
+
+        if tracer:
+            tracer.process = process
+            tracer.start()
+
+        for text in self.info['texts']:
+            results.append((process(process.NEW, self.info['graph'], text=text), process.parsed_length))
+
+        if tracer:
+            tracer.stop()
+
+        return results, t.delta()
+
+    def run(self):
+        results, t_off = self.parse()
+
+        tracer = ProcessTracer(None, self.info.get('size', ProcessTracer.SIZE))
+        traced, t_on = self.parse(tracer)
+
+        assert results == traced
+
+        print('%s parses, without tracing: %s, with: %s, overhead: %.2f, steps: %s, records kept: %s' %
+              (len(results), t_off, t_on, t_on.total_seconds() / t_off.total_seconds(), tracer.steps,
+               len(tracer.records)))
+
+        if self.info.get('file'):
+            tracer.save_chrome_trace(self.info['file'])
+
+
+class DebuggerTest(FreezeTest):
+    """
+    Parsing with the debugger attached: without points the process should run as fast as without the debugger
+    """
+    def parse(self, points=False):
+        results, t = [], Timer()
+        process = ParsingProcess(cursor=True)
+        debugger = ProcessDebugger(process)
+
+        if points:
+            debugger.break_at(self.info['graph'].root, offset=-1, condition=lambda p: False)  # Never stops
+
+        for text in self.info['texts']:
+            results.append((process(process.NEW, self.info['graph'], text=text), process.parsed_length))
+
+        debugger.detach()
+        assert not any(event.post_event for _, event in process.events)
+
+        return results, t.delta()
+
+    def run(self):
+        results, t_off = self.parse()
+        broken, t_on = self.parse(True)
+
+        assert results == broken
+
+        print('%s parses, debugger without points: %s, with the breakpoint: %s, overhead: %.2f' %
+              (len(results), t_off, t_on, t_on.total_seconds() / t_off.total_seconds()))
+
+
+class HeatTest(SpecialTest):
+    """
+    DOT export of the big graph with the heat map: the time per element should not grow with the graph size
+    """
+    def build(self, size):
+        graph = Graph('root')
+        heat = {}
+
+        for i in range(size // 2):
+            notion = SelectiveNotion('s%s' % i, graph) if i % 3 == 0 else Notion('n%s' % i, graph)
+            relation = NextRelation(graph.root, notion, 'c%s' % i, graph)
+
+            heat[notion], heat[relation] = i, i % 7
+
+        return graph, heat
+
+    def run(self):
+        size = self.info.get('size', 10000)
+
+        for n in (size, size * 2):
+            graph, heat = self.build(n)
+
+            export, t = DotExport(), Timer()
+            export(export.NEW, graph, file=self.info.get('file', os.devnull), heat=heat)
+            t = t.delta()
+
+            print('%s elements, export with heat: %s, per element: %.1f us' % (n, t, t.total_seconds() * 1e6 / n))
+
+
 # Special test itself, for nerds only B-\
 runner = SpecialTestRunner(CoolGradingTest(selection='arith'))
 runner.setup()
@@ -8,11 +8,28 @@
 """
 
 import unittest
-from inspect import ArgSpec
+import gc
+import io
+import json
 import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+import weakref
 
 from gt.debug import *
 from gt.export import *
+from gt.compiler import CompiledProcess
+from gt.procs import *
+from gt.pickling import *
+
+try:
+    import asyncio
+    from gt.aio import *
+except (ImportError, SyntaxError):  # Python 2
+    asyncio = None
 
 
 # Test functions
@@ -71,6 +88,21 @@ class TestCalls(Abstract):
         return True
 
 
+class WordsProcessor(FileProcessor):
+    def __init__(self, compiled=False):
+        super(WordsProcessor, self).__init__('words', compiled)
+
+    def build_graph(self):
+        words = self.builder.loop_rel(True).select('words').current
+        self.builder[words].parse_rel(re.compile('[a-z]+ ?'))
+
+    def get_reply(self, result):
+        if self.parser.text:
+            raise SyntaxError('Unexpected %s' % self.parser.text)
+
+        return self.parser.parsed_length
+
+
 class UtTests(unittest.TestCase):
 
     def test_1_abstract(self):
@@ -110,6 +142,42 @@ class UtTests(unittest.TestCase):
 
         self.assertEqual(access.__repr__(), '%s, %s: %s' % (access.mode, access.spec, access.value))
 
+        # Binders are shared by the closures of the same code
+        adders = [lambda a, b=i: a + b for i in range(2)]
+        accesses = [Access(adder) for adder in adders]
+
+        self.assertIs(accesses[0]._binder, accesses[1]._binder)
+        self.assertEqual([access(a=1) for access in accesses], [1, 2])
+        self.assertEqual([access(a=1, b=3) for access in accesses], [4, 4])
+
+        self.assertEqual(Access(lambda a, b, c: (a, b, c))(a=1, c=3), (1, None, 3))
+        self.assertEqual(Access(lambda a: a)(), None)
+
+        # Bound methods are cached in their owners
+        stats = Access.cache_stats()
+        access = Access.get_access(abstract.return_true, True)
+
+        self.assertIs(Access.get_access(abstract.return_true, True), access)
+        self.assertIsNot(Access.get_access(TestCalls().return_true, True), access)
+        self.assertEqual(Access.cache_stats()[Access.HITS], stats[Access.HITS] + 1)
+        self.assertEqual(Access.cache_stats()[Access.MISSES], stats[Access.MISSES] + 2)
+
+        owner = weakref.ref(abstract)
+        del abstract, access
+        gc.collect()
+
+        self.assertIsNone(owner())
+
+        # Steady state: no introspection
+        process, calls = Process(), TestCalls()
+        action = ActionNotion('action', calls.return_true)
+        process(calls.return_true, action)
+
+        stats = Access.cache_stats()
+        process(process.NEW, calls.return_true, action)
+
+        self.assertEqual(Access.cache_stats()[Access.MISSES], stats[Access.MISSES])
+
         # Conditions
         condition = Condition(1)
         self.assertEqual(condition.mode, Condition.VALUE)
@@ -425,6 +493,76 @@ class UtTests(unittest.TestCase):
 
         self.assertEqual(u('go'), False)
 
+        # Cached active events
+        stats = u.events_cache_stats
+        self.assertEqual(stats[Handler.SIZE], 3)
+
+        u.fixed_tags = {'case1', 'case2'}
+        u.update()
+
+        self.assertEqual(u('go'), True)
+        self.assertEqual(u.events_cache_stats[Handler.HITS], stats[Handler.HITS] + 1)
+        self.assertEqual(u.events_cache_stats[Handler.MISSES], stats[Handler.MISSES])
+
+        # Changing events resets the cache
+        u.on('stop', Event(False), 'case1')
+        self.assertEqual(u.events_cache_stats[Handler.SIZE], 1)
+        self.assertEqual(len(u.active_events), 2)
+
+        u.fixed_tags = set()
+        u.update()
+        self.assertFalse(u.active_events)
+
+        u.off_condition('stop')
+        u.fixed_tags = {'case1'}
+        u.update()
+        self.assertFalse(u.active_events)
+
+    def test_3_index(self):
+        tc = TestCalls()
+
+        events = [(Condition('ab'), Event(1)), (Condition('a'), Event(2)),
+                  (Condition('AB', ignore_case=True), Event(3)), (Condition(('b', 'c')), Event(4)),
+                  (Condition(5), Event(5)), (Condition(True), Event(6)), (Condition(tc.return_true), Event(7)),
+                  (Condition(re.compile('c+')), Event(8)), (Condition(('x', re.compile('y'))), Event(9)),
+                  (Condition({}), Event(10)), (TRUE_CONDITION, Event(11))]
+
+        index = EventIndex(events)
+        general = [e[1].value for e in index.general]
+
+        self.assertEqual(general, [7, 8, 9, 10, 11])
+        self.assertEqual([e[1].value for e in index.candidates(['abc'])], [1, 2, 3, 7, 8, 9, 10, 11])
+        self.assertEqual([e[1].value for e in index.candidates(['Abc'])], [3, 7, 8, 9, 10, 11])
+        self.assertEqual([e[1].value for e in index.candidates([TextCursor('xc', 1)])], [4, 7, 8, 9, 10, 11])
+        self.assertEqual([e[1].value for e in index.candidates([5])], [5, 7, 8, 9, 10, 11])
+        self.assertEqual([e[1].value for e in index.candidates([True])], [6, 7, 8, 9, 10, 11])
+        self.assertEqual([e[1].value for e in index.candidates([''])], general)
+        self.assertEqual([e[1].value for e in index.candidates([])], general)
+        self.assertEqual([e[1].value for e in index.candidates([object()])], general)
+        self.assertEqual(len(index.candidates([{}])), len(events))
+
+        # Ranking is the same as for the full scan, regexes work only for strings
+        no_regex = [e for e in events if not e[0].spec == Condition.REGEX and not e[1].value == 9]
+
+        for events, messages in ((events, (['abc'], ['ABx'], ['c'], ['ccc'], ['z'], [''], [])),
+                                 (no_regex, ([5], [True], [False], [{}], [None], ['b']))):
+            h = Handler()
+
+            for c, e in events:
+                h.on_access(c, e)
+
+            for message in messages:
+                best = -1, None
+
+                for c, e in events:
+                    rank = c.check(message, {})[0]
+
+                    if rank > best[0]:
+                        best = rank, e.value
+
+                r = h.handle(message, {})
+                self.assertEqual((r[1], r[2]), best)
+
     def test_4_element(self):
         e = Element()
         tc = TestCalls()
@@ -606,6 +744,25 @@ class UtTests(unittest.TestCase):
         self.assertTrue(process.message[0], strange)
         self.assertNotIn('preserved', process.context)
 
+        # The message is compatible with lists
+        self.assertEqual(process.message, [strange])
+        self.assertTrue([strange] == process.message and not process.message != [strange])
+        self.assertEqual(process.message + ['x'], [strange, 'x'])
+        self.assertEqual(['x'] + process.message, ['x', strange])
+        self.assertEqual(process.message[0:1], [strange])
+
+        # The overrides of the condition hooks get the message items
+        class CheckingProcess(Process):
+            def can_clear_message(self, *message):
+                self.checked = message
+                return super(CheckingProcess, self).can_clear_message(*message)
+
+        checking = CheckingProcess()
+
+        self.assertFalse(checking(0, strange))
+        self.assertEqual(checking.checked, (strange, ))
+        self.assertEqual(Access(process.can_clear_message)(strange), False)
+
         # We really stuck
         r = process(test='process_unknown_2')
         self.assertTrue(r is False)
@@ -671,6 +828,125 @@ class UtTests(unittest.TestCase):
         self.assertTrue(r)
         self.assertEqual(process.current, tc.return_true)
 
+        # Events are set up once per class, the methods are bound to each instance
+        p1, p2 = ParsingProcess(), ParsingProcess()
+
+        self.assertTrue(Process._event_tables[ParsingProcess])
+        self.assertEqual(len(p1._events), len(p2._events))
+
+        for (c1, e1), (c2, e2) in zip(p1._events, p2._events):
+            if getattr(c2.value, '__self__', None) is p2:
+                self.assertIs(get_function(c1.value), get_function(c2.value))
+                self.assertIs(c2.list[0], c2)
+            else:
+                self.assertIs(c1, c2)
+
+            self.assertIsNot(e1, e2)
+            self.assertIs(e2.value.__self__, p2)
+
+        p2._events[0][1].pre = lambda: True
+        self.assertIsNone(ParsingProcess()._events[0][1].pre)
+
+        self.assertEqual(p2(ComplexNotion('root'), text=''), p1(ComplexNotion('root'), text=''))
+
+        # Active events use the class-level layouts until the events change
+        self.assertIs(p2._layouts, Process._event_layouts[ParsingProcess])
+        self.assertIn(p2._tags, p2._layouts)
+
+        p2.on('extra', p2.skip)
+        self.assertIsNone(p2._layouts)
+        self.assertEqual(p2.get_events('extra'), [p2.skip])
+
+        # Set up changing the attributes or referring to the instance cannot be shared
+        class ClosureProcess(Process):
+            def setup_events(self):
+                super(ClosureProcess, self).setup_events()
+                self.on(lambda *message: message[0] is self, self.skip)
+
+        processes = ClosureProcess(), ClosureProcess(), ExportProcess(), ExportProcess()
+
+        self.assertIs(Process._event_tables[ClosureProcess], False)
+        self.assertIs(Process._event_tables[ExportProcess], False)
+
+        for p in processes:
+            self.assertIs(p._events[-1][1].value.__self__, p)
+
+        self.assertIs(processes[3].visit_event.value.__self__, processes[3])
+
+        # Set up reading the instance is not shared unless the class opts in
+        class ExtraProcess(ParsingProcess):
+            def __init__(self, extra):
+                self.extra = extra
+                super(ExtraProcess, self).__init__()
+
+            def setup_events(self):
+                super(ExtraProcess, self).setup_events()
+
+                if self.extra:
+                    self.on('ping', self.skip)
+
+        self.assertEqual(ExtraProcess(False).get_events('ping'), [])
+        self.assertEqual(len(ExtraProcess(True).get_events('ping')), 1)
+        self.assertIs(Process._event_tables[ExtraProcess], False)
+
+        class SubProcess(ParsingProcess):
+            pass
+
+        SubProcess()
+        self.assertTrue(Process._event_tables[SubProcess])
+
+        # Pool
+        root = ComplexNotion('root')
+        ParsingRelation(root, None, 'a')
+
+        pool = ProcessPool(root, 1, cursor=True)
+
+        with pool.process() as p1:
+            self.assertIsNone(p1(root, text='a'))
+            self.assertEqual(p1.parsed_length, 1)
+
+        self.assertEqual(len(pool), 1)
+        self.assertNotIn(p1.TEXT, p1.context)
+
+        with pool.process() as p2:
+            self.assertIs(p2, p1)
+            self.assertFalse(p2(root, text='b'))
+
+        pool.release(ParsingProcess())
+        self.assertEqual(len(pool), 1)
+
+        # Batch
+        texts = ['ab cd', 'ab 1', '', 'xyz']
+        expected = [(0, 'ab cd', 5, None), (1, 'ab 1', None, 'Unexpected 1'), (2, '', 0, None), (3, 'xyz', 3, None)]
+
+        def batch(*args, **kwargs):
+            return [(r.index, r.item, r.result, str(r.error) if r.error else None)
+                    for r in process_batch(*args, **kwargs)]
+
+        self.assertEqual(batch(WordsProcessor, texts, True, 0), expected)
+        self.assertEqual(batch(WordsProcessor, texts, True, 0, 3, args=(True, )), expected)
+
+        handle, filename = tempfile.mkstemp('.txt')
+
+        try:
+            with os.fdopen(handle, 'w') as f:
+                f.write('words here')
+
+            self.assertEqual(batch(WordsProcessor, [filename, filename + '?'], workers=0)[0][2], 10)
+            self.assertEqual(batch(WordsProcessor, [filename + '?'], workers=0)[0][0:3], (0, filename + '?', None))
+
+            if ProcessPoolExecutor:
+                self.assertEqual(batch(WordsProcessor, texts, True, 2, 3), expected)
+                self.assertEqual(sorted(batch(WordsProcessor, texts, True, 2, ordered=False)), expected)
+
+                # Stopping early cancels the pending chunks
+                results = process_batch(WordsProcessor, texts * 50, True, 1)
+                self.assertEqual(next(results).result, 5)
+                results.close()
+
+        finally:
+            os.remove(filename)
+
     def test_7_debug(self):
         root = ComplexNotion('here')
         a = ComplexNotion('a')
@@ -861,6 +1137,59 @@ class UtTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             DictChangeOperation('fail', 1, 2).do()
 
+        # Persistent dict
+        class Colliding(object):
+            def __init__(self, name):
+                self.name = name
+
+            def __hash__(self):
+                return 42
+
+            def __eq__(self, other):
+                return isinstance(other, Colliding) and other.name == self.name
+
+        keys = ['a', 'b', 1, -1, 1 << 40, Colliding('x'), Colliding('y'), Colliding('z')] + list(range(100))
+        d, pd = {}, PersistentDict(a=1)
+        d['a'] = 1
+
+        snapshot = pd.snapshot()
+        copy = pd.copy()
+
+        for i, k in enumerate(keys):
+            d[k] = pd[k] = i
+
+        self.assertEqual(pd, d)
+        self.assertEqual(len(pd), len(d))
+        self.assertEqual(pd[Colliding('y')], 6)
+        self.assertEqual(sorted(str(k) for k in pd), sorted(str(k) for k in d))
+
+        for k in ['a', 1, Colliding('x'), 50]:
+            del d[k]
+            del pd[k]
+
+        self.assertEqual(pd, d)
+        self.assertNotIn(Colliding('x'), pd)
+        self.assertIn(Colliding('y'), pd)
+        self.assertIsNone(pd.get('a'))
+
+        with self.assertRaises(KeyError):
+            del pd['a']
+
+        with self.assertRaises(KeyError):
+            pd[Colliding('x')]
+
+        middle = pd.snapshot()
+        pd.clear()
+        self.assertFalse(pd)
+
+        pd.restore(middle)
+        self.assertEqual(pd, d)
+
+        pd.restore(snapshot)
+        self.assertEqual(pd, {'a': 1})
+        self.assertEqual(copy, {'a': 1})
+        self.assertEqual(dict(**pd), {'a': 1})
+
     def test_b_stacking_context(self):
         # Testing without tracking
         root = ComplexNotion('root')
@@ -918,6 +1247,54 @@ class UtTests(unittest.TestCase):
         self.assertEqual('predator', process.context['test'])  # Lasts because context changes were forgotten
         self.assertFalse(process._context_stack)
 
+        # Persistent mode: the outer pop restores the snapshot, the forgotten changes as well
+        root = ComplexNotion('root')
+
+        NextRelation(root, ActionNotion('push_context', process.PUSH_CONTEXT))
+        NextRelation(root, ActionNotion('change_context', {process.ADD_CONTEXT: {'terminator': '2'}}))
+        NextRelation(root, ActionNotion('check_context', lambda **c: None if 'terminator' in c else 'Ripley!'))
+        NextRelation(root, ActionNotion('push_context2', process.PUSH_CONTEXT))
+        NextRelation(root, ActionNotion('change_context2', {process.UPDATE_CONTEXT: {'test': 'predator'}}))
+        NextRelation(root, ActionNotion('forget_context', process.FORGET_CONTEXT))
+        NextRelation(root, pop)
+
+        process = StackingProcess(True)
+        r = process(process.NEW, root, test='test_stacking_3')
+
+        self.assertTrue(r is None)
+        self.assertEqual(process.current, pop)
+        self.assertIsInstance(process.context, PersistentDict)
+        self.assertNotIn('terminator', process.context)
+        self.assertEqual('test_stacking_3', process.context['test'])
+        self.assertFalse(process._context_stack)
+
+        # Backtracking over the nested choice, states are restored too
+        outer, inner = SelectiveNotion('outer'), SelectiveNotion('inner')
+        c1, c2 = ComplexNotion('c1'), ComplexNotion('c2')
+
+        NextRelation(outer, c1)
+        NextRelation(outer, c2)
+
+        NextRelation(c1, inner)
+        ParsingRelation(inner, ActionNotion('a1', lambda: {process.UPDATE_CONTEXT: {'case': 'a1'}}), 'a')
+        ParsingRelation(inner, ActionNotion('a2', lambda: {process.UPDATE_CONTEXT: {'case': 'a2'}}), 'a')
+        ParsingRelation(c1, ActionNotion('x', None), 'x')
+
+        ParsingRelation(c2, ActionNotion('ab', None), 'ab')
+
+        process = ParsingProcess(persistent=True)
+
+        self.assertTrue(process(outer, text='ab') is None)
+        self.assertEqual(process.parsed_length, 2)
+        self.assertNotIn('case', process.context)
+        self.assertFalse(process.states)
+        self.assertFalse(process._context_stack)
+
+        process = ParsingProcess(persistent=True)
+        self.assertTrue(process(outer, text='ax') is None)
+        self.assertEqual(process.context['case'], 'a1')
+        self.assertFalse(process.states)
+
     def test_c_states(self):
         # Root -> (inc, inc, 'state_check')
         root = ComplexNotion('root')
@@ -1100,6 +1477,179 @@ class UtTests(unittest.TestCase):
         self.assertEqual(process.parsed_length, 1)
         self.assertEqual(process.current, parsing)
 
+        # Lists of strings are matched with the prefix tree, the results are the same as checking one by one
+        conditions = [Condition(['<', '<-', '<=', '=>', 'else', '']), Condition(['if', 'IN', 'inherits', 'Else'],
+                      ignore_case=True), Condition(['a', 'ab', 'ab']), Condition([u'\xdf', 'ss'], ignore_case=True)]
+
+        self.assertEqual(conditions[0].check, conditions[0].check_trie)
+        self.assertEqual(conditions[1].check, conditions[1].check_trie)
+        self.assertEqual(get_object_name(Condition(['a', re.compile('b')]).check), 'check_list')
+        self.assertEqual(get_object_name(Condition(['a', 'b'], search=True).check), 'check_list')
+
+        texts = ['<-', '<=x', '<', 'x', 'ELSE', 'Inherits', 'in', 'abc', 'a', u'\xdfs', u'SS', '']
+        for condition in conditions:
+            for text in texts:
+                self.assertEqual(condition.check([text], {}), condition.check_list([text], {}))
+                self.assertEqual(condition.check([TextCursor('_' + text, 1)], {}), condition.check_list([text], {}))
+
+            self.assertEqual(condition.check([], {}), condition.check_list([], {}))
+            self.assertEqual(condition.check([1], {}), condition.check_list([1], {}))
+
+        # Interned conditions are shared by relations
+        regex = re.compile('[a-z]+')
+        relations = [ParsingRelation(root, action, regex), ParsingRelation(root, action, regex),
+                     ParsingRelation(root, action, ['if', 'else']), ParsingRelation(root, action, ('if', 'else')),
+                     ParsingRelation(root, action, regex, ignore_case=True), ParsingRelation(root, action, 1),
+                     ParsingRelation(root, action, True), ParsingRelation(root, action, {})]
+
+        self.assertIs(relations[0].condition_access, relations[1].condition_access)
+        self.assertIsNot(relations[2].condition_access, relations[3].condition_access)
+        self.assertEqual(relations[3].condition_access.value, ('if', 'else'))
+        self.assertIs(relations[2].condition_access.list[1], relations[3].condition_access.list[1])
+        self.assertIs(relations[2].condition_access.list[1], Condition.get_interned('else'))
+        self.assertIsNot(relations[0].condition_access, relations[4].condition_access)
+        self.assertIsNot(relations[5].condition_access, relations[6].condition_access)
+        self.assertEqual(relations[6].condition_access.spec, Condition.BOOLEAN)
+        self.assertIsNot(relations[7].condition_access, Condition.get_interned({}))
+
+        self.assertGreaterEqual(Condition.interned_count(), 6)
+
+        Condition.clear_interned()
+        self.assertEqual(Condition.interned_count(), 0)
+        self.assertIsNot(ParsingRelation(root, action, regex).condition_access, relations[0].condition_access)
+
+        # Unused conditions are evicted
+        for relation in relations:
+            relation.subject = None
+
+        del relations
+        gc.collect()
+
+        self.assertEqual(Condition.interned_count(), 1)
+
+    def test_e_cursor(self):
+        # Text cursor
+        cursor = TextCursor('abcd', 1)
+
+        self.assertEqual(len(cursor), 3)
+        self.assertEqual(cursor, 'bcd')
+        self.assertEqual(cursor[0:2], 'bc')
+        self.assertEqual(cursor[-1], 'd')
+        self.assertEqual(cursor[::-1], 'dcb')
+        self.assertEqual(cursor[::2], 'bd')
+        self.assertEqual(cursor[2:0:-1], 'dc')
+        self.assertEqual(cursor[-2:], 'cd')
+        self.assertEqual(cursor.find('d'), 2)
+        self.assertTrue(cursor.startswith('bc'))
+        self.assertEqual(cursor.upper(), 'BCD')
+        self.assertEqual(cursor + '!', 'bcd!')
+        self.assertFalse(cursor.advance(3))
+        self.assertEqual(cursor.advance(2).buffer, cursor.buffer)
+
+        # Conditions are matched at the position
+        self.assertEqual(Condition('bc').check([cursor], {}), (2, 'bc'))
+        self.assertEqual(Condition('BC', ignore_case=True).check([cursor], {}), (2, 'BC'))
+        self.assertEqual(Condition('a').check([cursor], {}), Condition.NO_CHECK)
+        self.assertEqual(Condition('d', search=True).check([cursor], {}), (3, 'd'))
+        self.assertEqual(Condition(re.compile('b+c')).check([cursor], {}), (2, 'bc'))
+        self.assertEqual(Condition(re.compile('a')).check([cursor], {}), Condition.NO_CHECK)
+        self.assertEqual(Condition(re.compile('c'), search=True).check([cursor], {}), (2, 'c'))
+        self.assertEqual(Condition(('a', 'bcd')).check([cursor], {}), (3, 'bcd'))
+
+        # Regexes looking behind do not see the text before the cursor
+        self.assertEqual(Condition(re.compile('^b')).check([cursor], {}), (1, 'b'))
+        self.assertEqual(Condition(re.compile(r'\bbc')).check([cursor], {}), (2, 'bc'))
+        self.assertEqual(Condition(re.compile('(?<=a)b')).check([cursor], {}), Condition.NO_CHECK)
+        self.assertEqual(Condition(re.compile('(?<!a)b')).check([cursor], {}), (1, 'b'))
+        self.assertEqual(Condition(re.compile('^c'), search=True).check([cursor], {}), Condition.NO_CHECK)
+        self.assertEqual(Condition(re.compile('[^a]c')).check([cursor], {}), (2, 'bc'))
+
+        # Parsing in the cursor mode
+        root = ComplexNotion('root')
+        words = []
+
+        word = ActionNotion('word', lambda last_parsed, text: words.append((last_parsed, len(text))))
+        LoopRelation(root, ComplexNotion('words'), '*')
+        ParsingRelation(root.relations[0].object, word, re.compile('[a-z]+ ?'))
+
+        process = ParsingProcess(cursor=True)
+        r = process(root, text='one two three')
+
+        self.assertTrue(r is None)
+        self.assertEqual(words, [('one ', 9), ('two ', 5), ('three', 0)])
+        self.assertEqual(process.parsed_length, 13)
+        self.assertEqual(process.last_parsed, 'three')
+        self.assertIsInstance(process.text, TextCursor)
+        self.assertTrue(process.is_parsed())
+
+        # The anchored regex matches at each position as in the plain mode, the actions get the cursor
+        texts = []
+        word.action = lambda text: texts.append((text.__class__, str(text)))
+        root.relations[0].object.relations[0].condition = re.compile('^[a-z]+ ?')
+
+        self.assertTrue(process(process.NEW, root, text='one two') is None)
+        self.assertEqual(texts, [(TextCursor, 'two'), (TextCursor, '')])
+        self.assertEqual(process.parsed_length, 7)
+
+        # Rollback restores the position
+        go = ComplexNotion('go')
+        ParsingRelation(go, None, 'go')
+
+        r = process(process.NEW, process.PUSH_CONTEXT, go, process.POP_CONTEXT, text='go go')
+
+        self.assertTrue(r is False)
+        self.assertEqual(process.text, 'go go')
+        self.assertEqual(process.parsed_length, 0)
+
+        # Streaming: the window keeps the lookahead only
+        del words[:]
+        windows = []
+
+        word.action = lambda last_parsed: words.append(last_parsed) or windows.append(len(process._window))
+
+        process = ParsingProcess()
+        process.LOOKAHEAD = 6
+
+        r = process(root, text=iter(['on', 'e tw', 'o thr', 'ee']))
+
+        self.assertTrue(r is None)
+        self.assertEqual(words, ['one ', 'two ', 'three'])
+        self.assertEqual(process.parsed_length, 13)
+        self.assertTrue(process.is_parsed())
+
+        del words[:]
+        del windows[:]
+
+        process.CHUNK_SIZE = 7
+        r = process(process.NEW, root, text=io.StringIO(u'ab ' * 1000))
+
+        self.assertTrue(r is None)
+        self.assertEqual(len(words), 1000)
+        self.assertLessEqual(max(windows), 2 * process.LOOKAHEAD + process.CHUNK_SIZE)
+
+        # Rollback goes back to the oldest saved position
+        select = SelectiveNotion('select')
+        case1, case2 = ComplexNotion('case1'), ComplexNotion('case2')
+
+        NextRelation(select, case1)
+        NextRelation(select, case2)
+
+        ParsingRelation(case1, None, 'abc')
+        ParsingRelation(case1, None, 'dx')
+        ParsingRelation(case2, None, 'abcd')
+        ParsingRelation(case2, None, 'e')
+
+        for persistent in (False, True):
+            process = ParsingProcess(persistent=persistent)
+            process.LOOKAHEAD = 4
+
+            r = process(select, text=iter(['ab', 'cd', 'e']))
+
+            self.assertTrue(r is None)
+            self.assertEqual(process.parsed_length, 5)
+            self.assertTrue(process.is_parsed())
+            self.assertFalse(process._saved_offsets)
+
     def test_f_complex(self):
         # Complex notion test: root -> ab -> (a , b) with empty message
         root = ComplexNotion('root')
@@ -1311,6 +1861,104 @@ class UtTests(unittest.TestCase):
         self.assertEqual(process.context['acc'], 1)
         check_test_result(self, process, root, 0)
 
+        # Index of string cases gives the same cases as checking one by one
+        def best_cases(selective, text):
+            cases = [rel(Process.NEXT, text=text, answer=Handler.RANK) for rel in selective.relations
+                     if rel != selective.default]
+            cases = [(result, rank) for result, rank in cases if result != ParsingProcess.ERROR and rank >= 0]
+            best = [result for result, rank in cases if rank == max(rank for _, rank in cases)]
+
+            return best or ([selective.default] if selective.default else [])
+
+        root = SelectiveNotion('root')
+        a, b = Notion('a'), Notion('b')
+        cases = [ParsingRelation(root, a, 'ab'), ParsingRelation(root, b, ['a', 'abc', 'x']),
+                 ParsingRelation(root, a, ['AB', 'Abc', u'\xdf'], ignore_case=True),
+                 ParsingRelation(root, b, re.compile('a+')), ParsingRelation(root, a, 'a', check_only=True),
+                 ParsingRelation(root, b, lambda text: 2 if text.startswith('ab') else 0),
+                 ParsingRelation(root, a, re.compile('bc'), search=True)]
+        root.default = ParsingRelation(root, b, 'x')
+
+        indexed = root.get_cases_index()[0]
+        self.assertEqual(indexed - set([cases[2]]), set([cases[0], cases[1], cases[4], root.default]))
+        self.assertEqual(cases[2] in indexed, len(u'\xdf'.upper()) == 1)  # Could be longer when upper-cased
+
+        cases[2].condition = ['AB', 'Abc']
+        self.assertIn(cases[2], root.get_cases_index()[0])
+
+        texts = ['a', 'ab', 'abc', 'ABC', 'aaaa', 'x', 'z', '', u'\xdf', u'SS', 'bab']
+        for text in texts:
+            self.assertEqual(root.get_best_cases([Process.NEXT], {ParsingProcess.TEXT: text}), best_cases(root, text))
+            self.assertEqual(root.get_best_cases([Process.NEXT], {ParsingProcess.TEXT: TextCursor('_' + text, 1)}),
+                             best_cases(root, text))
+
+        # Index follows the changes of relations and conditions
+        cases[0].condition = 'abcd'
+        cases[1].subject = None
+        root.default = None
+
+        self.assertNotIn(cases[1], root.get_cases_index()[0])
+
+        for text in texts + ['abcd']:
+            self.assertEqual(root.get_best_cases([Process.NEXT], {ParsingProcess.TEXT: text}), best_cases(root, text))
+
+        # Packrat mode: the common part of the cases is parsed once
+        passed = []
+
+        root = SelectiveNotion('root')
+        common = ComplexNotion('common')
+
+        for i in range(3):
+            ParsingRelation(common, ActionNotion('a', lambda: passed.append(1) or
+                                                 {SharedProcess.UPDATE_CONTEXT: {'seen': len(passed)}}), 'a')
+
+        for i in range(5):
+            case = ComplexNotion('case %s' % i)
+            NextRelation(root, case)
+            NextRelation(case, common)
+            ParsingRelation(case, ActionNotion('end', None), 'b%s' % i)
+
+        def parse(process, text):
+            del passed[:]
+            return process(process.NEW, root, text=text), process.parsed_length, len(passed), \
+                process.context.get('seen')
+
+        self.assertEqual(parse(ParsingProcess(), 'aaab4'), (None, 5, 15, 15))
+        self.assertEqual(parse(ParsingProcess(packrat=100), 'aaab4'), (None, 5, 3, 3))
+        self.assertEqual(parse(ParsingProcess(packrat=100, cursor=True), 'aaab4'), (None, 5, 3, 3))
+        self.assertEqual(parse(ParsingProcess(packrat=100, persistent=True), 'aaab4'), (None, 5, 3, 3))
+
+        # Errors are replayed as well
+        self.assertEqual(parse(ParsingProcess(), 'aaab5'), (False, 3, 15, 15))
+
+        process = ParsingProcess(packrat=100)
+        self.assertEqual(parse(process, 'aaab5'), (False, 3, 3, 3))
+        self.assertEqual(process.memo_stats, {Handler.HITS: 4, Handler.MISSES: 7, Handler.SIZE: 6})
+        self.assertFalse(process.states)
+
+        # The memo is bounded and cleared for the new text
+        process = ParsingProcess(packrat=2)
+        self.assertEqual(parse(process, 'aaab4'), (None, 5, 3, 3))
+        self.assertEqual(process.memo_stats[Handler.SIZE], 2)
+
+        self.assertEqual(parse(ParsingProcess(), 'aab1'), (False, 2, 10, 10))
+        self.assertEqual(parse(process, 'aab1'), (False, 2, 2, 2))
+        self.assertEqual(process.memo_stats[Handler.SIZE], 2)
+
+        # Opting out: the notions with side effects and the notions around them are passed every time
+        common.memoize = False
+
+        self.assertEqual(parse(ParsingProcess(packrat=100), 'aaab4'), (None, 5, 15, 15))
+
+        common.memoize = True
+        middle = ComplexNotion('middle')
+        NextRelation(middle, ActionNotion('side effect', lambda: passed.append(0)))
+        NextRelation(common, middle)
+
+        middle.relations[0].object.memoize = False
+
+        self.assertEqual(parse(ParsingProcess(packrat=100), 'aaab4'), (None, 5, 20, 19))
+
     def test_h_loop(self):
         # Simple loop test: root -5!-> aa -a-> a for 'aaaaa'
         root = ComplexNotion('root')
@@ -2015,6 +2663,838 @@ class UtTests(unittest.TestCase):
         self.assertEqual(len(p._exported), 11)
         self.assertEqual(p._exported.get(p.EMPTY), 1)
 
+    def test_l_compiled(self):
+        def check_same(start, text, **context):
+            interpreted, compiled = ParsingProcess(), CompiledProcess(start)
+            results = [(p(p.NEW, start, text=text, **context), p.query, p.parsed_length, p.current, p.states)
+                       for p in (interpreted, compiled)]
+
+            self.assertEqual(results[0], results[1])
+
+            for p in (interpreted, compiled):  # Process dispatch details are not the part of the parsing result
+                for key in (p.SENDER, p.RANK, p.CONDITION, p.EVENT):
+                    p.context.pop(key, None)
+
+            self.assertEqual(interpreted.context, compiled.context)
+
+            return compiled
+
+        # Loops with actions: root -(3)-> sequence [-(*)-> a's -a-> a, -(*)-> b's -b-> b]
+        root = ComplexNotion('root')
+        sequence = ComplexNotion('sequence')
+        LoopRelation(root, sequence, 3)
+
+        a_seq = ComplexNotion('a\'s')
+        LoopRelation(sequence, a_seq, '*')
+        ParsingRelation(a_seq, ActionNotion('a', common_state_acc), 'a')
+
+        b_seq = ComplexNotion('b\'s')
+        LoopRelation(sequence, b_seq, '*')
+        ParsingRelation(b_seq, ActionNotion('b', state_v_starter), 'b')
+
+        process = check_same(root, 'bbaabaaa')
+        self.assertEqual(process.context['acc'], 5)
+        self.assertEqual(process.parsed_length, 8)
+
+        check_same(root, 'bbaabaaac')
+
+        # Selective with a retry: the first 'a' case fails on 'c', the context is rolled back
+        select = SelectiveNotion('select')
+        ab = ComplexNotion('ab')
+        ParsingRelation(select, ab, 'a')
+        ParsingRelation(ab, ActionNotion('add', common_state_acc), 'b')
+        ac = ComplexNotion('ac')
+        ParsingRelation(select, ac, 'a')
+        ParsingRelation(ac, ActionNotion('update', common_state_acc), 'c')
+
+        process = check_same(select, 'ac', acc=1)
+        self.assertEqual(process.context['acc'], 2)
+
+        check_same(select, 'ad', acc=1)
+
+        # Default case and custom loop
+        select.default = ParsingRelation(select, None, re.compile('.'))
+        check_same(select, 'x')
+
+        counter = ComplexNotion('counter')
+        LoopRelation(counter, ActionNotion('count', common_state_acc), lambda **c: c['state'].get('i', 0) < 3 and
+                     c['state'].get('i', 0) + 1)
+
+        process = check_same(counter, '')
+        self.assertEqual(process.context['acc'], 3)
+
+        # Elements with user events are interpreted
+        stopper = ComplexNotion('stopper')
+        stopper.on(lambda *m: m[0] == Process.NEXT, Process.STOP)
+        ParsingRelation(root, stopper, 'x')
+
+        process = check_same(root, 'abx')
+        self.assertFalse(process.is_compilable(stopper))
+        self.assertTrue(process.is_compilable(root))
+
+        # Elements out of the compiled graph are compiled when met
+        extra = ComplexNotion('extra')
+        ParsingRelation(extra, ActionNotion('extra_action', Process.OK), 'e')
+
+        process = CompiledProcess()
+        self.assertEqual(process(process.NEW, extra, text='e'), Process.OK)
+        self.assertIn(extra, process._table)
+
+        process(process.NEW, root, text='')
+        self.assertNotIn(extra, process._table)
+
+        # Process with the changed events is interpreted
+        self.assertTrue(process.can_run_compiled())
+
+        debugger = ProcessDebugger(process)
+        debugger.reply_at(extra, Process.STOP)
+
+        self.assertFalse(process.can_run_compiled())
+        self.assertEqual(process(process.NEW, extra, text='e'), Process.STOP)
+
+        # As well as the process with the overridden or additional events, whatever the number of the events
+        class OverridingProcess(CompiledProcess):
+            def do_proceed(self):
+                return super(OverridingProcess, self).do_proceed()
+
+        class ReplacingProcess(CompiledProcess):
+            def setup_events(self):
+                super(ReplacingProcess, self).setup_events()
+                self.off_condition(self.can_proceed)
+                self.on(self.can_proceed, self.do_finish, Condition.DICT)
+
+        self.assertFalse(OverridingProcess().can_run_compiled())
+        self.assertFalse(ReplacingProcess().can_run_compiled())
+        self.assertEqual(len(ReplacingProcess().events), len(CompiledProcess().events))
+        self.assertTrue(type('PlainProcess', (CompiledProcess, ), {})().can_run_compiled())
+
+    def test_m_pickling(self):
+        # Conditions are interned again, the true condition is a singleton
+        condition = Condition.get_interned(['a', 'bc'], ignore_case=True)
+        self.assertIs(loads(dumps(condition)), condition)
+        self.assertIs(loads(dumps(TRUE_CONDITION)), TRUE_CONDITION)
+
+        regex = Condition(re.compile('[0-9]+'), 'tag')
+        copy = loads(dumps(regex))
+        self.assertEqual((copy.value.pattern, copy.tags, copy.check(['12a'], {})), ('[0-9]+', regex.tags, (2, '12')))
+
+        # Bound methods are reduced by the graph pickler only, the global table is kept
+        self.assertNotIn(type(self.setUp), pickle.dispatch_table)
+
+        # Graph: root -(*)-> select [-'a'-> a, -('b', 'c')-> bc, -(default: d-w)-> None], -(x)-> x -> acc
+        graph = Graph('root')
+        select = SelectiveNotion('select', graph)
+        loop = LoopRelation(graph.root, select, '*', graph)
+
+        ParsingRelation(select, ActionNotion('a', common_state_acc, graph), 'a', graph)
+        bc = ParsingRelation(select, ActionNotion('bc', lambda: None, graph), ['b', 'c'], graph)
+        select.default = ParsingRelation(select, None, re.compile('[d-w]'), graph)
+
+        x = ComplexNotion('x', graph)
+        x.memoize = False
+        ParsingRelation(graph.root, x, 'x', graph, ignore_case=True, optional=True, check_only=True)
+        action = ActionRelation(x, None, common_state_acc, graph)
+
+        self.assertRaises((pickle.PicklingError, AttributeError), dumps, graph)
+
+        data = dumps(graph, {'bc': bc.object.action.value})
+        self.assertRaises(pickle.UnpicklingError, loads, data)
+
+        copy = loads(data, {'bc': bc.object.action.value})
+
+        self.assertEqual([n.name for n in copy.notions()], [n.name for n in graph.notions()])
+        self.assertEqual([(r.__class__, str(r)) for r in copy.relations()],
+                         [(r.__class__, str(r)) for r in graph.relations()])
+        self.assertEqual(copy.root.relations, [r for r in copy.relations() if r.subject == copy.root])
+
+        c_select, c_loop, c_bc = copy.notion('select'), copy.relations()[0], copy.relations()[2]
+        self.assertEqual(c_loop.condition, loop.condition)
+        self.assertTrue(c_loop.is_wildcard())
+        self.assertTrue(copy.relations()[-2].check_only and copy.relations()[-2].optional)
+        self.assertIs(c_bc.condition_access, bc.condition_access)  # Interned
+        self.assertEqual(c_select.default.condition.pattern, '[d-w]')
+        self.assertIs(c_select.default.subject, c_select)
+        self.assertFalse(copy.notion('x').memoize)
+        self.assertEqual(copy.relation({Relation.SUBJECT: copy.notion('x')}).action, action.action)
+
+        for text in ('abx', 'cbdX', 'ay', 'z'):
+            results = []
+
+            for start in (graph, copy):
+                process = ParsingProcess()
+                results.append((process(process.NEW, start, text=text), process.parsed_length,
+                                process.context.get('acc'), str(process.current)))
+
+            self.assertEqual(results[0], results[1])
+
+        # Registered object methods are bound to the object registered with the same name when unpickled
+        first, second = TestCalls(), TestCalls()
+        copy = loads(dumps(ActionNotion('true', first.return_true), {'calls': first}), {'calls': second})
+        self.assertEqual(copy.action.value, second.return_true)
+
+        register('calls', first)
+        try:
+            self.assertEqual(loads(dumps(ActionNotion('true', first.return_true))).action.value, first.return_true)
+        finally:
+            unregister('calls')
+
+        # Lexer graph is built once and loaded by another lexer
+        from examples.cool_lexer import CoolLexer
+
+        filename = os.path.join(os.path.dirname(__file__), os.pardir, 'examples', 'hello.cool')
+        lexer = CoolLexer()
+        copy = CoolLexer(graph=lexer.dump_graph())
+
+        self.assertEqual(len(copy.builder.graph.notions()), len(lexer.builder.graph.notions()))
+        self.assertEqual(len(copy.builder.graph.relations()), len(lexer.builder.graph.relations()))
+        self.assertEqual(copy(copy.NEW, {copy.FILENAME: filename}), lexer(lexer.NEW, {lexer.FILENAME: filename}))
+
+    @unittest.skipIf(asyncio is None, 'asyncio is not available')
+    def test_n_async(self):
+        loop = asyncio.new_event_loop()
+        log = []
+
+        def later(result, name=None):
+            if name is not None:
+                log.append(name)
+
+            return asyncio.sleep(0, result)  # Awaitable returned by an action
+
+        # Awaited results are handled as the event results: commands, next elements, stops
+        a = ActionNotion('a', lambda: later({SharedProcess.ADD_CONTEXT: {'a': 1}}))
+        c = ActionNotion('c', lambda: later(Process.STOP))
+        root = ComplexNotion('root')
+        NextRelation(root, a)
+        ActionRelation(root, c, lambda: later(None))
+
+        process = AsyncParsingProcess()
+        self.assertEqual(loop.run_until_complete(process(process.NEW, root)), Process.STOP)
+        self.assertEqual(process.context['a'], 1)
+        self.assertEqual(process.current, c)
+
+        # Parsing with the awaited context updates is the same as the synchronous one
+        def count_words(wrap):
+            words, word = ComplexNotion('words'), ComplexNotion('word')
+            LoopRelation(words, word, '*')
+            acc = ActionNotion('acc', lambda acc: wrap({SharedProcess.UPDATE_CONTEXT: {'acc': acc + 1}}))
+            ParsingRelation(word, acc, re.compile('[a-z]+ ?'))
+
+            return words
+
+        for text in ('one two three', 'one 2'):
+            sync, process = ParsingProcess(), AsyncParsingProcess()
+            result = sync(sync.NEW, count_words(lambda r: r), text=text, acc=0)
+            expected = result, sync.parsed_length, sync.context['acc']
+
+            result = loop.run_until_complete(process(process.NEW, count_words(later), text=text, acc=0))
+            self.assertEqual((result, process.parsed_length, process.context['acc']), expected)
+
+        # Concurrent processes interleave on the same loop
+        counter = ComplexNotion('counter')
+        LoopRelation(counter, ActionNotion('count', lambda name: later(None, name)), 5)
+
+        processes = [AsyncParsingProcess() for _ in range(3)]
+        tasks = [loop.create_task(p(p.NEW, counter, name=i)) for i, p in enumerate(processes)]
+        loop.run_until_complete(asyncio.gather(*tasks))
+
+        self.assertEqual(sorted(log), [0] * 5 + [1] * 5 + [2] * 5)
+        self.assertNotEqual(log, sorted(log))
+
+        # Synchronous actions interleave when the processes yield every few steps
+        counter.relations[0].object.action = lambda name: log.append(name)
+
+        for yield_steps in (0, 3):
+            del log[:]
+
+            for process in processes:
+                process.YIELD_STEPS = yield_steps
+
+            tasks = [loop.create_task(p(p.NEW, counter, name=i)) for i, p in enumerate(processes)]
+            loop.run_until_complete(asyncio.gather(*tasks))
+
+            self.assertEqual(log == sorted(log), not yield_steps)
+
+        # Limits stop the coroutine as well, the awaited results count as steps
+        process = AsyncParsingProcess()
+        process.limits[Process.STEPS] = 10
+
+        self.assertEqual(loop.run_until_complete(process(process.NEW, count_words(later), text='one two', acc=0)),
+                         Process.LIMIT)
+        self.assertEqual(process.limit_report[Process.STEPS], 10)
+
+        process.limits.clear()
+        self.assertEqual(loop.run_until_complete(process()), None)
+        self.assertEqual(process.parsed_length, 7)
+
+        loop.close()
+
+    def test_o_threads(self):
+        # Shared graph: root -(*)-> select [-'ab'-> ab, -('a', 'b')-> letter, -(re: a.)-> pair, -(default)-> other]
+        root, select = ComplexNotion('root'), SelectiveNotion('select')
+        LoopRelation(root, select, '*')
+
+        ParsingRelation(select, ActionNotion('ab', common_state_acc), 'ab')
+        ParsingRelation(select, ActionNotion('letter', {SharedProcess.UPDATE_CONTEXT: {'letter': True}}), ['a', 'b'])
+        ParsingRelation(select, ActionNotion('pair', lambda acc=0: {SharedProcess.UPDATE_CONTEXT: {'acc': acc + 2}}),
+                        re.compile('a.'))
+        select.default = ParsingRelation(select, None, re.compile('[c-y]'))
+
+        texts = ['abacab' * 5, 'aabbz', 'bcd' * 10, 'acxb']
+        factories = [ParsingProcess, lambda: ParsingProcess(cursor=True, packrat=4), lambda: CompiledProcess(root)]
+
+        def parse(process, text):
+            return process(process.NEW, root, text=text), process.parsed_length, \
+                process.context.get('acc'), process.context.get('letter'), str(process.current)
+
+        # The dictionary action is not consumed by the processes
+        expected = [parse(ParsingProcess(), text) for text in texts]
+        self.assertEqual([parse(ParsingProcess(), text) for text in texts], expected)
+
+        results, errors = [], []
+
+        def worker(factory):
+            try:
+                process = factory()
+                results.append([[parse(process, text) for text in texts] for _ in range(5)])
+            except Exception as e:
+                errors.append(e)
+
+        interval = sys.getswitchinterval() if hasattr(sys, 'getswitchinterval') else None
+        if interval:
+            sys.setswitchinterval(1e-6)  # Switching as often as possible
+
+        try:
+            threads = [threading.Thread(target=worker, args=(factories[i % len(factories)], )) for i in range(6)]
+
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            if interval:
+                sys.setswitchinterval(interval)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), 6)
+
+        for result in results:
+            self.assertEqual(result, [expected] * 5)
+
+        # The pool hands out the processes to the threads
+        pool, results = ProcessPool(root, 4), []
+
+        def pooled(text):
+            with pool.process() as process:
+                results.append(parse(process, text))
+
+        threads = [threading.Thread(target=pooled, args=(text, )) for text in texts * 5]
+
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(sorted(results, key=str), sorted(expected * 5, key=str))
+        self.assertTrue(len(pool) > 0)
+
+    def test_p_freeze(self):
+        # Graph: root -(1..2)-> word -(*)-> select [-'ab'-> ab, -(a, b)-> letter, -(default)-> other] -(True)-> end
+        graph = Graph('root')
+        root, word, select = graph.root, ComplexNotion('word', graph), SelectiveNotion('select', graph)
+        loop = LoopRelation(root, word, (1, 2), graph)
+        LoopRelation(word, select, '*', graph)
+        ParsingRelation(select, ActionNotion('ab', common_state_acc, graph), 'ab', graph)
+        letter = ParsingRelation(select, ActionNotion('letter', {SharedProcess.UPDATE_CONTEXT: {'letter': True}},
+                                                      graph), ['a', 'b'], graph)
+        select.default = ParsingRelation(select, None, re.compile('[c-y]'), graph)
+        ParsingRelation(root, ParsingProcess.OK, 'z', graph, optional=True)
+
+        texts = ['abacab' * 5, 'aabbz', 'bcd' * 10, 'acxb', '']
+
+        def parse(process, text):
+            return process(process.NEW, graph, text=text), process.parsed_length, \
+                process.context.get('acc'), process.context.get('letter')
+
+        expected = [parse(ParsingProcess(), text) for text in texts]
+
+        graph.freeze()
+        self.assertTrue(graph.frozen and root.frozen and loop.frozen and letter.frozen)
+
+        self.assertEqual([parse(ParsingProcess(), text) for text in texts], expected)
+        self.assertEqual([parse(ParsingProcess(cursor=True, packrat=4), text) for text in texts], expected)
+        compiled = CompiledProcess(graph)
+        self.assertEqual([parse(compiled, text) for text in texts], expected)
+
+        # The replies are precomputed
+        self.assertIs(root.do_forward(), root.do_forward())
+        self.assertEqual(root.do_visit(), tuple(root.relations))
+        self.assertEqual(select.get_cases(), tuple(select.relations[:2]))
+        self.assertEqual(loop.get_bounds(), (1, 2))
+        self.assertTrue(loop.is_flexible())
+
+        # Frozen elements cannot be changed
+        with self.assertRaises(AttributeError):
+            loop.condition = 3
+
+        with self.assertRaises(AttributeError):
+            select.default = None
+
+        with self.assertRaises(AttributeError):
+            root.name = 'new root'
+
+        with self.assertRaises(AttributeError):
+            graph.root = word
+
+        with self.assertRaises(AttributeError):
+            word.owner = None
+
+        with self.assertRaises(AttributeError):
+            select.remove_all()
+
+        # Including the events, flags and relations
+        with self.assertRaises(AttributeError):
+            root.on('ping', 'pong')
+
+        with self.assertRaises(AttributeError):
+            letter.off_event(letter.unknown_event)
+
+        with self.assertRaises(AttributeError):
+            letter.optional = True
+
+        with self.assertRaises(AttributeError):
+            letter.check_only = True
+
+        with self.assertRaises(AttributeError):
+            word.memoize = False
+
+        with self.assertRaises(AttributeError):
+            word.relations.append(loop)
+
+        self.assertNotEqual(root('ping'), 'pong')
+        self.assertFalse(letter.optional or letter.check_only)
+        self.assertTrue(word.memoize)
+
+        # As well as the frozen containers
+        with self.assertRaises(AttributeError):
+            NextRelation(word, Notion('new'))
+
+        with self.assertRaises(AttributeError):
+            Notion('new', graph)
+
+        self.assertEqual(len(word.relations), 1)
+        self.assertEqual(len(graph.notions()), 5)
+
+        # Other elements could refer to the frozen ones
+        outer = ComplexNotion('outer')
+        NextRelation(outer, root)
+        self.assertEqual(ParsingProcess()(ParsingProcess.NEW, outer, text='aabbz'), expected[1][0])
+
+        # The frozen flag is not pickled
+        self.assertFalse(pickle.loads(pickle.dumps(graph)).frozen)
+
+        # Unfreezing drops the precomputed replies
+        graph.unfreeze()
+        self.assertFalse(graph.frozen or root.frozen or loop.frozen or letter.frozen)
+
+        loop.condition = 1
+        self.assertEqual(loop.get_bounds(), (1, 1))
+        self.assertFalse(loop.is_flexible())
+
+        select.default = None
+        self.assertEqual(select.get_cases(), tuple(select.relations))
+
+        ParsingRelation(word, ParsingProcess.BREAK, 'x', graph)
+        self.assertEqual(len(word.do_forward()), 2)
+
+        letter.optional = word.memoize = True
+        letter.optional = word.memoize = False
+        self.assertIsInstance(word.relations, list)
+
+        # The compiled process sees the relations added after unfreezing
+        ParsingRelation(select, ActionNotion('q', None, graph), 'q', graph)
+        texts = ['abxab', 'aqb', 'qq', 'acx']
+        expected = [parse(ParsingProcess(), text) for text in texts]
+
+        self.assertEqual([parse(compiled, text) for text in texts], expected)
+        self.assertEqual(expected[2][1], 2)  # The new case is used
+
+        graph.freeze()
+        self.assertEqual(word.do_forward(), tuple(word.relations))
+        self.assertEqual(select.get_cases(), tuple(select.relations))
+
+    def test_q_limits(self):
+        # Backtracking: root -(*)-> select [-> cb -(*)-> ab -'a'->; -'b'->, ... cd]
+        root, select = ComplexNotion('root'), SelectiveNotion('select')
+        LoopRelation(root, select, '*')
+        loops = []
+
+        for end in 'bcd':
+            case, a = ComplexNotion('c' + end), ComplexNotion('a' + end)
+            NextRelation(select, case)
+            loops.append(LoopRelation(case, a, '*'))
+            ParsingRelation(a, None, 'a')
+            ParsingRelation(case, None, end)
+
+        text = 'a' * 20 + 'd' + 'a' * 5 + 'c'
+
+        for factory in (ParsingProcess, lambda: ParsingProcess(cursor=True), lambda: CompiledProcess(root)):
+            process = factory()
+            expected = process(process.NEW, root, text=text), process.parsed_length
+            self.assertEqual(expected[1], len(text))
+            self.assertIsNone(process.limit_report)
+
+            for limits, stop in (({Process.STEPS: 50}, {Process.STEPS: 50, StackingProcess.DEPTH: 3,
+                                                         ParsingProcess.PARSED_LENGTH: 2}),
+                                 ({StackingProcess.DEPTH: 2}, {StackingProcess.DEPTH: 3,
+                                                               Process.CURRENT: loops[0]}),
+                                 ({StackingProcess.BACKTRACKS: 1}, {StackingProcess.BACKTRACKS: 2,
+                                                                    Process.QUERY: ParsingProcess.ERROR}),
+                                 ({Process.TIMEOUT: 0, Process.STEPS: None}, {Process.STEPS: 0})):
+                process = factory()
+                process.limits = limits
+
+                self.assertEqual(process(process.NEW, root, text=text), Process.LIMIT)
+
+                report = process.limit_report
+                self.assertEqual(report[Process.LIMIT], [k for k in limits if limits[k] is not None][0])
+
+                for key, value in stop.items():
+                    self.assertEqual(report[key], value)
+
+                # The process could be resumed
+                process.limits = {}
+                self.assertEqual((process(), process.parsed_length), expected)
+                self.assertIsNone(process.limit_report)
+
+    def test_r_stats(self):
+        # Backtracking: root -(*)-> select [-> cb -(*)-> ab -'a'->; -'b'->, ... cd]
+        root, select = ComplexNotion('root'), SelectiveNotion('select')
+        LoopRelation(root, select, '*')
+
+        for end in 'bcd':
+            case, a = ComplexNotion('c' + end), ComplexNotion('a' + end)
+            NextRelation(select, case)
+            LoopRelation(case, a, '*')
+            ParsingRelation(a, None, 'a')
+            ParsingRelation(case, None, end)
+
+        text = 'a' * 5 + 'd' + 'a' * 2 + 'c'
+
+        process = ParsingProcess()
+        expected = process(process.NEW, root, text=text), process.parsed_length
+        self.assertIsNone(process.stats)
+
+        stats, persistent = [], process.persistent
+
+        for factory in (ParsingProcess, lambda: ParsingProcess(cursor=True),
+                        lambda: CompiledProcess(root, persistent=persistent)):
+            process = factory()
+            process.collect_stats = True
+
+            self.assertEqual((process(process.NEW, root, text=text), process.parsed_length), expected)
+            stats.append(process.stats)
+
+        # The statistics do not depend on the cursor mode and the compilation
+        self.assertEqual(stats[0], stats[1])
+        self.assertEqual(stats[0], stats[2])
+
+        stats = stats[0]
+        elements, events = stats[Process.ELEMENTS], stats[Process.EVENTS]
+
+        self.assertEqual(stats[ParsingProcess.PARSED_LENGTH], len(text))
+        self.assertEqual(stats[Process.STEPS], sum(events.values()))
+        self.assertEqual(sum(c[Process.QUERIES] for c in elements.values()), events['do_query'])
+        self.assertEqual(sum(c[StackingProcess.PUSH_CONTEXT] for c in elements.values()), events['do_push_context'])
+        self.assertEqual(sum(c[StackingProcess.POP_CONTEXT] for c in elements.values()), events['do_pop_context'])
+        self.assertTrue(stats[Process.PEAK_QUEUE] > 1)
+
+        # 'aaaaad': b and c fail, then 'aac': b fails
+        self.assertEqual(elements[select][StackingProcess.RETRIES], 6)
+        self.assertEqual(elements[select][Process.QUERIES], 11)
+        self.assertEqual(elements[root][Process.QUERIES], 1)
+
+        for counters in elements.values():
+            self.assertTrue(counters[Process.CHECKS] >= counters[Process.DISPATCHES])
+
+        table = get_stats_table(stats, StackingProcess.RETRIES, 2)
+        self.assertEqual(table[0][:4], ['element', Process.QUERIES, Process.CHECKS, Process.DISPATCHES])
+        self.assertEqual(table[1][0], select)
+        self.assertEqual(len(table), 3)
+        self.assertEqual(len(format_table(table).split('\n')), 3)
+
+        # NEW resets the statistics, resuming keeps counting
+        process = ParsingProcess()
+        process.collect_stats = True
+        process.limits[Process.STEPS] = 100
+
+        self.assertEqual(process(process.NEW, root, text=text), Process.LIMIT)
+        self.assertEqual(process.stats[Process.STEPS], 100)
+
+        process.limits.clear()
+        process()
+        self.assertEqual(process.stats[Process.STEPS], stats[Process.STEPS])
+
+        process(process.NEW, root, text='ab')
+        self.assertEqual(process.stats[Process.STEPS], sum(process.stats[Process.EVENTS].values()))
+        self.assertTrue(process.stats[Process.STEPS] < stats[Process.STEPS])
+
+    def test_s_profiler(self):
+        root = ComplexNotion('root')
+        NextRelation(root, ActionNotion('fast', lambda: None))
+        NextRelation(root, ActionNotion('slow', lambda: time.sleep(0.2)))
+        NextRelation(root, Notion('end'))  # Otherwise the root item is replaced by the last relation one
+
+        process = StackingProcess()
+        profiler = ProcessProfiler(process, 0.01)
+
+        with profiler:
+            process(root)
+
+        self.assertIsNone(profiler._thread)
+        self.assertTrue(profiler.samples > 0)
+
+        # The most of the time is spent in the slow action, called from the root
+        lines = dict(line.rsplit(' ', 1) for line in profiler.collapsed().split('\n'))
+        slow = 'root;slow'  # The relation item is replaced by the notion one
+        self.assertIn(slow, lines)
+        self.assertTrue(int(lines[slow]) >= 100000)
+        self.assertTrue(int(lines[slow]) > sum(int(t) for t in lines.values()) / 2)
+
+        table = profiler.get_top_table(2)
+        self.assertEqual(table[0], ['element', 'self', 'total'])
+        self.assertEqual(table[1][0], 'slow')
+        self.assertEqual(len(table), 3)
+
+        totals = dict((row[0], float(row[2])) for row in profiler.get_top_table()[1:])
+        self.assertTrue(totals['root'] >= totals['slow'])
+
+        profiler.clear()
+        self.assertEqual(profiler.collapsed(), '')
+        self.assertEqual(len(profiler.get_top_table()), 1)
+
+    def test_t_heat(self):
+        root, select = ComplexNotion('root'), SelectiveNotion('select')
+        loop = LoopRelation(root, select, '*')
+
+        a, b = ParsingRelation(select, None, 'a'), ParsingRelation(select, None, 'b')
+
+        process = ParsingProcess()
+        process.collect_stats = True
+        process(process.NEW, root, text='aab')
+        self.assertEqual(process.parsed_length, 3)
+
+        heat = get_stats_heat(process.stats, Process.QUERIES)
+        self.assertEqual(heat, {root: 1, loop: 5, select: 4})
+
+        d = DotExport()
+        d(d.NEW, root, heat=heat)
+        self.assertNotIn(d.HEAT, d.context)
+
+        # The hottest is red and wide, not reached is gray
+        self.assertIn('cn_0 -> sn_0[color = "0.000 1.000 1.000", fontcolor = blue, label = "*\\n5", penwidth = 5.0, '
+                      'style = ""]', d.out)
+        self.assertIn('sn_0[color = "0.133 1.000 1.000", label = "select\\n4", penwidth = 4.2, shape = doublecircle]',
+                      d.out)
+        self.assertIn('cn_0[color = "0.534 1.000 1.000", label = "root\\n1", penwidth = 1.8, shape = circle]', d.out)
+        self.assertIn('sn_0 -> empty_0[color = gray, fontcolor = blue, label = "a", style = ""]', d.out)
+
+        self.assertEqual(d.get_heat_attributes(b, {'label': '"b"'}), {'label': '"b"', 'color': 'gray'})
+        self.assertEqual(d.get_heat_attributes(select, {'label': '"s"'}),
+                         {'label': '"s\\n4"', 'color': '"0.133 1.000 1.000"', 'penwidth': '4.2'})
+
+        # Zero heat is cold, no heat is the plain export
+        d.set_heat({a: 0})
+        self.assertEqual(d.get_heat_attributes(a, {'label': '"a"'}),
+                         {'label': '"a\\n0"', 'color': '"0.667 1.000 1.000"', 'penwidth': '1.0'})
+
+        plain = DotExport()
+        plain(plain.NEW, root)
+        d(d.NEW, root)
+        self.assertEqual(d.out, plain.out)
+        self.assertNotIn('penwidth', d.out)
+
+        # The times of the profiler
+        profiler = ProcessProfiler(process)
+        profiler.stacks[(root, select)] = 1.0
+        profiler.stacks[(root, select, a)] = 0.5
+
+        self.assertEqual(profiler.get_element_times(), {select: 1.0, a: 0.5})
+        self.assertEqual(profiler.get_element_times(True), {root: 1.5, select: 1.5, a: 0.5})
+
+    def test_u_trace(self):
+        root, select = ComplexNotion('root'), SelectiveNotion('select')
+        loop = LoopRelation(root, select, '*')
+
+        ParsingRelation(select, None, 'a')
+        ParsingRelation(select, None, 'b')
+
+        plain = ParsingProcess()
+        expected = plain(plain.NEW, root, text='aab'), plain.parsed_length, sorted(plain.context)
+
+        process = CompiledProcess(root, persistent=plain.persistent)
+        process.collect_stats = True
+        tracer = ProcessTracer(process, 4)
+
+        with tracer:
+            self.assertTrue(tracer.tracing)
+            self.assertFalse(process.can_run_compiled())
+
+            result = process(process.NEW, root, text='aab'), process.parsed_length, sorted(process.context)
+
+        # The traced process works the same, all its steps are counted, the last queries are kept
+        self.assertEqual(result, expected)
+        self.assertEqual(tracer.steps, process.stats[Process.STEPS])
+        self.assertEqual(len(tracer.records), tracer.size)
+
+        records = list(tracer.records)
+        self.assertEqual([r.element_id for r in records], [id(select), id(loop), id(select), id(loop)])
+        self.assertEqual([r.label for r in records], ['select', str(loop), 'select', str(loop)])
+        self.assertEqual([r.reply for r in records], ['tuple', 'list', 'error', 'list'])
+        self.assertEqual([r.offset for r in records], [2, 3, 3, 3])
+        self.assertEqual([r.depth for r in records], [2, 1, 2, 1])
+        self.assertEqual([r.query for r in records], [Process.NEXT] * 3 + [ParsingProcess.ERROR])
+        self.assertTrue(all(r1.step < r2.step and r1.time <= r2.time for r1, r2 in zip(records, records[1:])))
+        self.assertEqual(pickle.loads(pickle.dumps(records)), records)  # No elements are kept
+
+        # No hooks are left after the tracing
+        self.assertFalse(tracer.tracing)
+        self.assertTrue(all(event.post_event is None for _, event in process.events))
+
+        collect_stats, process.collect_stats = process.collect_stats, False
+        self.assertTrue(process.can_run_compiled())
+        process(process.NEW, root, text='ab')
+        self.assertEqual(len(tracer.records), 4)
+
+        # Nested boxes of the trace
+        events = tracer.get_chrome_trace()['traceEvents']
+        self.assertEqual([(e['name'], e['cat'], e['ph'], e['args']['step']) for e in events],
+                         [('select', 'next', 'X', records[0].step), (str(loop), 'next', 'X', records[1].step),
+                          ('select', 'next', 'X', records[2].step), (str(loop), 'error', 'X', records[3].step)])
+
+        parent, child = events[1], events[2]
+        self.assertTrue(parent['ts'] <= child['ts'])
+        self.assertTrue(child['ts'] + child['dur'] <= parent['ts'] + parent['dur'] + 0.001)
+
+        self.assertAlmostEqual(events[0]['ts'] + events[0]['dur'], events[1]['ts'], 2)
+        self.assertAlmostEqual(events[1]['ts'] + events[1]['dur'], events[3]['ts'], 2)
+
+        handle, filename = tempfile.mkstemp('.json')
+        os.close(handle)
+
+        try:
+            tracer.save_chrome_trace(filename)
+
+            with open(filename) as f:
+                self.assertEqual(len(json.load(f)['traceEvents']), 4)
+        finally:
+            os.remove(filename)
+
+        # The other post-events are kept and called
+        debugger = ProcessDebugger(process)
+        debugger.reply_at(select, ParsingProcess.ERROR)
+
+        tracer.clear()
+        self.assertEqual((len(tracer.records), tracer.steps), (0, 0))
+
+        with tracer:
+            self.assertFalse(process(process.NEW, root, text='aab'))
+
+        self.assertEqual([(r.element_id, r.query, r.reply) for r in tracer.records][-2:],
+                         [(id(loop), Process.NEXT, 'list'), (id(loop), ParsingProcess.ERROR, 'list')])  # Not select
+        self.assertTrue(any(event.post_event for _, event in process.events))
+        self.assertEqual(tracer.get_reply_kind({}), 'dict')
+
+    def test_v_breakpoints(self):
+        root, select = ComplexNotion('root'), SelectiveNotion('select')
+        loop = LoopRelation(root, select, '*')
+
+        ParsingRelation(select, None, 'a')
+        ParsingRelation(select, None, 'b')
+
+        def hooks():
+            return [event.value for _, event in process.events if event.post_event]
+
+        process = CompiledProcess(root)
+        debugger = ProcessDebugger(process)
+
+        # No points - no hooks, the process runs compiled
+        self.assertEqual(hooks(), [])
+        self.assertTrue(process.can_run_compiled())
+
+        # Stops before the query of the element on the third hit, resumes from there
+        point = debugger.break_at(select, hits=3)
+        self.assertEqual(hooks(), [process.do_queue_push])
+
+        self.assertEqual(process(process.NEW, root, text='aab'), Process.STOP)
+        self.assertIs(debugger.stopped_at, point)
+        self.assertEqual((process.current, process.parsed_length, point.count), (select, 2, 3))
+
+        self.assertEqual(process(), Process.STOP)
+        self.assertEqual((process.parsed_length, point.count), (3, 4))
+
+        debugger.remove_point(point)
+        self.assertEqual(hooks(), [])
+
+        process()
+        self.assertEqual(process.parsed_length, 3)
+
+        # Offset and condition
+        debugger.break_at(select, offset=1, condition=lambda p: p.last_parsed == 'a')
+        self.assertEqual(process(process.NEW, root, text='bab'), Process.STOP)
+        self.assertEqual(process.parsed_length, 2)
+
+        debugger.clear_at(select)
+        self.assertIsNone(process())
+        self.assertEqual(process.parsed_length, 3)
+
+        # Reply replaces the breakpoints of the element
+        debugger.break_at(select)
+        debugger.reply_at(select, ParsingProcess.ERROR)
+        self.assertFalse(process(process.NEW, root, text='ab'))
+        self.assertEqual(debugger.stopped_at.reply, ParsingProcess.ERROR)
+
+        # Log points
+        class Output(object):
+            def __init__(self):
+                self.lines = []
+
+            def write(self, text):
+                self.lines.append(text)
+
+        debugger.stream = output = Output()
+        debugger.clear_points()
+        debugger.log_at(loop)
+        self.assertEqual(hooks(), [process.do_query])
+
+        process(process.NEW, root, text='ab')
+
+        logged = [line for line in output.lines if line.strip()]
+        self.assertEqual(len(logged), 4)  # Three loops and the error
+        self.assertTrue(all(line.startswith(str(loop)) for line in logged))
+
+        debugger.show_log()
+        debugger.clear_at(loop)
+        self.assertEqual(hooks(), [process.do_query])
+
+        debugger.hide_log()
+        self.assertEqual(hooks(), [])
+
+        # Hooks are removed on detach, the other post-events are kept
+        debugger.break_at(select, offset=2)
+        tracer = ProcessTracer(process)
+
+        with tracer:
+            self.assertEqual(process(process.NEW, root, text='aab'), Process.STOP)
+            debugger.detach()
+            self.assertIsNone(process())
+
+        self.assertEqual(hooks(), [])
+        self.assertEqual(tracer.records[-1].element_id, id(loop))
+        self.assertTrue(process.can_run_compiled())
+
+        debugger.attach(process)
+        self.assertEqual(hooks(), [process.do_queue_push])
+
     def test_z_special(self):
         # Complex loop test: root -(*)-> sequence [-(a)-> a's -> a, -(b)-> b's -> b]
         root = ComplexNotion('root')